@@ -0,0 +1,4 @@
+"""
+Gateway micro-benchmarks
+실행 예: python -m ai_gateway.benchmarks.bench_settings
+"""
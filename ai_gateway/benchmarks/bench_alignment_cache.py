@@ -0,0 +1,67 @@
+"""
+Benchmark: 같은 도면 쌍을 mode / 임계값만 바꿔 다시 비교할 때 alignment cache 유무 비교
+(raster cache는 양쪽 모두 켜 둠 → 정렬 단계 차이만 측정)
+
+python -m ai_gateway.benchmarks.bench_alignment_cache [feature count]
+"""
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from ..services.alignment_cache import alignment_cache
+from ..services.image_processor import process_comparison
+from .bench_image_pool import drawing_pair
+
+# (설명, mode, diff_threshold, bin_threshold, 두 번째 파일)
+SCENARIOS = (
+    ("first comparison", "difference", 30, 200, "rev_b"),
+    ("switch to overlay", "overlay", 30, 200, "rev_b"),
+    ("diff_threshold 60", "difference", 60, 200, "rev_b"),
+    ("bin_threshold 180", "difference", 60, 180, "rev_b"),
+    ("same baseline, rev C", "difference", 30, 200, "rev_c"),
+)
+
+
+def revision_c(baseline: bytes) -> bytes:
+    """기준 도면의 다른 개정본 (기준 도면 특징점 재사용 확인용)."""
+    img = cv2.imdecode(np.frombuffer(baseline, np.uint8), cv2.IMREAD_COLOR)
+    cv2.circle(img, (1200, 850), 150, (0, 0, 0), 5)
+    return cv2.imencode(".png", img)[1].tobytes()
+
+
+def run(files: dict, feature_count: int) -> list:
+    timings = []
+    for _, mode, diff_threshold, bin_threshold, other in SCENARIOS:
+        started = time.perf_counter()
+        process_comparison(
+            files["baseline"], "image/png", files[other], "image/png",
+            mode=mode, diff_threshold=diff_threshold, feature_count=feature_count, bin_threshold=bin_threshold
+        )
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    feature_count = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    baseline, rev_b = drawing_pair()
+    files = {"baseline": baseline, "rev_b": rev_b, "rev_c": revision_c(baseline)}
+
+    # 첫 실행으로 raster cache를 채움 (양쪽 모두 디코딩 비용 제외)
+    alignment_cache.configure(max_features=0, max_homographies=0)
+    run(files, feature_count)
+    uncached = run(files, feature_count)
+
+    alignment_cache.configure(max_features=64, max_homographies=1024)
+    cached = run(files, feature_count)
+
+    print(f"feature_count: {feature_count}")
+    print(f"{'scenario':24s} {'no cache':>10s} {'cache':>10s}")
+    for (name, *_), before, after in zip(SCENARIOS, uncached, cached):
+        print(f"{name:24s} {before * 1000:8.1f}ms {after * 1000:8.1f}ms")
+    print(f"{'total':24s} {sum(uncached) * 1000:8.1f}ms {sum(cached) * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: Difference 모드 픽셀 단계
+- legacy: compare_images() + generate_highlighted_images()가 각각 전체 마스크 계산 (불리언 임시 배열, 불리언 인덱싱)
+- fused: compare_difference() (마스크 1회 계산, cv2 비트 연산 / 제자리 연산)
+
+python -m ai_gateway.benchmarks.bench_diff_kernel [size] [repeats]
+"""
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from ..services.image_processor import compare_difference
+from .bench_image_pool import drawing_pair
+
+
+def legacy_masks(A_bgr, B_bgr, diff_thresh, bin_thresh):
+    """변경 전 compare_images / generate_highlighted_images의 공통 마스크 계산"""
+    A_gray = cv2.cvtColor(A_bgr, cv2.COLOR_BGR2GRAY)
+    B_gray = cv2.cvtColor(B_bgr, cv2.COLOR_BGR2GRAY)
+    _, A_bin = cv2.threshold(A_gray, bin_thresh, 255, cv2.THRESH_BINARY_INV)
+    _, B_bin = cv2.threshold(B_gray, bin_thresh, 255, cv2.THRESH_BINARY_INV)
+    diff = cv2.absdiff(A_gray, B_gray)
+    _, diff_mask = cv2.threshold(diff, diff_thresh, 255, cv2.THRESH_BINARY)
+    only_A = np.logical_and(A_bin > 0, B_bin == 0).astype(np.uint8) * 255
+    only_B = np.logical_and(B_bin > 0, A_bin == 0).astype(np.uint8) * 255
+    both = np.logical_and(A_bin > 0, B_bin > 0).astype(np.uint8) * 255
+    diff_common = np.logical_and(diff_mask > 0, both > 0)
+    darker_in_A = np.logical_and(diff_common, A_gray < B_gray)
+    darker_in_B = np.logical_and(diff_common, B_gray < A_gray)
+    only_A = np.logical_or(only_A > 0, darker_in_A)
+    only_B = np.logical_or(only_B > 0, darker_in_B)
+    return only_A, only_B, both, diff_mask
+
+
+def legacy_difference(A_bgr, B_bgr, diff_thresh=30, bin_thresh=200):
+    """변경 전 process_comparison의 difference 분기 (마스크를 두 번 계산)"""
+    h, w = A_bgr.shape[:2]
+    only_A, only_B, both, diff_mask = legacy_masks(A_bgr, B_bgr, diff_thresh, bin_thresh)
+    both = np.logical_and(both > 0, ~diff_mask.astype(bool))
+    result = np.full((h, w, 3), 255, dtype=np.uint8)
+    result[both] = [0, 0, 0]
+    result[only_A] = [255, 0, 0]
+    result[only_B] = [0, 0, 255]
+
+    only_A, only_B, _, _ = legacy_masks(A_bgr, B_bgr, diff_thresh, bin_thresh)
+    imgA_out = A_bgr.copy()
+    imgA_out[only_A] = [255, 0, 0]
+    imgB_out = B_bgr.copy()
+    imgB_out[only_B] = [0, 0, 255]
+    return result, imgA_out, imgB_out
+
+
+def measure(kernel, A, B, repeats: int) -> tuple[float, float, int]:
+    """Returns (wall ms, CPU ms, peak traced bytes) per call."""
+    kernel(A, B)
+    tracemalloc.start()
+    kernel(A, B)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(repeats):
+        kernel(A, B)
+    return (
+        (time.perf_counter() - wall) * 1000 / repeats,
+        (time.process_time() - cpu) * 1000 / repeats,
+        peak
+    )
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    file1, file2 = drawing_pair(size, size)
+    A = cv2.imdecode(np.frombuffer(file1, np.uint8), cv2.IMREAD_COLOR)
+    B = cv2.imdecode(np.frombuffer(file2, np.uint8), cv2.IMREAD_COLOR)
+
+    outputs = [legacy_difference(A, B), compare_difference(A, B)]
+    identical = all(np.array_equal(x, y) for x, y in zip(*outputs))
+
+    print(f"page: {size}x{size}, {repeats} repeats, outputs identical: {identical}")
+    for name, kernel in (("legacy (2x masks)", legacy_difference), ("fused kernel", compare_difference)):
+        wall, cpu, peak = measure(kernel, A, B, repeats)
+        print(f"{name:18s} wall {wall:8.1f} ms   CPU {cpu:8.1f} ms   peak memory {peak / 1024 / 1024:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
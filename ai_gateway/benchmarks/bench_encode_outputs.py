@@ -0,0 +1,72 @@
+"""
+Benchmark: 비교 결과 인코딩 단계 (json 응답 기준, 미리보기 3장 + 다운로드 1장)
+- sequential: 원본 크기 JPEG 3장 + PNG 1장을 한 스레드에서 차례로 (변경 전)
+- parallel: 같은 출력을 인코딩 스레드에서 동시에 (cv2.imencode는 GIL을 놓음)
+- parallel + preview N: 화면 표시용 이미지를 N px로 축소 후 인코딩
+- webp / png 압축 레벨 등 이미지별 형식 지정
+
+벽시계 시간 이득은 CPU 코어 수에 비례 (1코어에서는 병렬 이득 없음, 축소 이득만 남음)
+
+python -m ai_gateway.benchmarks.bench_encode_outputs [size] [repeats]
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from ..services.image_processor import (
+    PREVIEW_MAX_DIMENSION, compare_difference, encode_image_to_base64, encode_outputs, parse_output_formats
+)
+from .bench_image_pool import drawing_pair
+
+
+def sequential(result, file1_result, file2_result) -> dict:
+    """변경 전 compare_loaded의 인코딩 단계"""
+    return {
+        "result_base64": encode_image_to_base64(result, format='JPEG', quality=85),
+        "file1_base64": encode_image_to_base64(file1_result, format='JPEG', quality=85),
+        "file2_base64": encode_image_to_base64(file2_result, format='JPEG', quality=85),
+        "download_base64": encode_image_to_base64(result, format='PNG')
+    }
+
+
+def measure(encode, repeats: int):
+    """Returns (wall ms, CPU ms, total base64 MB)."""
+    outputs = encode()
+    wall, cpu = time.perf_counter(), time.process_time()
+    for _ in range(repeats):
+        encode()
+    return (
+        (time.perf_counter() - wall) * 1000 / repeats,
+        (time.process_time() - cpu) * 1000 / repeats,
+        sum(len(value) for value in outputs.values()) / 1024 / 1024
+    )
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    file1, file2 = drawing_pair(size, size * 2833 // 4000)
+    A = cv2.imdecode(np.frombuffer(file1, np.uint8), cv2.IMREAD_COLOR)
+    B = cv2.imdecode(np.frombuffer(file2, np.uint8), cv2.IMREAD_COLOR)
+    images = compare_difference(A, B)
+
+    variants = (
+        ("sequential (before)", lambda: sequential(*images)),
+        ("parallel", lambda: encode_outputs(*images, preview_max_dimension=0)),
+        (f"parallel + preview {PREVIEW_MAX_DIMENSION}", lambda: encode_outputs(*images)),
+        ("  + preview webp:80", lambda: encode_outputs(*images, output_formats=parse_output_formats("preview:webp:80"))),
+        ("  + download png:6", lambda: encode_outputs(*images, output_formats=parse_output_formats("download:png:6"))),
+    )
+
+    print(f"result: {A.shape[1]}x{A.shape[0]}, {os.cpu_count()} CPU, {repeats} repeats")
+    print(f"{'encoding':26s} {'wall':>10s} {'CPU':>10s} {'base64':>10s}")
+    for name, encode in variants:
+        wall, cpu, size_mb = measure(encode, repeats)
+        print(f"{name:26s} {wall:8.1f}ms {cpu:8.1f}ms {size_mb:7.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: /image-compare/process 실행 방식별 처리량
+- thread: 기존 run_in_executor(None, ...) (기본 스레드 풀)
+- process (pickle): ProcessPoolExecutor, 입력/결과를 pickle로 전달 (submit)
+- process (shared memory): ProcessPoolExecutor, 입력/결과를 공유 메모리로 전달 (run)
+
+python -m ai_gateway.benchmarks.bench_image_pool [comparisons per level] [workers]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from ..services.image_pool import ImageWorkerPool
+from ..services.image_processor import process_comparison
+from ..services.raster_cache import raster_cache
+
+CONCURRENCY_LEVELS = (1, 4, 8)
+
+
+def drawing_pair(width: int = 2400, height: int = 1700) -> tuple[bytes, bytes]:
+    """도면 비슷한 PNG 두 장 (두 번째는 약간 이동 + 일부 변경)."""
+    rng = np.random.default_rng(7)
+    img = np.full((height, width, 3), 255, np.uint8)
+    for _ in range(400):
+        x1, x2 = rng.integers(0, width, 2)
+        y1, y2 = rng.integers(0, height, 2)
+        cv2.line(img, (int(x1), int(y1)), (int(x2), int(y2)), (0, 0, 0), int(rng.integers(1, 4)))
+    for i in range(60):
+        cv2.putText(img, f"A-{i:03d}", (int(rng.integers(0, width - 200)), int(rng.integers(40, height))),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+
+    changed = img.copy()
+    cv2.rectangle(changed, (300, 300), (700, 600), (0, 0, 0), 4)
+    cv2.putText(changed, "REV B", (width - 400, height - 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 3)
+    shift = np.float32([[1, 0, 12], [0, 1, -8]])
+    changed = cv2.warpAffine(changed, shift, (width, height), borderValue=(255, 255, 255))
+
+    return cv2.imencode(".png", img)[1].tobytes(), cv2.imencode(".png", changed)[1].tobytes()
+
+
+async def run_level(call, concurrency: int, total: int) -> tuple[float, float]:
+    """Returns (comparisons per second, mean latency seconds)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(total)])
+    elapsed = time.perf_counter() - started
+    return total / elapsed, sum(latencies) / len(latencies)
+
+
+async def bench(name: str, pool: ImageWorkerPool, shared: bool, file1: bytes, file2: bytes, total: int):
+    args = (process_comparison, file1, "image/png", file2, "image/png")
+
+    def call():
+        return pool.run(*args) if shared else pool.submit(*args)
+
+    await pool.start()
+    await call()  # worker별 첫 호출 비용 제외
+    for concurrency in CONCURRENCY_LEVELS:
+        throughput, latency = await run_level(call, concurrency, max(total, concurrency))
+        print(f"{name:26s} concurrency {concurrency}   {throughput:6.2f} comparisons/s   "
+              f"mean latency {latency * 1000:8.1f} ms")
+    pool.shutdown()
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    file1, file2 = drawing_pair()
+    # 같은 입력을 반복 비교하므로 raster cache는 끔 (worker 프로세스에도 적용됨)
+    raster_cache.configure(memory_max_bytes=0, disk_dir="")
+
+    print(f"input: 2 x {len(file1) / 1024:.0f} KB PNG, {total} comparisons per level, "
+          f"{workers} workers, {os.cpu_count()} CPUs")
+    asyncio.run(bench("thread", ImageWorkerPool(workers, backend="thread"), False, file1, file2, total))
+    asyncio.run(bench("process (pickle)", ImageWorkerPool(workers), False, file1, file2, total))
+    asyncio.run(bench("process (shared memory)", ImageWorkerPool(workers), True, file1, file2, total))
+
+
+if __name__ == "__main__":
+    main()
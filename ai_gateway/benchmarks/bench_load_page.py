@@ -0,0 +1,79 @@
+"""
+Benchmark: 여러 스레드에서 같은 multi-page 문서의 페이지 로드 (thread backend의 /batch)
+- 12페이지 TIFF / PDF의 페이지를 스레드 여러 개에서 동시에 load_page()로 로드
+- 단일 스레드 결과와 픽셀 단위로 비교해 실패 / 다른 페이지가 나온 횟수 확인 (0이어야 함)
+
+python -m ai_gateway.benchmarks.bench_load_page [threads] [loads]
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+from ..services.image_processor import load_page
+from ..services.raster_cache import raster_cache
+
+PAGES = 12
+
+
+def multipage_tiff(path: str):
+    """페이지마다 내용이 다른 deflate 압축 TIFF."""
+    rng = np.random.default_rng(3)
+    frames = [Image.fromarray(rng.integers(0, 255, (800, 600, 3), dtype=np.uint8)) for _ in range(PAGES)]
+    frames[0].save(path, save_all=True, append_images=frames[1:], compression="tiff_deflate")
+
+
+def multipage_pdf(path: str):
+    """페이지마다 선 / 글자 위치가 다른 PDF."""
+    with fitz.open() as document:
+        for i in range(PAGES):
+            page = document.new_page()
+            for j in range(40):
+                page.draw_line((20 + j * 13, 40 + i * 5), (560 - j * 7, 800 - i * 11))
+            page.insert_text((60, 60 + i * 40), f"PAGE {i:02d}", fontsize=24)
+        document.save(path)
+
+
+def run(name: str, path: str, content_type: str, threads: int, loads: int):
+    expected = [load_page(path, content_type, page)[0].copy() for page in range(PAGES)]
+
+    def check(i: int) -> int:
+        try:
+            img, _ = load_page(path, content_type, i % PAGES)
+        except ValueError:
+            return 1
+        return 0 if np.array_equal(img, expected[i % PAGES]) else 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        wrong = sum(executor.map(check, range(loads)))
+    elapsed = time.perf_counter() - started
+    print(f"{name:5s} {threads} threads   {loads / elapsed:7.1f} pages/s   failed or wrong page: {wrong}/{loads}")
+    return wrong
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    loads = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    # 매번 실제로 렌더링하도록 raster cache는 끔
+    raster_cache.configure(memory_max_bytes=0, disk_dir="")
+    cv2.setNumThreads(1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        tiff_path = os.path.join(directory, "pages.tif")
+        pdf_path = os.path.join(directory, "pages.pdf")
+        multipage_tiff(tiff_path)
+        multipage_pdf(pdf_path)
+        wrong = run("tiff", tiff_path, "image/tiff", threads, loads)
+        wrong += run("pdf", pdf_path, "application/pdf", threads, loads)
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: 정렬 방식별 시간 / match_quality / 정렬 후 차이 픽셀 수
+- orb: 원본 해상도(≤4000px) ORB 매칭
+- pyramid: 1000px 축소본에서 ORB 매칭 → 원본 해상도 template 매칭으로 보정
+
+alignment cache는 끄고 측정 (매번 특징점 검출부터)
+
+python -m ai_gateway.benchmarks.bench_pyramid_alignment [pdf 1] [pdf 2] [page]
+"""
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from ..services.alignment_cache import alignment_cache
+from ..services.image_processor import (
+    ALIGNMENT_METHODS, MAX_DIMENSION, compute_diff_masks, downsample_if_needed, estimate_alignment, load_file
+)
+from .bench_image_pool import drawing_pair
+from .bench_tiled_compare import build_a0
+
+
+def skewed_pair(width: int = 4000, height: int = 2833):
+    """합성 도면 쌍, 두 번째는 스캔처럼 약간 회전 / 이동."""
+    file1, file2 = drawing_pair(width, height)
+    A = cv2.imdecode(np.frombuffer(file1, np.uint8), cv2.IMREAD_COLOR)
+    B = cv2.imdecode(np.frombuffer(file2, np.uint8), cv2.IMREAD_COLOR)
+    skew = np.float32([[0.99, 0.02, 30], [-0.02, 0.99, 10]])
+    B = cv2.warpAffine(B, skew, (width, height), borderValue=(255, 255, 255))
+    return A, B
+
+
+def pdf_pair(file1: bytes, file2: bytes, page: int = 0):
+    A = downsample_if_needed(load_file(file1, "application/pdf", page)[0], MAX_DIMENSION)
+    B = downsample_if_needed(load_file(file2, "application/pdf", page)[0], MAX_DIMENSION)
+    return A, B
+
+
+def diff_pixels(A: np.ndarray, B: np.ndarray, H) -> int:
+    """정렬 후 한쪽에만 있는 픽셀 수 (작을수록 정렬이 정확)."""
+    if H is None:
+        return -1
+    h, w = A.shape[:2]
+    warped = cv2.warpPerspective(B, H, (w, h), borderValue=(255, 255, 255))
+    masks = compute_diff_masks(A, warped)
+    return cv2.countNonZero(masks.only_A) + cv2.countNonZero(masks.only_B)
+
+
+def measure(A: np.ndarray, B: np.ndarray, method: str, repeats: int = 3):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        H, quality = estimate_alignment(A, B, method=method)
+        timings.append(time.perf_counter() - started)
+    return min(timings), quality, diff_pixels(A, B, H)
+
+
+def main():
+    alignment_cache.configure(max_features=0, max_homographies=0)
+    pairs = {"drawing (skewed)": skewed_pair()}
+    if len(sys.argv) > 2:
+        with open(sys.argv[1], "rb") as f1, open(sys.argv[2], "rb") as f2:
+            pairs["pdf"] = pdf_pair(f1.read(), f2.read(), int(sys.argv[3]) if len(sys.argv) > 3 else 0)
+    pairs["A0 pdf"] = pdf_pair(build_a0(0), build_a0(1))
+
+    print(f"{'pair':18s} {'size':>10s} {'method':>8s} {'time':>10s} {'quality':>8s} {'diff px':>10s}")
+    for name, (A, B) in pairs.items():
+        for method in ALIGNMENT_METHODS:
+            elapsed, quality, pixels = measure(A, B, method)
+            size = f"{A.shape[1]}x{A.shape[0]}"
+            print(f"{name:18s} {size:>10s} {method:>8s} {elapsed * 1000:8.1f}ms {quality:8.3f} {pixels:10d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: 페이지 로드 (PDF 렌더링 + 다운샘플링) vs raster cache 메모리 / 디스크(.npy memory-map) 적중
+
+python -m ai_gateway.benchmarks.bench_raster_cache [pages] [repeats]
+"""
+import sys
+import tempfile
+import time
+
+import fitz
+
+from ..services.image_processor import load_cached
+from ..services.raster_cache import raster_cache
+
+
+def build_pdf(pages: int) -> bytes:
+    """A4 도면 비슷한 PDF (선 + 글자)."""
+    document = fitz.open()
+    for number in range(pages):
+        page = document.new_page(width=842, height=595)
+        for i in range(150):
+            page.draw_line((20 + i * 5, 20), (820 - i * 3, 575 - i), width=0.6)
+        for i in range(40):
+            page.insert_text((40 + (i % 8) * 95, 60 + (i // 8) * 100), f"P{number}-{i:02d}", fontsize=11)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def measure(pdf: bytes, pages: int, repeats: int) -> float:
+    """Mean milliseconds per load_cached() call."""
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for page in range(pages):
+            load_cached(pdf, "application/pdf", page)
+    return (time.perf_counter() - started) * 1000 / (pages * repeats)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    pdf = build_pdf(pages)
+
+    with tempfile.TemporaryDirectory() as disk_dir:
+        raster_cache.configure(memory_max_bytes=0, disk_dir="")
+        uncached = measure(pdf, pages, repeats)
+
+        raster_cache.configure(memory_max_bytes=1024 * 1024 * 1024)
+        measure(pdf, pages, 1)
+        memory = measure(pdf, pages, repeats)
+
+        raster_cache.configure(memory_max_bytes=0, disk_dir=disk_dir)
+        measure(pdf, pages, 1)
+        disk = measure(pdf, pages, repeats)
+
+    print(f"PDF: {pages} pages, {len(pdf) / 1024:.0f} KB, {repeats} repeats")
+    print(f"render + downsample      {uncached:8.2f} ms/page")
+    print(f"memory tier hit          {memory:8.2f} ms/page")
+    print(f"disk tier hit (mmap)     {disk:8.2f} ms/page")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: TokenRateLimiter 호출 처리량 (calls/sec)
+- legacy: 호출마다 deque 전체 sum() + datetime.now() (이전 구현)
+- exact: 누적 합계 + time.monotonic()
+- buckets: 60 x 1초 링 버퍼
+
+python -m ai_gateway.benchmarks.bench_rate_limiter [window_size]
+"""
+from collections import deque
+from datetime import datetime, timedelta
+from threading import Lock
+import logging
+import sys
+import time
+
+from ..services.rate_limiter import TokenRateLimiter
+
+
+class LegacyTokenRateLimiter:
+    """이전 구현 (비교 기준): 매 호출마다 O(n) 합계 계산"""
+
+    def __init__(self, rpm_limit: int, tpm_limit: int, time_window_seconds: int = 60):
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.time_window = timedelta(seconds=time_window_seconds)
+        self.requests = deque()
+        self.lock = Lock()
+
+    def _cleanup_old_requests(self, now):
+        cutoff_time = now - self.time_window
+        while self.requests and self.requests[0][0] < cutoff_time:
+            self.requests.popleft()
+
+    def can_proceed(self, estimated_tokens: int = 100):
+        with self.lock:
+            now = datetime.now()
+            self._cleanup_old_requests(now)
+            request_count = len(self.requests)
+            total_tokens = sum(tokens for _, tokens in self.requests)
+            if request_count >= self.rpm_limit:
+                return False, "rpm"
+            if total_tokens + estimated_tokens > self.tpm_limit:
+                return False, "tpm"
+            self.requests.append((now, estimated_tokens))
+            return True, None
+
+    def get_current_usage(self):
+        with self.lock:
+            now = datetime.now()
+            self._cleanup_old_requests(now)
+            return len(self.requests), sum(tokens for _, tokens in self.requests)
+
+
+def fill_and_measure(limiter, window_size: int, duration: float = 0.5) -> float:
+    """
+    윈도우에 window_size개 요청을 채운 뒤 can_proceed + 사용량 조회 처리량 측정
+    (RPM 제한 = window_size 이므로 측정 중 윈도우 크기가 고정됨)
+    """
+    if isinstance(limiter, LegacyTokenRateLimiter):
+        # legacy는 채우는 과정 자체가 O(n^2)이므로 직접 추가
+        now = datetime.now()
+        limiter.requests.extend((now, 1) for _ in range(window_size))
+    else:
+        for _ in range(window_size):
+            limiter.can_proceed(1)
+
+    # TokenRateLimiter.get_current_usage()는 코루틴이므로 같은 조회를 하는 backend.usage()로 측정
+    usage = limiter.get_current_usage if isinstance(limiter, LegacyTokenRateLimiter) else limiter.backend.usage
+    calls = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        for _ in range(10):
+            limiter.can_proceed(1)
+            usage()
+        calls += 20
+    return calls / duration
+
+
+def main():
+    logging.disable(logging.WARNING)
+    sizes = [int(sys.argv[1])] if len(sys.argv) > 1 else [100, 1000, 10000, 100000]
+
+    print(f"{'window':>8} {'legacy':>14} {'exact':>14} {'buckets':>14}   (calls/sec)")
+    for size in sizes:
+        # 윈도우에 size개 요청이 쌓인 상태를 재현
+        limits = dict(rpm_limit=size, tpm_limit=size * 1000)
+        legacy = fill_and_measure(LegacyTokenRateLimiter(**limits), size)
+        exact = fill_and_measure(TokenRateLimiter(**limits), size)
+        buckets = fill_and_measure(TokenRateLimiter(bucket_count=60, **limits), size)
+        print(f"{size:>8} {legacy:>14,.0f} {exact:>14,.0f} {buckets:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: 비교 결과 응답 형식
+- json: JPEG 3장 + PNG 1장을 base64 data URI로 JSON에 포함 (PNG는 다운로드하지 않아도 항상 인코딩)
+- url: JPEG 3장은 바이트 그대로 (GET /results/... 로 전달), PNG는 다운로드 요청 때만 인코딩
+  (그 전까지 결과는 색상표 인덱스로 압축해 보관 - 보관 크기도 함께 출력)
+
+서버 인코딩 CPU, 전송 바이트(응답 JSON + 화면 표시용 이미지), 클라이언트 측 JSON 파싱 + base64 디코딩 시간 비교
+
+python -m ai_gateway.benchmarks.bench_response_format [size] [repeats]
+"""
+import base64
+import json
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from ..services.image_processor import compare_difference, encode_image, encode_outputs, unpack_result
+from .bench_image_pool import drawing_pair
+
+
+def timed(func, repeats: int):
+    """Returns (last result, CPU ms per call)."""
+    started = time.process_time()
+    for _ in range(repeats):
+        value = func()
+    return value, (time.process_time() - started) * 1000 / repeats
+
+
+def client_decode(body: str) -> int:
+    """브라우저가 하는 일의 근사: JSON 파싱 후 data URI의 base64 디코딩 (이미지 디코딩 자체는 양쪽 동일)."""
+    data = json.loads(body)
+    return sum(
+        len(base64.b64decode(value.split(",", 1)[1]))
+        for key, value in data.items() if key.endswith("_base64") and key != "download_base64"
+    )
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    file1, file2 = drawing_pair(size, size * 2833 // 4000)
+    A = cv2.imdecode(np.frombuffer(file1, np.uint8), cv2.IMREAD_COLOR)
+    B = cv2.imdecode(np.frombuffer(file2, np.uint8), cv2.IMREAD_COLOR)
+    images = compare_difference(A, B)
+
+    outputs, json_cpu = timed(lambda: encode_outputs(*images, "json"), repeats)
+    json_body = json.dumps(outputs)
+    _, json_client = timed(lambda: client_decode(json_body), repeats)
+
+    outputs, url_cpu = timed(lambda: encode_outputs(*images, "url"), repeats)
+    image_bytes = sum(len(outputs[f"{name}_image"]) for name in ("result", "file1", "file2"))
+    url_body = json.dumps({f"{name}_url": f"/image-compare/results/{'x' * 22}/{name}"
+                           for name in ("result", "file1", "file2", "download")})
+    packed = outputs["download_image"]
+    _, png_cpu = timed(lambda: encode_image(unpack_result(packed), "PNG"), repeats)
+
+    print(f"result: {A.shape[1]}x{A.shape[0]}")
+    print(f"{'format':6s} {'encode CPU':>12s} {'transferred':>14s} {'client parse+decode':>20s}")
+    print(f"{'json':6s} {json_cpu:10.1f}ms {len(json_body) / 1024 / 1024:11.2f} MB {json_client:18.1f}ms")
+    print(f"{'url':6s} {url_cpu:10.1f}ms {(len(url_body) + image_bytes) / 1024 / 1024:11.2f} MB {0:18.1f}ms")
+    print(f"url download (on request only): unpack + PNG encode {png_cpu:.1f}ms")
+    print(f"url download kept until requested: {packed.nbytes / 1024 / 1024:.2f} MB "
+          f"(BGR array {images[0].nbytes / 1024 / 1024:.2f} MB)")
+
+
+if __name__ == "__main__":
+    main()
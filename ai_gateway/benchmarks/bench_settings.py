@@ -0,0 +1,79 @@
+"""
+Benchmark: 요청마다 secrets.toml 파싱 vs 시작 시 한 번 로드한 설정 주입
+
+python -m ai_gateway.benchmarks.bench_settings [iterations]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import toml
+
+from ..config import SettingsManager
+
+SAMPLE_SECRETS = {
+    "server": {"debug": False},
+    "security": {"django_secret_key": "x" * 50, "allowed_hosts": ["localhost", "127.0.0.1"]},
+    "auth": {"admin_signup_key": "key"},
+    "fabrix_api": {
+        "base_url": "https://fabrix.example.com/",
+        "client_key": "client-key",
+        "openapi_token": "openapi-token",
+        "user_email": "user@example.com",
+    },
+}
+
+
+def legacy_per_request(secrets_path: Path):
+    """기존 chat_stream 경로: get_fabrix_config() + get_fabrix_headers() (파일 2회 파싱)"""
+    def get_fabrix_config():
+        with open(secrets_path, "r", encoding="utf-8") as f:
+            secrets = toml.load(f)
+        fabrix_config = secrets['fabrix_api']
+        base_url = fabrix_config['base_url'].rstrip('/')
+        return fabrix_config, f"{base_url}/openapi/agent-chat/v1"
+
+    _, agent_url = get_fabrix_config()
+    fabrix_config, _ = get_fabrix_config()
+    headers = {
+        "Content-Type": "application/json",
+        "x-fabrix-client": fabrix_config['client_key'],
+        "x-openapi-token": fabrix_config['openapi_token'],
+        "x-generative-ai-user-email": fabrix_config.get('user_email', ''),
+    }
+    return f"{agent_url}/agent-messages", headers
+
+
+def current_per_request(manager: SettingsManager):
+    """현재 경로: get_fabrix_settings() 의존성 (속성 조회만)"""
+    fabrix = manager.fabrix
+    return f"{fabrix.agent_url}/agent-messages", fabrix.headers
+
+
+def measure(func, arg, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(arg)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        secrets_path = Path(tmp) / "secrets.toml"
+        secrets_path.write_text(toml.dumps(SAMPLE_SECRETS), encoding="utf-8")
+        manager = SettingsManager(secrets_path)
+
+        legacy = measure(legacy_per_request, secrets_path, iterations)
+        current = measure(current_per_request, manager, iterations)
+
+    print(f"iterations: {iterations}")
+    print(f"legacy  (parse per request): {legacy * 1e6:10.2f} us/request")
+    print(f"current (app.state settings): {current * 1e6:10.2f} us/request")
+    print(f"removed overhead:            {(legacy - current) * 1e6:10.2f} us/request ({legacy / current:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: 줄 단위 SSE 중계(aiter_lines + 문자열 재조합) vs 바이트 단위 중계(relay_sse)
+
+python -m ai_gateway.benchmarks.bench_sse_relay [events] [streams]
+"""
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+from sse_starlette.sse import ensure_bytes
+
+from ..services.sse_relay import relay_sse
+from ..services.token_usage import StreamUsageTracker
+
+# 업스트림 chunk 크기 (TCP 수신 단위를 흉내, 이벤트 경계와 무관하게 잘림)
+CHUNK_SIZE = 1400
+
+
+def build_upstream_body(events: int) -> bytes:
+    frames = [
+        f'data: {json.dumps({"content": "토큰 " + str(i)}, ensure_ascii=False)}\n\n'.encode("utf-8")
+        for i in range(events)
+    ]
+    frames.append(b'data: {"content": "", "usage": {"total_tokens": 1234}}\n\n')
+    return b"".join(frames)
+
+
+class UpstreamStream(httpx.AsyncByteStream):
+    def __init__(self, body: bytes):
+        self.body = body
+
+    async def __aiter__(self):
+        for offset in range(0, len(self.body), CHUNK_SIZE):
+            yield self.body[offset:offset + CHUNK_SIZE]
+
+
+async def legacy_stream(body: bytes):
+    """기존 event_generator: aiter_lines → "data:" 검사 → 문자열 + "\\n\\n" → EventSourceResponse 재포장"""
+    response = httpx.Response(200, stream=UpstreamStream(body))
+    usage = StreamUsageTracker(0)
+    async for line in response.aiter_lines():
+        if line:
+            decoded_line = line if isinstance(line, str) else line.decode('utf-8')
+            if decoded_line.startswith("data:"):
+                usage.feed_event(decoded_line[5:].strip())
+                yield ensure_bytes(decoded_line + "\n\n", "\r\n")
+
+
+async def relay_stream(body: bytes, coalesce_max_bytes: int = 0):
+    """현재 event_generator: aiter_bytes → 완성된 이벤트 바이트 그대로 전달"""
+    response = httpx.Response(200, stream=UpstreamStream(body))
+    usage = StreamUsageTracker(0)
+    async for chunk in relay_sse(response.aiter_bytes(), usage.feed_event, coalesce_max_bytes):
+        yield ensure_bytes(chunk, "\r\n")
+
+
+async def measure(factory, body: bytes, streams: int) -> tuple[float, float, int]:
+    """Returns (cpu seconds per stream, seconds to first chunk, writes per stream)."""
+    first_chunk = 0.0
+    writes = 0
+    cpu_start = time.process_time()
+    for _ in range(streams):
+        started = time.perf_counter()
+        first = True
+        async for _chunk in factory(body):
+            if first:
+                first_chunk += time.perf_counter() - started
+                first = False
+            writes += 1
+    cpu = time.process_time() - cpu_start
+    return cpu / streams, first_chunk / streams, writes // streams
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    streams = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    body = build_upstream_body(events)
+
+    results = [
+        ("legacy (aiter_lines)", asyncio.run(measure(legacy_stream, body, streams))),
+        ("relay (aiter_bytes)", asyncio.run(measure(relay_stream, body, streams))),
+        ("relay + coalesce 4KB", asyncio.run(measure(
+            lambda b: relay_stream(b, coalesce_max_bytes=4096), body, streams
+        ))),
+    ]
+
+    print(f"events per stream: {events}, streams: {streams}, body: {len(body)} bytes")
+    for name, (cpu, ttfb, writes) in results:
+        print(f"{name:22s} cpu {cpu * 1000:8.2f} ms/stream   first chunk {ttfb * 1e6:8.1f} us   writes {writes}")
+
+
+if __name__ == "__main__":
+    main()
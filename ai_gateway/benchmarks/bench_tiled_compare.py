@@ -0,0 +1,74 @@
+"""
+Benchmark: 대형 도면(A0) tile 비교의 메모리 사용량
+- process_comparison: 150 DPI 렌더링 후 4000px로 다운샘플링 (기존)
+- compare_tiled: 300 DPI 원본 해상도, tile 단위 처리
+
+각 방식은 별도 프로세스에서 실행해 최대 RSS를 따로 측정 (Linux / macOS)
+
+python -m ai_gateway.benchmarks.bench_tiled_compare [tile size]
+"""
+import multiprocessing
+import resource
+import sys
+import time
+
+import fitz
+
+from ..services.image_processor import process_comparison
+from ..services.raster_cache import raster_cache
+from ..services.tiled_compare import compare_tiled
+
+# A0 (841 x 1189 mm) in points
+A0_WIDTH, A0_HEIGHT = 2384, 3370
+
+
+def build_a0(revision: int) -> bytes:
+    """A0 도면 비슷한 PDF (격자 + 치수선 + 글자), revision마다 일부 변경."""
+    document = fitz.open()
+    page = document.new_page(width=A0_WIDTH, height=A0_HEIGHT)
+    for x in range(40, A0_WIDTH - 40, 60):
+        page.draw_line((x, 40), (x, A0_HEIGHT - 40), width=0.4)
+    for y in range(40, A0_HEIGHT - 40, 60):
+        page.draw_line((40, y), (A0_WIDTH - 40, y), width=0.4)
+    for i in range(300):
+        page.insert_text((80 + (i % 20) * 110, 120 + (i // 20) * 210), f"D-{i:03d}", fontsize=14)
+    if revision:
+        page.draw_rect(fitz.Rect(600, 900, 1100, 1300), width=3)
+        page.insert_text((1700, 3200), f"REV {revision}", fontsize=40)
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def run(name: str, tile_size: int, queue):
+    raster_cache.configure(memory_max_bytes=0)
+    file1, file2 = build_a0(0), build_a0(1)
+    started = time.perf_counter()
+    if name == "tiled":
+        result = compare_tiled(file1, "application/pdf", file2, "application/pdf", tile_size=tile_size)
+    else:
+        result = process_comparison(file1, "application/pdf", file2, "application/pdf")
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_kb //= 1024
+    queue.put((elapsed, peak_kb, result["metadata"]["result_size"], len(result["download_base64"])))
+
+
+def main():
+    tile_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    context = multiprocessing.get_context("spawn")
+
+    print(f"A0 drawing pair, tile size {tile_size}px")
+    for name in ("process_comparison", "tiled"):
+        queue = context.Queue()
+        process = context.Process(target=run, args=(name, tile_size, queue))
+        process.start()
+        elapsed, peak_kb, size, download = queue.get()
+        process.join()
+        print(f"{name:20s} {size:>12s}   {elapsed:6.2f} s   peak RSS {peak_kb / 1024:7.1f} MB   "
+              f"download PNG {download / 1024 / 1024:6.1f} MB (base64)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: UploadFile spooling 후 업로드 vs 스트리밍 업로드 프록시(StreamingUpload)
+
+python -m ai_gateway.benchmarks.bench_upload_proxy [file MB] [chunk KB]
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+
+import httpx
+from starlette.datastructures import Headers
+from starlette.formparsers import MultiPartParser
+
+from ..services.upload_proxy import StreamingUpload
+
+BOUNDARY = "benchboundary7MA4YWxkTrZu0gW"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def browser_body(file_bytes: int, chunk_size: int):
+    """브라우저 요청 바디를 chunk 단위로 생성 (전체 바디를 메모리에 만들지 않음)."""
+    block = bytes(range(256)) * (chunk_size // 256)
+
+    async def stream():
+        yield (
+            f"--{BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="agentId"\r\n\r\nagent\r\n'
+            f"--{BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="contents"\r\n\r\n이 파일을 분석해줘\r\n'
+            f"--{BOUNDARY}\r\n"
+            f'Content-Disposition: form-data; name="file"; filename="data.bin"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode("utf-8")
+        remaining = file_bytes
+        while remaining > 0:
+            yield block[:min(remaining, len(block))]
+            remaining -= len(block)
+        yield f"\r\n--{BOUNDARY}--\r\n".encode("ascii")
+        yield b""
+
+    return stream()
+
+
+class UpstreamSink(httpx.AsyncBaseTransport):
+    """
+    FabriX 역할: 요청 바디를 받는 대로 버리고 첫 바이트 도착 시각과 크기를 기록.
+    (httpx.MockTransport는 핸들러 호출 전에 바디 전체를 읽으므로 사용하지 않음)
+    """
+
+    def __init__(self):
+        self.first_byte_at = None
+        self.received = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        async for chunk in request.stream:
+            if self.first_byte_at is None:
+                self.first_byte_at = time.perf_counter()
+            self.received += len(chunk)
+        return httpx.Response(200, json={"content": "ok"})
+
+
+async def legacy_upload(client: httpx.AsyncClient, file_bytes: int, chunk_size: int):
+    """기존 chat_with_file: UploadFile(SpooledTemporaryFile)에 전부 받은 뒤 files=로 업로드"""
+    form = await MultiPartParser(Headers({"content-type": CONTENT_TYPE}), browser_body(file_bytes, chunk_size)).parse()
+    upload = form["file"]
+    upload.file.seek(0)
+    response = await client.post(
+        "http://fabrix/agent-messages/file",
+        files={"file": (upload.filename, upload.file, upload.content_type)},
+        data={"agentId": form["agentId"], "isStream": "False", "contents": [form["contents"]]}
+    )
+    await form.close()
+    return response
+
+
+async def streaming_upload(client: httpx.AsyncClient, file_bytes: int, chunk_size: int):
+    """현재 chat_with_file: 받는 즉시 업스트림 multipart 바디로 전달"""
+    upload = StreamingUpload(
+        CONTENT_TYPE, browser_body(file_bytes, chunk_size),
+        max_file_bytes=file_bytes, max_field_bytes=1024 * 1024
+    )
+    await upload.read_until_file()
+    return await client.post(
+        "http://fabrix/agent-messages/file",
+        headers={"Content-Type": upload.content_type},
+        content=upload.upstream_body(("agentId", "contents"), [("isStream", "False")])
+    )
+
+
+async def measure(upload, file_bytes: int, chunk_size: int) -> tuple[float, float, int, int]:
+    """Returns (seconds, seconds to first upstream byte, peak traced bytes, upstream bytes)."""
+    sink = UpstreamSink()
+    async with httpx.AsyncClient(transport=sink) as client:
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = await upload(client, file_bytes, chunk_size)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    response.raise_for_status()
+    return elapsed, sink.first_byte_at - started, peak, sink.received
+
+
+def main():
+    file_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    chunk_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    file_bytes = file_mb * 1024 * 1024
+    chunk_size = chunk_kb * 1024
+
+    results = [
+        ("legacy (UploadFile)", asyncio.run(measure(legacy_upload, file_bytes, chunk_size))),
+        ("streaming proxy", asyncio.run(measure(streaming_upload, file_bytes, chunk_size))),
+    ]
+
+    print(f"file: {file_mb} MB, request chunk: {chunk_kb} KB")
+    for name, (elapsed, first_byte, peak, received) in results:
+        print(
+            f"{name:20s} total {elapsed * 1000:8.1f} ms   first upstream byte {first_byte * 1000:8.1f} ms   "
+            f"peak memory {peak / 1024 / 1024:7.2f} MB   upstream {received / 1024 / 1024:.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
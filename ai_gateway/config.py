@@ -0,0 +1,133 @@
+"""
+Gateway Settings
+secrets.toml을 시작 시 한 번만 읽어 타입이 있는 설정 객체로 보관
+- 요청마다 파일을 다시 파싱하지 않음
+- 파일 mtime 변경 또는 SIGHUP 수신 시에만 재로드 (hot reload)
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, Optional
+import asyncio
+import signal
+import logging
+
+import toml
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FabrixSettings:
+    """FabriX API 접속 설정 (요청 헤더 미리 생성)"""
+    base_url: str
+    agent_url: str
+    headers: Mapping[str, str]
+    upload_headers: Mapping[str, str]
+
+    @classmethod
+    def from_secrets(cls, secrets: dict) -> "FabrixSettings":
+        fabrix_config = secrets['fabrix_api']
+        base_url = fabrix_config['base_url'].rstrip('/')
+
+        upload_headers = {
+            "x-fabrix-client": fabrix_config['client_key'],
+            "x-openapi-token": fabrix_config['openapi_token'],
+            "x-generative-ai-user-email": fabrix_config.get('user_email', ''),
+        }
+        headers = {"Content-Type": "application/json", **upload_headers}
+
+        return cls(
+            base_url=base_url,
+            agent_url=f"{base_url}/openapi/agent-chat/v1",
+            headers=MappingProxyType(headers),
+            # multipart 요청은 httpx가 boundary 포함 Content-Type을 직접 설정
+            upload_headers=MappingProxyType(upload_headers),
+        )
+
+
+class SettingsManager:
+    """
+    Holds the parsed secrets.toml and reloads it when the file changes.
+    """
+
+    def __init__(self, path: Path, secrets: Optional[dict] = None, poll_interval_seconds: float = 2.0):
+        """
+        Initialize settings manager.
+
+        Args:
+            path: Path to secrets.toml
+            secrets: Already parsed secrets (main.py에서 로드한 값, 없으면 파일에서 로드)
+            poll_interval_seconds: mtime 확인 주기
+        """
+        self.path = Path(path)
+        self.poll_interval = poll_interval_seconds
+        self.reloads = 0
+        self._mtime = self._stat_mtime()
+        self._apply(secrets if secrets is not None else self._read())
+
+    def _stat_mtime(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read(self) -> dict:
+        with open(self.path, "r", encoding="utf-8") as f:
+            return toml.load(f)
+
+    def _apply(self, secrets: dict):
+        # 새 객체로 한 번에 교체 (요청 처리 중인 코드는 이전 객체를 그대로 사용)
+        self.secrets = secrets
+        self.fabrix = FabrixSettings.from_secrets(secrets)
+
+    def reload(self) -> bool:
+        """
+        Re-read secrets.toml. 파싱 실패 시 기존 설정을 유지.
+
+        Returns:
+            True if the new settings were applied
+        """
+        try:
+            secrets = self._read()
+            self._apply(secrets)
+        except Exception as e:
+            logger.error(f"Settings reload failed, keeping previous settings: {e}")
+            return False
+        self.reloads += 1
+        logger.info(f"✅ Settings reloaded from {self.path}")
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """Reload only if the file mtime changed since the last load."""
+        mtime = self._stat_mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        return self.reload()
+
+    async def watch(self):
+        """Background task: poll file mtime (blocking stat/parse는 스레드에서 실행)."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await asyncio.to_thread(self.reload_if_changed)
+
+    def install_signal_handler(self):
+        """Reload on SIGHUP (Windows에는 SIGHUP이 없으므로 mtime 감시만 사용)."""
+        if not hasattr(signal, "SIGHUP"):
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(
+                signal.SIGHUP, lambda: loop.run_in_executor(None, self.reload)
+            )
+        except (NotImplementedError, RuntimeError, ValueError):
+            logger.warning("SIGHUP handler not available, using mtime polling only")
+
+    def remove_signal_handler(self):
+        if not hasattr(signal, "SIGHUP"):
+            return
+        try:
+            asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+        except (NotImplementedError, RuntimeError, ValueError):
+            pass
@@ -1,9 +1,11 @@
-from fastapi import Header, HTTPException
-from fastapi.concurrency import run_in_threadpool
-import sqlite3
-import os
+from fastapi import Header, HTTPException, Request
 import logging
 from pathlib import Path
+from typing import NamedTuple, Optional
+
+from .config import FabrixSettings
+from .services.token_cache import token_cache
+from .services.token_store import TokenStoreUnavailable
 
 logger = logging.getLogger(__name__)
 
@@ -11,9 +13,21 @@ logger = logging.getLogger(__name__)
 BASE_DIR = Path(__file__).resolve().parent.parent
 DB_PATH = BASE_DIR / "django_server" / "db.sqlite3"
 
-async def verify_token(authorization: str = Header(None)):
+class AuthContext(NamedTuple):
+    """verify_token 결과 (토큰 + Django user id)"""
+    token: str
+    user_id: int
+
+def get_fabrix_settings(request: Request) -> FabrixSettings:
+    """
+    시작 시 로드된 FabriX 설정 주입 (요청마다 secrets.toml을 읽지 않음)
+    """
+    return request.app.state.settings.fabrix
+
+async def verify_token(request: Request, authorization: str = Header(None)) -> AuthContext:
     """
     Django DB의 authtoken_token 테이블을 조회하여 토큰 유효성 검증
+    (사용자별 Rate Limit 등에 사용할 user id도 함께 반환)
     """
     if not authorization:
         raise HTTPException(status_code=401, detail="Missing Authorization Header")
@@ -29,29 +43,35 @@ async def verify_token(authorization: str = Header(None)):
             
     except ValueError:
         raise HTTPException(status_code=401, detail="Invalid Authorization Header")
-        
-    if not os.path.exists(DB_PATH):
-        logger.error(f"Authentication DB not found at {DB_PATH}")
-        # DB가 없으면 인증을 할 수 없음 (보안상 거부)
-        raise HTTPException(status_code=500, detail="Authentication System Unavailable")
-        
-    # Blocking DB Operation
-    is_valid = await run_in_threadpool(_check_token_in_db, token)
-    
-    if not is_valid:
+
+    # 캐시 조회 (hit 시 DB 접근 없음)
+    cached, user_id = token_cache.get(token)
+    if cached is True:
+        return AuthContext(token, user_id)
+    if cached is False:
+        raise HTTPException(status_code=401, detail="Invalid Token")
+
+    # 풀링된 읽기 전용 커넥션으로 조회 (전용 스레드에서 실행)
+    # 조회 도중 무효화되면 결과를 캐싱하지 않음 (삭제된 토큰이 다시 캐시에 올라가지 않도록)
+    generation = token_cache.generation
+    user_id = await _check_token_in_db(request, token)
+
+    if user_id is None:
+        token_cache.set_invalid(token)
         raise HTTPException(status_code=401, detail="Invalid Token")
-        
-    return token
 
-def _check_token_in_db(token: str) -> bool:
+    token_cache.set_valid(token, user_id, generation)
+    return AuthContext(token, user_id)
+
+async def _check_token_in_db(request: Request, token: str) -> Optional[int]:
+    token_store = request.app.state.token_store
     try:
-        # Read-only connection
-        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
-        cursor = conn.cursor()
-        cursor.execute("SELECT key FROM authtoken_token WHERE key = ?", (token,))
-        row = cursor.fetchone()
-        conn.close()
-        return bool(row)
+        return await token_store.lookup(token)
+    except TokenStoreUnavailable as e:
+        logger.error(str(e))
+        # DB가 없으면 인증을 할 수 없음 (보안상 거부)
+        raise HTTPException(status_code=500, detail="Authentication System Unavailable")
     except Exception as e:
+        # 조회 오류는 캐싱하지 않음 (일시적 장애가 캐시에 남지 않도록)
         logger.error(f"Token verification error: {str(e)}")
-        return False
+        raise HTTPException(status_code=401, detail="Invalid Token")
@@ -4,6 +4,7 @@ AI Gateway - FabriX Agent 및 Image Inspector를 위한 API 게이트웨이
 """
 
 import sys
+import asyncio
 import logging
 from pathlib import Path
 from contextlib import asynccontextmanager
@@ -13,7 +14,24 @@ import toml
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routers import health_router, chat_router, image_router
+from .config import SettingsManager
+from .routers import health_router, chat_router, image_router, auth_router
+from .services.token_cache import token_cache
+from .services.rate_limiter import rate_limiter, partitioned_rate_limiter
+from .services.rate_limit_backends import MemoryWindowBackend, SQLiteWindowBackend
+from .services.token_store import TokenStore
+from .services.message_store import ChatMessageWriter
+from .services.job_queue import JobManager
+from .services.response_cache import agent_list_cache
+from .services.upstream_pool import create_upstream_client
+from .services.sse_relay import relay_settings
+from .services.upload_proxy import upload_settings
+from .services.resilience import fabrix_resilience
+from .services.image_pool import image_worker_pool
+from .services.raster_cache import raster_cache
+from .services.alignment_cache import alignment_cache
+from .services.result_store import result_store
+from .dependencies import DB_PATH
 
 # Logging 설정
 logging.basicConfig(level=logging.INFO)
@@ -31,20 +49,206 @@ except FileNotFoundError:
     sys.exit(1)
 
 SERVER_CONFIG = SECRETS['server']
+# 게이트웨이 튜닝 설정 (선택 사항, 없으면 기본값 사용)
+GATEWAY_CONFIG = SECRETS.get('gateway', {})
+
+# 토큰 캐시 설정
+token_cache.configure(
+    maxsize=GATEWAY_CONFIG.get('token_cache_size'),
+    ttl_seconds=GATEWAY_CONFIG.get('token_cache_ttl'),
+    negative_maxsize=GATEWAY_CONFIG.get('token_negative_cache_size'),
+    negative_ttl_seconds=GATEWAY_CONFIG.get('token_negative_cache_ttl'),
+)
+
+# Agent 목록 캐시 설정 (TTL 경과 후 stale TTL까지는 캐시를 반환하며 백그라운드 갱신)
+agent_list_cache.configure(
+    ttl_seconds=GATEWAY_CONFIG.get('agent_cache_ttl'),
+    stale_ttl_seconds=GATEWAY_CONFIG.get('agent_cache_stale_ttl'),
+)
+
+# SSE 중계 설정
+# - 작은 토큰 이벤트를 모아서 전송 (0이면 업스트림 chunk 단위로 즉시 전송)
+# - 느린 클라이언트를 위해 미리 읽어두는 최대 바이트 / 클라이언트 write 타임아웃
+relay_settings.configure(
+    coalesce_max_bytes=GATEWAY_CONFIG.get('sse_coalesce_bytes'),
+    coalesce_max_delay=(
+        GATEWAY_CONFIG['sse_coalesce_delay_ms'] / 1000
+        if 'sse_coalesce_delay_ms' in GATEWAY_CONFIG else None
+    ),
+    max_buffer_bytes=GATEWAY_CONFIG.get('sse_buffer_bytes'),
+    send_timeout=GATEWAY_CONFIG.get('sse_send_timeout'),
+)
+
+# 파일 업로드 프록시 한도 (받는 도중에 확인, 초과 시 413)
+upload_settings.configure(
+    max_file_bytes=GATEWAY_CONFIG.get('upload_max_bytes'),
+    max_field_bytes=GATEWAY_CONFIG.get('upload_max_field_bytes'),
+    spool_max_bytes=GATEWAY_CONFIG.get('upload_spool_bytes'),
+)
+
+# FabriX 호출 재시도 / Circuit Breaker
+# - 재시도: 지수 백오프 + jitter, Retry-After가 upstream_retry_max_after보다 길면 재시도하지 않음
+# - 엔드포인트별 연속 실패 upstream_breaker_failures회 → upstream_breaker_recovery초 동안 즉시 503
+fabrix_resilience.configure(
+    max_attempts=GATEWAY_CONFIG.get('upstream_retry_attempts'),
+    base_delay=GATEWAY_CONFIG.get('upstream_retry_base_delay'),
+    max_delay=GATEWAY_CONFIG.get('upstream_retry_max_delay'),
+    max_retry_after=GATEWAY_CONFIG.get('upstream_retry_max_after'),
+    failure_threshold=GATEWAY_CONFIG.get('upstream_breaker_failures'),
+    recovery_timeout=GATEWAY_CONFIG.get('upstream_breaker_recovery'),
+)
+
+# 이미지 비교 실행 방식 ("process": 프로세스 풀 + 공유 메모리, "thread": 기본 스레드 풀) 및 worker 수 (기본: CPU 수)
+image_worker_pool.configure(
+    max_workers=GATEWAY_CONFIG.get('image_workers'),
+    backend=GATEWAY_CONFIG.get('image_backend'),
+    shared_output_bytes=GATEWAY_CONFIG.get('image_shared_output_bytes'),
+)
+
+# 페이지 래스터 캐시 (프로세스별 메모리 LRU + 선택적 .npy 디스크 캐시, worker 프로세스에도 같은 설정 적용)
+raster_cache.configure(
+    memory_max_bytes=GATEWAY_CONFIG.get('raster_cache_memory_bytes'),
+    disk_dir=GATEWAY_CONFIG.get('raster_cache_dir'),
+    disk_max_bytes=GATEWAY_CONFIG.get('raster_cache_disk_bytes'),
+)
+
+# ORB 특징점 / 호모그래피 캐시 (mode, 임계값만 바꾼 재비교는 정렬 생략)
+alignment_cache.configure(
+    max_features=GATEWAY_CONFIG.get('alignment_cache_features'),
+    max_homographies=GATEWAY_CONFIG.get('alignment_cache_pairs'),
+)
+
+# response_format="url" 비교 결과 보관 (URL 유효 시간 / 최대 메모리, download PNG는 요청 시 인코딩)
+result_store.configure(
+    ttl_seconds=GATEWAY_CONFIG.get('image_result_ttl'),
+    max_bytes=GATEWAY_CONFIG.get('image_result_store_bytes'),
+)
+
+# Rate Limiter 저장소 설정
+# - "sqlite": 여러 uvicorn 워커가 하나의 RPM/TPM 예산을 공유 (SQLite WAL 파일)
+# - "memory": 워커별 독립 예산 (기본값, 단일 워커용)
+if GATEWAY_CONFIG.get('rate_limit_backend', 'memory') == 'sqlite':
+    RATE_LIMIT_DB_PATH = GATEWAY_CONFIG.get('rate_limit_db_path', BASE_DIR / "rate_limit.sqlite3")
+    rate_limiter.use_backend(SQLiteWindowBackend(RATE_LIMIT_DB_PATH))
+    # 사용자/에이전트 파티션도 같은 파일에 scope별로 저장 (워커 간 공유)
+    partitioned_rate_limiter.configure(
+        backend_factory=lambda scope: SQLiteWindowBackend(RATE_LIMIT_DB_PATH, scope=scope)
+    )
+elif GATEWAY_CONFIG.get('rate_limit_buckets'):
+    rate_limiter.use_backend(MemoryWindowBackend(bucket_count=GATEWAY_CONFIG['rate_limit_buckets']))
+
+# 사용자별 / 에이전트별 Rate Limit 파티션 (agent 한도는 설정한 경우에만 적용)
+# - rate_limit_user_rpm: 사용자별 RPM (기본 30)
+# - rate_limit_user_tpm: 사용자별 TPM (기본 없음 = global TPM과 같음)
+#   한 요청의 추정 토큰(contents 글자 수 / 4, 대화 기록 포함)이 이 값을 넘으면 항상 429이므로 작게 잡지 말 것
+partitioned_rate_limiter.configure(
+    user_limits=(
+        GATEWAY_CONFIG.get('rate_limit_user_rpm', 30),
+        GATEWAY_CONFIG.get('rate_limit_user_tpm')
+    ),
+    agent_limits=(
+        GATEWAY_CONFIG.get('rate_limit_agent_rpm'),
+        GATEWAY_CONFIG.get('rate_limit_agent_tpm')
+    ),
+    max_partitions=GATEWAY_CONFIG.get('rate_limit_max_partitions'),
+    idle_seconds=GATEWAY_CONFIG.get('rate_limit_partition_idle')
+)
 
 # Lifecycle management for HTTP client
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Manage HTTP client lifecycle"""
-    # Startup: Create shared AsyncClient
-    app.state.http_client = httpx.AsyncClient(
-        timeout=httpx.Timeout(60.0, connect=10.0, read=60.0)
+    """Manage HTTP clients, token DB pool and settings lifecycle"""
+    # Startup: Typed settings (secrets.toml 변경 시 자동 재로드)
+    app.state.settings = SettingsManager(
+        SECRETS_PATH,
+        secrets=SECRETS,
+        poll_interval_seconds=GATEWAY_CONFIG.get('settings_poll_interval', 2.0)
+    )
+    settings_watcher = asyncio.create_task(app.state.settings.watch())
+    app.state.settings.install_signal_handler()
+
+    # Startup: Open pooled read-only connections to Django DB (토큰 검증용)
+    app.state.token_store = TokenStore(
+        DB_PATH,
+        pool_size=GATEWAY_CONFIG.get('token_db_pool_size', 2),
+        mmap_size=GATEWAY_CONFIG.get('token_db_mmap_size', 64 * 1024 * 1024)
+    )
+
+    # Startup: Write-behind queue for chat history (Django DB에 배치 저장)
+    app.state.message_writer = ChatMessageWriter(
+        DB_PATH,
+        batch_size=GATEWAY_CONFIG.get('message_batch_size', 100),
+        flush_interval_seconds=GATEWAY_CONFIG.get('message_flush_interval', 0.2),
+        max_queue_size=GATEWAY_CONFIG.get('message_queue_size', 10000)
+    )
+    await app.state.message_writer.start()
+
+    # Startup: Create upstream AsyncClients
+    # - stream_client: SSE 스트림 전용 (연결을 오래 점유)
+    # - http_client: agents / file 등 짧은 호출 (스트림과 풀을 공유하지 않음)
+    http2 = GATEWAY_CONFIG.get('upstream_http2', False)
+    keepalive_expiry = GATEWAY_CONFIG.get('upstream_keepalive_expiry', 30.0)
+    app.state.stream_client = create_upstream_client(
+        "stream",
+        max_connections=GATEWAY_CONFIG.get('upstream_stream_max_connections', 100),
+        max_keepalive_connections=GATEWAY_CONFIG.get('upstream_stream_keepalive', 20),
+        keepalive_expiry=keepalive_expiry,
+        timeout=httpx.Timeout(
+            60.0, connect=10.0, read=60.0,
+            pool=GATEWAY_CONFIG.get('upstream_stream_pool_timeout', 10.0)
+        ),
+        http2=http2
+    )
+    app.state.http_client = create_upstream_client(
+        "short",
+        max_connections=GATEWAY_CONFIG.get('upstream_short_max_connections', 20),
+        max_keepalive_connections=GATEWAY_CONFIG.get('upstream_short_keepalive', 10),
+        keepalive_expiry=keepalive_expiry,
+        timeout=httpx.Timeout(
+            60.0, connect=10.0, read=60.0,
+            pool=GATEWAY_CONFIG.get('upstream_short_pool_timeout', 5.0)
+        ),
+        http2=http2
     )
-    logger.info("✅ HTTP Client initialized with 60s timeout")
+
+    # Startup: Background jobs for long file analyses (/agent-messages/file/jobs)
+    # - 동시 실행 수만큼만 연결을 쓰는 전용 풀, read timeout은 분석 시간에 맞춰 길게
+    file_job_workers = GATEWAY_CONFIG.get('file_job_workers', 4)
+    app.state.job_client = create_upstream_client(
+        "jobs",
+        max_connections=file_job_workers,
+        max_keepalive_connections=file_job_workers,
+        keepalive_expiry=keepalive_expiry,
+        timeout=httpx.Timeout(
+            60.0, connect=10.0,
+            read=GATEWAY_CONFIG.get('file_job_read_timeout', 600.0)
+        ),
+        http2=http2
+    )
+    app.state.file_jobs = JobManager(
+        "file",
+        max_workers=file_job_workers,
+        max_queue_size=GATEWAY_CONFIG.get('file_job_queue_size', 100),
+        result_ttl_seconds=GATEWAY_CONFIG.get('file_job_result_ttl', 600.0),
+        max_jobs=GATEWAY_CONFIG.get('file_job_max_stored', 1000)
+    )
+    await app.state.file_jobs.start()
+
+    # Startup: Image worker processes (cv2/fitz import를 첫 요청 전에 끝내 둠)
+    if GATEWAY_CONFIG.get('image_warm_workers', True):
+        await image_worker_pool.start()
     yield
-    # Shutdown: Close AsyncClient
+    # Shutdown: Cancel pending jobs, close AsyncClients
+    await app.state.file_jobs.close()
+    await app.state.stream_client.aclose()
     await app.state.http_client.aclose()
-    logger.info("✅ HTTP Client closed")
+    await app.state.job_client.aclose()
+    image_worker_pool.shutdown()
+    logger.info("✅ HTTP Clients closed")
+    await app.state.message_writer.close()
+    app.state.token_store.close()
+    app.state.settings.remove_signal_handler()
+    settings_watcher.cancel()
 
 
 # FastAPI 앱 초기화
@@ -69,6 +273,7 @@ app.add_middleware(
 app.include_router(health_router, prefix="/health", tags=["Health"])
 app.include_router(chat_router, prefix="/agent-messages", tags=["FabriX Agent"])
 app.include_router(image_router, prefix="/image-compare", tags=["Image"])
+app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 
 
 @app.get("/")
@@ -82,6 +287,7 @@ async def root():
             "health": "/health",
             "chat": "/agent-messages",
             "image": "/image-compare",
+            "auth": "/auth",
             "docs": "/docs"
         }
     }
@@ -0,0 +1,74 @@
+"""
+FastAPI Router: Auth Cache
+게이트웨이 토큰 캐시 상태 조회 및 무효화 엔드포인트 (모두 X-Gateway-Secret 필요)
+"""
+
+from fastapi import APIRouter, Request, HTTPException, Header, Depends
+from pydantic import BaseModel
+from typing import Optional
+import hmac
+import logging
+
+from ..services.token_cache import token_cache
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# 이 라우터의 요청은 secrets.toml [server] gateway_internal_secret을 아는 Django 서버 / 운영자만 허용
+# (reverse proxy 뒤에서는 모든 클라이언트가 localhost로 보이므로 접속 주소로는 구분할 수 없음)
+INTERNAL_SECRET_HEADER = "X-Gateway-Secret"
+
+
+class InvalidateRequest(BaseModel):
+    token: Optional[str] = None
+
+
+def verify_internal_secret(
+    request: Request,
+    x_gateway_secret: Optional[str] = Header(None, alias=INTERNAL_SECRET_HEADER)
+):
+    """X-Gateway-Secret 헤더가 gateway_internal_secret과 일치하지 않으면 403 (설정되지 않았으면 항상 403)."""
+    secret = request.app.state.settings.secrets.get('server', {}).get('gateway_internal_secret')
+    if not secret:
+        logger.warning(f"{request.url.path} rejected: gateway_internal_secret is not configured")
+        raise HTTPException(status_code=403, detail="Gateway secret is not configured")
+    if not x_gateway_secret or not hmac.compare_digest(x_gateway_secret.encode(), secret.encode()):
+        client_host = request.client.host if request.client else None
+        logger.warning(f"{request.url.path} rejected from {client_host}: invalid gateway secret")
+        raise HTTPException(status_code=403, detail="Invalid gateway secret")
+
+
+@router.get("/token-cache", dependencies=[Depends(verify_internal_secret)])
+async def get_token_cache_stats():
+    """
+    [GET] /auth/token-cache
+    토큰 캐시 hit/miss 통계를 조회합니다 (이 요청을 받은 uvicorn 워커의 캐시).
+    """
+    return token_cache.get_stats()
+
+
+@router.get("/token-store", dependencies=[Depends(verify_internal_secret)])
+async def get_token_store_stats(request: Request):
+    """
+    [GET] /auth/token-store
+    토큰 조회용 SQLite 커넥션 풀 상태를 조회합니다.
+    """
+    return request.app.state.token_store.get_stats()
+
+
+@router.post("/token-cache/invalidate", dependencies=[Depends(verify_internal_secret)])
+async def invalidate_token_cache(req: InvalidateRequest):
+    """
+    [POST] /auth/token-cache/invalidate
+    특정 토큰(또는 전체 캐시)을 무효화합니다. Django의 토큰 삭제 시그널에서 호출됩니다.
+    (X-Gateway-Secret 헤더가 secrets.toml의 gateway_internal_secret과 일치해야 함)
+
+    캐시는 uvicorn 워커(프로세스)별이므로 이 요청을 받은 워커의 캐시만 비워짐.
+    워커가 여러 개면 나머지 워커에서는 삭제된 토큰이 캐시 TTL(token_cache_ttl)이 지날 때까지 유효함.
+    """
+    if req.token:
+        removed = token_cache.invalidate(req.token)
+        return {"invalidated": removed}
+
+    token_cache.clear()
+    return {"invalidated": True}
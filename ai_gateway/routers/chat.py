@@ -3,21 +3,31 @@ FastAPI Router: Chat (FabriX Agent)
 FabriX AI 에이전트와의 채팅 엔드포인트
 """
 
-from fastapi import APIRouter, Request, UploadFile, File, Form, HTTPException, Depends
+from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi.responses import JSONResponse
+from starlette.requests import ClientDisconnect
 from sse_starlette.sse import EventSourceResponse
 from pydantic import BaseModel
-from typing import List
-import json
+from typing import List, Optional
 import httpx
-import asyncio
 import logging
 
-from ..services.rate_limiter import rate_limiter
-from ..dependencies import verify_token
+from ..services.rate_limiter import partitioned_rate_limiter, PartitionedReservation
+from ..services.token_usage import StreamUsageTracker, estimate_tokens
+from ..services.response_cache import agent_list_cache
+from ..services.job_queue import Job, JobQueueFull
+from ..services.resilience import CircuitOpenError, fabrix_resilience
+from ..services.upload_proxy import StreamingUpload, UploadError, upload_settings
+from ..services.sse_relay import BufferedRelay, relay_sse, relay_settings, sse_event
+from ..config import FabrixSettings
+from ..dependencies import AuthContext, verify_token, get_fabrix_settings
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# 파일 분석 요청의 필수 form 필드 (FabriX로 그대로 전달)
+FILE_FIELDS = ("agentId", "contents")
+
 
 # Pydantic Models
 class ChatRequest(BaseModel):
@@ -25,54 +35,80 @@ class ChatRequest(BaseModel):
     contents: List[str]
     isStream: bool = True
     isRagOn: bool = True
+    # 지정하면 Gateway가 질문/답변을 해당 Django 채팅 세션에 저장
+    sessionId: Optional[int] = None
 
 
-def get_fabrix_config():
-    """FabriX API 설정 가져오기 (main.py에서 로드됨)"""
-    # main.py의 SECRETS에서 로드
-    from pathlib import Path
-    import toml
-    BASE_DIR = Path(__file__).resolve().parent.parent.parent
-    SECRETS_PATH = BASE_DIR / "secrets.toml"
-    
-    with open(SECRETS_PATH, "r", encoding="utf-8") as f:
-        SECRETS = toml.load(f)
-    
-    FABRIX_CONFIG = SECRETS['fabrix_api']
-    FABRIX_BASE_URL = FABRIX_CONFIG['base_url'].rstrip('/')
-    FABRIX_AGENT_URL = f"{FABRIX_BASE_URL}/openapi/agent-chat/v1"
-    
-    return FABRIX_CONFIG, FABRIX_AGENT_URL
+async def acquire_rate_limit(
+    estimated_tokens: int,
+    max_wait_time: float,
+    auth: AuthContext,
+    agent_id: str
+) -> PartitionedReservation:
+    """
+    Rate Limiter 대기열에서 용량 확보까지 대기 (agent → user → global 순), 타임아웃 시 429 반환
+    (응답 완료 후 partitioned_rate_limiter.commit()으로 실제 사용량 반영)
+    """
+    reservation, error_msg = await partitioned_rate_limiter.acquire(
+        estimated_tokens, timeout=max_wait_time, user_id=auth.user_id, agent_id=agent_id
+    )
+    if reservation is not None:
+        return reservation
+
+    wait_time = await partitioned_rate_limiter.get_wait_time(
+        estimated_tokens, user_id=auth.user_id, agent_id=agent_id
+    )
+    logger.warning(f"Rate limit exceeded after waiting {max_wait_time}s: {error_msg}")
+    raise HTTPException(
+        status_code=429,
+        detail={
+            "error": "rate_limit_exceeded",
+            "message": error_msg,
+            "retry_after": wait_time,
+            "current_usage": await partitioned_rate_limiter.get_current_usage(user_id=auth.user_id)
+        }
+    )
 
 
-def get_fabrix_headers():
-    """FabriX API 요청 헤더 생성"""
-    fabrix_config, _ = get_fabrix_config()
-    return {
-        "Content-Type": "application/json",
-        "x-fabrix-client": fabrix_config['client_key'],
-        "x-openapi-token": fabrix_config['openapi_token'],
-        "x-generative-ai-user-email": fabrix_config.get('user_email', ''),
-    }
+def upstream_unavailable(e: CircuitOpenError) -> HTTPException:
+    """Circuit이 열린 동안은 FabriX를 호출하지 않고 바로 503 반환."""
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(max(1, int(e.retry_after + 0.5)))}
+    )
 
 
 @router.get("/agents")
-async def get_agents(request: Request, page: int = 1, limit: int = 50):
+async def get_agents(
+    request: Request,
+    page: int = 1,
+    limit: int = 50,
+    fabrix: FabrixSettings = Depends(get_fabrix_settings)
+):
     """
     [GET] /agent-messages/agents
     FabriX에서 사용 가능한 Agent 목록을 조회합니다.
+    (Agent 목록은 거의 바뀌지 않으므로 stale-while-revalidate 캐시 사용,
+    동시 요청은 하나의 FabriX 호출로 합쳐짐, FabriX 장애 중에는 캐시된 목록 반환)
     """
-    _, fabrix_agent_url = get_fabrix_config()
-    url = f"{fabrix_agent_url}/agents"
+    url = f"{fabrix.agent_url}/agents"
     params = {"page": page, "limit": limit}
-    headers = get_fabrix_headers()
+    headers = fabrix.headers
+    client = request.app.state.http_client
 
-    try:
-        response = await request.app.state.http_client.get(
-            url, headers=headers, params=params
+    async def fetch_agents():
+        response = await fabrix_resilience.send(
+            client, "agents",
+            lambda: client.build_request("GET", url, headers=headers, params=params)
         )
         response.raise_for_status()
         return response.json()
+
+    try:
+        return await agent_list_cache.get_or_fetch((url, page, limit), fetch_agents)
+    except CircuitOpenError as e:
+        raise upstream_unavailable(e)
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Request timeout")
     except httpx.HTTPStatusError as e:
@@ -82,50 +118,41 @@ async def get_agents(request: Request, page: int = 1, limit: int = 50):
         raise HTTPException(status_code=500, detail="Failed to fetch agents")
 
 
-@router.post("", dependencies=[Depends(verify_token)])
-async def chat_stream(req: ChatRequest, request: Request):
+@router.post("")
+async def chat_stream(
+    req: ChatRequest,
+    request: Request,
+    auth: AuthContext = Depends(verify_token),
+    fabrix: FabrixSettings = Depends(get_fabrix_settings)
+):
     """
     [POST] /agent-messages
     사용자 메시지를 FabriX로 전송하고, 답변을 SSE 스트림으로 반환합니다.
     """
-    _, fabrix_agent_url = get_fabrix_config()
-    
+    # FabriX 장애 중이면 대기열에 들어가기 전에 바로 503
+    try:
+        fabrix_resilience.check("chat")
+    except CircuitOpenError as e:
+        raise upstream_unavailable(e)
+
+    # 대화 저장 대상 세션 확인 (본인 세션만 허용)
+    message_writer = request.app.state.message_writer
+    if req.sessionId is not None:
+        owner = await request.app.state.token_store.session_owner(req.sessionId)
+        if owner != auth.user_id:
+            raise HTTPException(status_code=404, detail="Chat session not found")
+
     # Rate Limiter 체크
-    estimated_tokens = sum(len(content) for content in req.contents) // 4
-    estimated_tokens = max(100, estimated_tokens)
-    
-    # Rate limit 체크 및 자동 대기
-    max_retries = 3
-    max_wait_time = 10.0
+    prompt_tokens = estimate_tokens(sum(len(content) for content in req.contents))
+    estimated_tokens = max(100, prompt_tokens)
     
-    for attempt in range(max_retries):
-        can_proceed, error_msg = rate_limiter.can_proceed(estimated_tokens)
-        
-        if can_proceed:
-            break
-        
-        wait_time = rate_limiter.get_wait_time(estimated_tokens)
-        
-        if wait_time > max_wait_time or attempt == max_retries - 1:
-            logger.warning(f"Rate limit exceeded after {attempt + 1} attempts: {error_msg}")
-            raise HTTPException(
-                status_code=429,
-                detail={
-                    "error": "rate_limit_exceeded",
-                    "message": error_msg,
-                    "retry_after": wait_time,
-                    "current_usage": rate_limiter.get_current_usage()
-                }
-            )
-        
-        logger.info(f"Rate limit reached, waiting {wait_time:.2f}s (attempt {attempt + 1}/{max_retries})")
-        await asyncio.sleep(wait_time)
-    else:
-        logger.error(f"Rate limit exceeded after {max_retries} retries")
-        raise HTTPException(status_code=429, detail="Rate limit exceeded, please try again later")
+    # Rate limit 대기열에서 순서대로 대기 (최대 10초)
+    reservation = await acquire_rate_limit(
+        estimated_tokens, max_wait_time=10.0, auth=auth, agent_id=req.agentId
+    )
     
-    url = f"{fabrix_agent_url}/agent-messages"
-    headers = get_fabrix_headers()
+    url = f"{fabrix.agent_url}/agent-messages"
+    headers = fabrix.headers
     
     payload = {
         "agentId": req.agentId,
@@ -137,123 +164,377 @@ async def chat_stream(req: ChatRequest, request: Request):
         "executeRagStandaloneQuery": True
     }
 
-    async def event_generator():
+    usage = StreamUsageTracker(prompt_tokens, collect_text=req.sessionId is not None)
+    if req.sessionId is not None:
+        message_writer.enqueue(req.sessionId, auth.user_id, 'user', "\n".join(req.contents))
+    # 업스트림 읽기는 별도 task (클라이언트 연결이 끊기면 즉시 취소, 버퍼 크기 제한)
+    relay = BufferedRelay()
+
+    async def upstream_events():
+        client = request.app.state.stream_client
         try:
-            async with request.app.state.http_client.stream(
-                "POST", url, headers=headers, json=payload
-            ) as response:
+            # 연결 실패 / 429만 재시도 (POST는 FabriX가 처리했을 수 있으므로 5xx는 재시도하지 않음)
+            response = await fabrix_resilience.send(
+                client, "chat",
+                lambda: client.build_request("POST", url, headers=headers, json=payload),
+                stream=True
+            )
+            try:
                 response.raise_for_status()
-                
-                async for line in response.aiter_lines():
-                    if line:
-                        decoded_line = line if isinstance(line, str) else line.decode('utf-8')
-                        if decoded_line.startswith("data:"):
-                            yield decoded_line + "\n\n"
-                            
+
+                # 업스트림 SSE 이벤트를 바이트 그대로 전달 (줄 단위 디코딩/재조합 없음)
+                async for chunk in relay_sse(
+                    response.aiter_bytes(),
+                    on_data=usage.feed_event,
+                    coalesce_max_bytes=relay_settings.coalesce_max_bytes,
+                    coalesce_max_delay=relay_settings.coalesce_max_delay
+                ):
+                    yield chunk
+            finally:
+                await response.aclose()
+
+        except CircuitOpenError as e:
+            logger.warning(str(e))
+            yield sse_event({"error": "upstream_unavailable", "detail": str(e)})
         except httpx.TimeoutException:
             logger.error("Streaming timeout occurred")
-            yield f'data: {json.dumps({"error": "timeout", "detail": "API request timeout"})}\n\n'
+            yield sse_event({"error": "timeout", "detail": "API request timeout"})
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error during streaming: {e.response.status_code}")
-            yield f'data: {json.dumps({"error": "http_error", "status": e.response.status_code, "detail": str(e)})}\n\n'
+            yield sse_event({"error": "http_error", "status": e.response.status_code, "detail": str(e)})
         except httpx.RequestError as e:
             logger.error(f"Request error during streaming: {e}")
-            yield f'data: {json.dumps({"error": "request_error", "detail": str(e)})}\n\n'
+            yield sse_event({"error": "request_error", "detail": str(e)})
         except Exception as e:
             logger.error(f"Unexpected streaming error: {e}")
-            yield f'data: {json.dumps({"error": "unexpected_error", "detail": str(e)})}\n\n'
+            yield sse_event({"error": "unexpected_error", "detail": str(e)})
 
-    return EventSourceResponse(event_generator())
+    async def event_generator():
+        try:
+            async for chunk in relay.stream(upstream_events()):
+                yield chunk
+        finally:
+            # 예약값(추정) → 실제 사용량으로 보정 (차이만큼 환불 또는 추가 차감)
+            # 중간에 끊긴 경우 그때까지 받은 답변 기준
+            partitioned_rate_limiter.commit(reservation, usage.total_tokens())
+            # 완성된 답변 저장 (중간에 끊긴 경우 받은 부분까지)
+            answer = usage.text()
+            if req.sessionId is not None and answer:
+                message_writer.enqueue(req.sessionId, auth.user_id, 'assistant', answer)
+
+    return EventSourceResponse(
+        event_generator(),
+        client_close_handler_callable=relay.client_closed,
+        send_timeout=relay_settings.send_timeout
+    )
+
+
+def check_upload_size(request: Request):
+    """Content-Length가 이미 한도를 넘으면 바디를 받기 전에 413 반환."""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and \
+            int(content_length) > upload_settings.max_file_bytes + upload_settings.max_field_bytes * 2:
+        raise HTTPException(status_code=413, detail="File exceeds the maximum upload size")
+
+
+async def open_upload(request: Request) -> StreamingUpload:
+    """파일 앞의 필드(agentId, contents)만 먼저 읽음 (파일 본문은 아직 받지 않음)."""
+    try:
+        upload = StreamingUpload(
+            request.headers.get("content-type"),
+            request.stream(),
+            max_file_bytes=upload_settings.max_file_bytes,
+            max_field_bytes=upload_settings.max_field_bytes
+        )
+        await upload.read_until_file()
+    except (UploadError, ClientDisconnect) as e:
+        raise file_upload_error(e)
+    return upload
+
+
+def file_upload_error(e: Exception) -> HTTPException:
+    """파일 분석 요청 중 발생한 예외를 클라이언트에 반환할 HTTPException으로 변환."""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, CircuitOpenError):
+        return upstream_unavailable(e)
+    if isinstance(e, UploadError):
+        return HTTPException(status_code=e.status_code, detail=e.detail)
+    if isinstance(e, ClientDisconnect):
+        logger.info("Client disconnected during file upload")
+        return HTTPException(status_code=400, detail="Upload aborted by client")
+    if isinstance(e, httpx.TimeoutException):
+        return HTTPException(status_code=504, detail="File upload timed out")
+    if isinstance(e, httpx.HTTPStatusError):
+        return HTTPException(status_code=e.response.status_code, detail=str(e))
+    logger.error(f"File Upload Error: {e}")
+    return HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/file", dependencies=[Depends(verify_token)])
+@router.post("/file")
 async def chat_with_file(
     request: Request,
-    file: UploadFile = File(...),
-    agentId: str = Form(...),
-    contents: str = Form(...)
+    auth: AuthContext = Depends(verify_token),
+    fabrix: FabrixSettings = Depends(get_fabrix_settings)
 ):
     """
     [POST] /agent-messages/file
     파일을 업로드하고 FabriX Code Interpreter 등을 이용해 분석 결과를 받습니다.
+    (multipart form: file, agentId, contents - 받는 즉시 FabriX로 스트리밍 전달)
+    분석이 오래 걸리는 경우 /agent-messages/file/jobs 사용
     """
-    _, fabrix_agent_url = get_fabrix_config()
-    
-    # Rate Limiter 체크
-    estimated_tokens = max(500, len(contents) // 4)
-    
-    max_retries = 3
-    max_wait_time = 15.0
-    
-    for attempt in range(max_retries):
-        can_proceed, error_msg = rate_limiter.can_proceed(estimated_tokens)
-        
-        if can_proceed:
-            break
-        
-        wait_time = rate_limiter.get_wait_time(estimated_tokens)
-        
-        if wait_time > max_wait_time or attempt == max_retries - 1:
-            logger.warning(f"Rate limit exceeded for file upload after {attempt + 1} attempts: {error_msg}")
-            raise HTTPException(
-                status_code=429,
-                detail={
-                    "error": "rate_limit_exceeded",
-                    "message": error_msg,
-                    "retry_after": wait_time,
-                    "current_usage": rate_limiter.get_current_usage()
-                }
-            )
-        
-        logger.info(f"Rate limit reached for file upload, waiting {wait_time:.2f}s (attempt {attempt + 1}/{max_retries})")
-        await asyncio.sleep(wait_time)
+    check_upload_size(request)
+    try:
+        fabrix_resilience.check("file")
+    except CircuitOpenError as e:
+        raise upstream_unavailable(e)
+    upload = await open_upload(request)
+
+    if all(name in upload.fields for name in FILE_FIELDS):
+        body = upload
     else:
-        logger.error(f"File upload rate limit exceeded after {max_retries} retries")
-        raise HTTPException(status_code=429, detail="Rate limit exceeded, please try again later")
+        # 기존 클라이언트는 file 뒤에 필드를 보냄: 나머지 바디를 받아둔 뒤 필수 필드 확인
+        # (agentId 없이 rate limit을 확보하거나 필드 없는 업로드를 FabriX로 보내지 않도록)
+        try:
+            body = await upload.spool(upload_settings.spool_max_bytes)
+        except Exception as e:
+            raise file_upload_error(e)
+        try:
+            body.required_fields(FILE_FIELDS)
+        except UploadError as e:
+            body.close()
+            raise file_upload_error(e)
+
+    agent_id = body.fields["agentId"]
+    contents = body.fields["contents"]
+
+    # Rate Limiter 체크
+    estimated_tokens = max(500, estimate_tokens(len(contents)))
     
-    url = f"{fabrix_agent_url}/agent-messages/file"
+    try:
+        reservation = await acquire_rate_limit(
+            estimated_tokens, max_wait_time=15.0, auth=auth, agent_id=agent_id
+        )
+    except BaseException:
+        if body is not upload:
+            body.close()
+        raise
+    usage = StreamUsageTracker(estimated_tokens)
     
-    headers = get_fabrix_headers()
-    headers.pop("Content-Type", None)
+    url = f"{fabrix.agent_url}/agent-messages/file"
+    # FabriX API expects contents as a list of strings even for file uploads
+    # (단일 contents 필드 = 길이 1 리스트)
+    headers = {**fabrix.upload_headers, "Content-Type": body.content_type}
+
+    client = request.app.state.http_client
 
     try:
-        file.file.seek(0)
-        files = {
-            'file': (file.filename, file.file, file.content_type)
-        }
-        
-        # FabriX API expects contents as a list of strings
-        # even for file uploads
-        payload_contents = [contents] if isinstance(contents, str) else contents
-        
-        data = {
-            'agentId': agentId,
-            'isStream': 'False',
-            'contents': payload_contents
-        }
-        
-        response = await request.app.state.http_client.post(
-            url,
-            headers=headers,
-            files=files,
-            data=data
+        # 스트리밍 중인 업로드 바디는 한 번만 보낼 수 있으므로 재시도 없이 Circuit Breaker만 적용
+        # (spooling된 경우는 다시 읽을 수 있으므로 연결 실패 / 429 시 재시도)
+        response = await fabrix_resilience.send(
+            client, "file",
+            lambda: client.build_request(
+                "POST", url,
+                headers=headers,
+                content=body.upstream_body(
+                    field_names=FILE_FIELDS,
+                    extra_fields=[("isStream", "False")]
+                )
+            ),
+            replayable=body is not upload
         )
         response.raise_for_status()
-        return response.json()
+        result = response.json()
+        usage.feed_response(result)
+        return result
 
-    except httpx.TimeoutException:
-        raise HTTPException(status_code=504, detail="File upload timed out")
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(status_code=e.response.status_code, detail=str(e))
     except Exception as e:
-        logger.error(f"File Upload Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise file_upload_error(e)
+    finally:
+        if body is not upload:
+            body.close()
+        partitioned_rate_limiter.commit(reservation, usage.total_tokens())
+
+
+@router.post("/file/jobs", status_code=202)
+async def submit_file_job(
+    request: Request,
+    auth: AuthContext = Depends(verify_token),
+    fabrix: FabrixSettings = Depends(get_fabrix_settings)
+):
+    """
+    [POST] /agent-messages/file/jobs
+    파일 분석을 비동기 작업으로 제출하고 job id를 즉시 반환합니다.
+    (multipart form: file, agentId, contents, sessionId(선택))
+    결과는 GET /file/jobs/{jobId} 폴링 또는 /file/jobs/{jobId}/events SSE 구독으로 조회
+    (Rate Limit은 worker가 실행을 시작할 때 확보, 대기 시간 초과 시 job error의 status_code 429)
+    """
+    jobs = request.app.state.file_jobs
+    try:
+        fabrix_resilience.check("file")
+    except CircuitOpenError as e:
+        raise upstream_unavailable(e)
+    if jobs.is_full():
+        raise HTTPException(
+            status_code=503,
+            detail="Too many file analyses are waiting, try again later",
+            headers={"Retry-After": "10"}
+        )
+
+    check_upload_size(request)
+    upload = await open_upload(request)
+    try:
+        # 업로드는 요청이 끝나기 전에 모두 받아둠 (업스트림 전송은 worker에서)
+        spooled = await upload.spool(upload_settings.spool_max_bytes)
+    except Exception as e:
+        raise file_upload_error(e)
+
+    try:
+        spooled.required_fields(FILE_FIELDS)
+        session_id = spooled.fields.get("sessionId")
+        if session_id is not None:
+            if not session_id.isdigit():
+                raise HTTPException(status_code=422, detail="sessionId must be an integer")
+            session_id = int(session_id)
+            owner = await request.app.state.token_store.session_owner(session_id)
+            if owner != auth.user_id:
+                raise HTTPException(status_code=404, detail="Chat session not found")
+
+        agent_id = spooled.fields["agentId"]
+        contents = spooled.fields["contents"]
+        estimated_tokens = max(500, estimate_tokens(len(contents)))
+    except Exception as e:
+        spooled.close()
+        raise file_upload_error(e)
+
+    usage = StreamUsageTracker(estimated_tokens)
+    url = f"{fabrix.agent_url}/agent-messages/file"
+    headers = {**fabrix.upload_headers, "Content-Type": spooled.content_type}
+    app = request.app
+    reservation = None
+
+    async def run_file_job():
+        nonlocal reservation
+        # RPM/TPM은 대기열에서 꺼내 실제로 전송하기 직전에 예약
+        # (제출 시점에 예약하면 대기하는 동안 윈도우가 지나가 업스트림 호출이 한도에 집계되지 않음)
+        reservation = await acquire_rate_limit(
+            estimated_tokens, max_wait_time=15.0, auth=auth, agent_id=agent_id
+        )
+        client = app.state.job_client
+        try:
+            # spooling된 파일은 다시 읽을 수 있으므로 연결 실패 / 429 시 재시도
+            response = await fabrix_resilience.send(
+                client, "file",
+                lambda: client.build_request(
+                    "POST", url,
+                    headers=headers,
+                    content=spooled.upstream_body(
+                        field_names=FILE_FIELDS,
+                        extra_fields=[("isStream", "False")]
+                    )
+                )
+            )
+            response.raise_for_status()
+            result = response.json()
+        except Exception as e:
+            raise file_upload_error(e)
+        usage.feed_response(result)
+        answer = result.get("content") if isinstance(result, dict) else None
+        if session_id is not None and answer:
+            app.state.message_writer.enqueue(session_id, auth.user_id, 'assistant', answer)
+        return result
+
+    def finish_file_job():
+        spooled.close()
+        # 실행 전에 취소 / 실패한 job은 예약이 없음
+        if reservation is not None:
+            partitioned_rate_limiter.commit(reservation, usage.total_tokens())
+
+    try:
+        job = jobs.submit(auth.user_id, run_file_job, cleanup=finish_file_job)
+    except JobQueueFull:
+        spooled.close()
+        raise HTTPException(
+            status_code=503,
+            detail="Too many file analyses are waiting, try again later",
+            headers={"Retry-After": "10"}
+        )
+
+    if session_id is not None:
+        app.state.message_writer.enqueue(session_id, auth.user_id, 'user', contents)
+
+    status_url = str(request.url_for("get_file_job", job_id=job.id))
+    return JSONResponse(
+        status_code=202,
+        content={
+            **job.snapshot(),
+            "statusUrl": status_url,
+            "eventsUrl": str(request.url_for("file_job_events", job_id=job.id))
+        },
+        headers={"Location": status_url}
+    )
+
+
+def find_file_job(request: Request, job_id: str, auth: AuthContext) -> Job:
+    """본인이 제출한 job만 조회 (없거나 만료되었거나 다른 사용자의 job이면 404)."""
+    job = request.app.state.file_jobs.get(job_id, auth.user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/file/jobs/{job_id}")
+async def get_file_job(
+    job_id: str,
+    request: Request,
+    auth: AuthContext = Depends(verify_token)
+):
+    """
+    [GET] /agent-messages/file/jobs/{job_id}
+    파일 분석 작업 상태를 조회합니다 (완료 시 result 또는 error 포함).
+    """
+    return find_file_job(request, job_id, auth).snapshot()
+
+
+@router.get("/file/jobs/{job_id}/events")
+async def file_job_events(
+    job_id: str,
+    request: Request,
+    auth: AuthContext = Depends(verify_token)
+):
+    """
+    [GET] /agent-messages/file/jobs/{job_id}/events
+    작업 상태가 바뀔 때마다 SSE 이벤트로 전달하고, 완료(result/error) 이벤트 후 종료합니다.
+    """
+    job = find_file_job(request, job_id, auth)
+    jobs = request.app.state.file_jobs
+
+    async def event_generator():
+        async for snapshot in jobs.updates(job):
+            yield sse_event(snapshot)
+
+    return EventSourceResponse(event_generator(), send_timeout=relay_settings.send_timeout)
+
+
+@router.delete("/file/jobs/{job_id}")
+async def cancel_file_job(
+    job_id: str,
+    request: Request,
+    auth: AuthContext = Depends(verify_token)
+):
+    """
+    [DELETE] /agent-messages/file/jobs/{job_id}
+    대기 중이거나 실행 중인 파일 분석 작업을 취소합니다.
+    """
+    job = find_file_job(request, job_id, auth)
+    await request.app.state.file_jobs.cancel(job)
+    return job.snapshot()
 
 
 @router.get("/rate-limit-status")
-async def get_rate_limit_status():
+async def get_rate_limit_status(auth: AuthContext = Depends(verify_token)):
     """
     [GET] /agent-messages/rate-limit-status
-    현재 Rate Limiter 사용 현황을 조회합니다.
+    현재 Rate Limiter 사용 현황을 조회합니다 (global 합계 + 호출한 사용자의 사용자/에이전트 파티션).
     """
-    return rate_limiter.get_current_usage()
+    return await partitioned_rate_limiter.get_current_usage(user_id=auth.user_id)
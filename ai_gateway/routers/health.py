@@ -3,9 +3,15 @@ FastAPI Router: Health Check
 헬스 체크 및 상태 확인 엔드포인트
 """
 
-from fastapi import APIRouter, Response
+from fastapi import APIRouter, Request, Response
 import logging
 
+from ..services.upstream_pool import get_pool_metrics
+from ..services.sse_relay import stream_metrics
+from ..services.resilience import fabrix_resilience
+from ..services.image_pool import image_worker_pool
+from ..services.result_store import result_store
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -24,3 +30,25 @@ async def health_check():
 async def ping():
     """간단한 ping 엔드포인트"""
     return Response(content="pong", media_type="text/plain")
+
+
+@router.get("/metrics")
+async def metrics(request: Request):
+    """
+    Upstream(FabriX) 연결 풀 / 채팅 스트림 지표
+    풀 대기 시간, 활성 요청/연결 수, keep-alive 재사용률, 재시도 / Circuit Breaker 상태,
+    취소된 스트림 수, 대화 저장 큐, 파일 분석 작업, 이미지 비교 worker / 결과 URL 저장소
+    """
+    return {
+        "upstream": {
+            "stream": get_pool_metrics(request.app.state.stream_client),
+            "short": get_pool_metrics(request.app.state.http_client),
+            "jobs": get_pool_metrics(request.app.state.job_client),
+            "resilience": fabrix_resilience.get_stats()
+        },
+        "streams": stream_metrics.snapshot(),
+        "messages": request.app.state.message_writer.get_stats(),
+        "file_jobs": request.app.state.file_jobs.get_stats(),
+        "image_pool": image_worker_pool.get_stats(),
+        "image_results": result_store.get_stats()
+    }
@@ -3,11 +3,21 @@ FastAPI Router: Image Compare
 이미지/PDF/TIFF 비교 엔드포인트
 """
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request
+from fastapi.responses import Response, StreamingResponse
 import asyncio
+import json
+import os
+import tempfile
 import logging
 
-from ..services.image_processor import process_comparison
+from ..services.image_processor import (
+    ALIGNMENT_METHODS, IMAGE_FORMATS, PREVIEW_MAX_DIMENSION, RESPONSE_FORMATS, OutputFormat,
+    process_comparison, compare_document_pages, get_page_count, page_pairs, parse_output_formats
+)
+from ..services.image_pool import image_worker_pool
+from ..services.result_store import DOWNLOAD, result_store
+from ..services.tiled_compare import compare_tiled
 from ..dependencies import verify_token
 
 router = APIRouter()
@@ -16,9 +26,89 @@ logger = logging.getLogger(__name__)
 # Semaphore: 동시 처리 제한 (최대 5개)
 image_processing_semaphore = asyncio.Semaphore(5)
 
+# 파일 크기 제한 (30MB)
+MAX_FILE_SIZE = 30 * 1024 * 1024
+
+# MIME 타입 검증
+ALLOWED_TYPES = [
+    'image/jpeg', 
+    'image/png', 
+    'image/gif', 
+    'application/pdf',
+    'image/tiff',
+    'image/tif'
+]
+
+
+def validate_content_type(file: UploadFile, name: str):
+    if file.content_type not in ALLOWED_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type for {name}: {file.content_type}. Allowed: {', '.join(ALLOWED_TYPES)}"
+        )
+
+
+def validate_alignment(alignment: str):
+    if alignment not in ALIGNMENT_METHODS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported alignment: {alignment}. Allowed: {', '.join(ALIGNMENT_METHODS)}"
+        )
+
+
+def validate_response_format(response_format: str):
+    if response_format not in RESPONSE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported response_format: {response_format}. Allowed: {', '.join(RESPONSE_FORMATS)}"
+        )
+
+
+def validate_output_formats(spec: str, preview_max_dimension: int) -> dict:
+    if preview_max_dimension < 0:
+        raise HTTPException(status_code=400, detail="preview_max_dimension must be >= 0")
+    try:
+        return parse_output_formats(spec)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def publish_result(request: Request, result: dict, download_format: OutputFormat) -> dict:
+    """
+    response_format="url" 결과의 이미지를 result_store에 저장하고 *_image 대신 *_url로 바꿈
+    (download는 tile 비교면 이미 인코딩된 PNG, 아니면 압축된 결과(PackedImage)를 저장해 두고 GET 요청 때 인코딩)
+    """
+    images = {}
+    download_image = None
+    for name in ("result", "file1", "file2", DOWNLOAD):
+        image = result.pop(f"{name}_image")
+        media_type = result.pop(f"{name}_media_type", None)
+        if media_type is None:
+            download_image = image  # 인코딩 전 압축된 결과
+        else:
+            images[name] = (image, media_type)
+    result_id = result_store.put(images, download_image, download_format)
+
+    urls = {
+        f"{name}_url": request.app.url_path_for("get_result_image", result_id=result_id, name=name)
+        for name in ("result", "file1", "file2", DOWNLOAD)
+    }
+    return {**urls, "expires_in": int(result_store.ttl), **result}
+
+
+async def read_limited(file: UploadFile, name: str) -> bytes:
+    data = await file.read()
+    if len(data) > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{name.capitalize()} too large: {len(data) / 1024 / 1024:.1f}MB (max 30MB)"
+        )
+    return data
+
 
 @router.post("/process", dependencies=[Depends(verify_token)])
 async def compare_images(
+    request: Request,
     file1: UploadFile = File(...),
     file2: UploadFile = File(...),
     mode: str = Form("difference"),
@@ -26,7 +116,12 @@ async def compare_images(
     feature_count: int = Form(4000),
     page1: int = Form(0),
     page2: int = Form(0),
-    bin_threshold: int = Form(200)
+    bin_threshold: int = Form(200),
+    alignment: str = Form("orb"),
+    tiled: bool = Form(False),
+    response_format: str = Form("json"),
+    output_formats: str = Form(""),
+    preview_max_dimension: int = Form(PREVIEW_MAX_DIMENSION)
 ):
     """
     [POST] /image-compare/process
@@ -41,66 +136,41 @@ async def compare_images(
         page1: PDF/TIFF 페이지 번호 (0-based)
         page2: PDF/TIFF 페이지 번호 (0-based)
         bin_threshold: 이진화 임계값 (0-255)
+        alignment: 정렬 방식 ('orb' = 원본 해상도 ORB, 'pyramid' = 축소본 추정 + 원본 해상도 보정, 대형 페이지에서 더 빠름)
+        tiled: 대형 도면용 tile 비교 (PDF 300 DPI / 이미지 원본 해상도, 메모리 사용량 고정)
+        response_format: 'json' (이미지를 base64로 포함) 또는 'url' (이미지는 GET /results/{id}/{name}에서 바이너리로)
+        output_formats: 결과 이미지별 형식 "이름:형식[:품질]" 목록 (예: "preview:webp:75,download:png:3")
+            이름: result, file1, file2, download, preview / 형식: jpeg, webp, png (PNG 품질 = 압축 레벨 0-9)
+            기본: 미리보기 JPEG 85, 다운로드 PNG
+        preview_max_dimension: 화면 표시용 이미지(result / file1 / file2) 최대 크기 (기본 2000, 0이면 원본 크기)
     
     Returns:
         {
-            "result_base64": str (JPEG, 화면 표시용),
-            "download_base64": str (PNG, 다운로드용),
+            "result_base64": str (화면 표시용 미리보기),
+            "download_base64": str (다운로드용 원본 크기 - tiled이면 원본 해상도),
             "metadata": dict
         }
+        response_format='url'이면 *_base64 대신 result_url / file1_url / file2_url / download_url
+        + expires_in (URL 유효 시간 초, download PNG는 처음 요청될 때 인코딩)
     """
-    # 파일 크기 제한 (30MB)
-    MAX_FILE_SIZE = 30 * 1024 * 1024
-    
-    # MIME 타입 검증
-    ALLOWED_TYPES = [
-        'image/jpeg', 
-        'image/png', 
-        'image/gif', 
-        'application/pdf',
-        'image/tiff',
-        'image/tif'
-    ]
-    
-    if file1.content_type not in ALLOWED_TYPES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported file type for file1: {file1.content_type}. Allowed: {', '.join(ALLOWED_TYPES)}"
-        )
-    
-    if file2.content_type not in ALLOWED_TYPES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported file type for file2: {file2.content_type}. Allowed: {', '.join(ALLOWED_TYPES)}"
-        )
+    validate_content_type(file1, "file1")
+    validate_content_type(file2, "file2")
+    validate_alignment(alignment)
+    validate_response_format(response_format)
+    formats = validate_output_formats(output_formats, preview_max_dimension)
     
     # Semaphore로 동시 처리 제한
     async with image_processing_semaphore:
         try:
             logger.info(f"Image comparison started: {file1.filename} vs {file2.filename}")
             
-            # 파일 읽기
-            file1_bytes = await file1.read()
-            file2_bytes = await file2.read()
+            # 파일 읽기 + 크기 검증
+            file1_bytes = await read_limited(file1, "file1")
+            file2_bytes = await read_limited(file2, "file2")
             
-            # 크기 검증
-            if len(file1_bytes) > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"File1 too large: {len(file1_bytes) / 1024 / 1024:.1f}MB (max 30MB)"
-                )
-            
-            if len(file2_bytes) > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"File2 too large: {len(file2_bytes) / 1024 / 1024:.1f}MB (max 30MB)"
-                )
-            
-            # CPU-bound 작업을 별도 스레드에서 실행 (이벤트 루프 블록 방지)
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,  # ThreadPoolExecutor 사용
-                process_comparison,
+            # CPU-bound 작업을 worker 프로세스에서 실행 (이벤트 루프 블록 방지, 입출력은 공유 메모리로 전달)
+            result = await image_worker_pool.run(
+                compare_tiled if tiled else process_comparison,
                 file1_bytes,
                 file1.content_type,
                 file2_bytes,
@@ -110,12 +180,21 @@ async def compare_images(
                 feature_count,
                 page1,
                 page2,
-                bin_threshold
+                bin_threshold,
+                alignment,
+                response_format,
+                formats,
+                preview_max_dimension
             )
             
             logger.info(f"Image comparison completed: {result['metadata']['result_size']}")
+            if response_format == "url":
+                return publish_result(request, result, formats["download"])
             return result
         
+        except HTTPException:
+            raise
+        
         except ValueError as e:
             # 사용자 입력 오류 (파일 형식, 페이지 번호 등)
             logger.warning(f"Invalid input: {str(e)}")
@@ -128,3 +207,154 @@ async def compare_images(
                 status_code=500,
                 detail=f"Image processing failed: {str(e)}"
             )
+
+
+def _write_temp_file(data: bytes) -> str:
+    with tempfile.NamedTemporaryFile(prefix="image-compare-", delete=False) as f:
+        f.write(data)
+        return f.name
+
+
+def _remove_temp_files(paths: list):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"Failed to remove temp file {path}: {e}")
+
+
+@router.post("/batch", dependencies=[Depends(verify_token)])
+async def compare_documents(
+    request: Request,
+    file1: UploadFile = File(...),
+    file2: UploadFile = File(...),
+    pages: str = Form("all"),
+    mode: str = Form("difference"),
+    diff_threshold: int = Form(30),
+    feature_count: int = Form(4000),
+    bin_threshold: int = Form(200),
+    alignment: str = Form("orb"),
+    response_format: str = Form("json"),
+    output_formats: str = Form(""),
+    preview_max_dimension: int = Form(PREVIEW_MAX_DIMENSION)
+):
+    """
+    [POST] /image-compare/batch
+    두 PDF/TIFF 문서의 여러 페이지를 한 번에 비교합니다.
+    페이지 쌍은 프로세스 풀에서 병렬로 처리되고, 끝나는 순서대로 NDJSON 한 줄씩 전달됩니다.
+    (동시에 제출하는 페이지 쌍은 worker 수만큼만: 큰 배치가 다른 사용자의 /process 요청 앞을 막지 않도록)
+    
+    Args:
+        pages: "all" (같은 번호끼리) 또는 "0:0,1:2,3" (0-based 페이지 쌍)
+        (나머지는 /process와 동일)
+    
+    Returns:
+        application/x-ndjson
+        {"index": int, "page1": int, "page2": int, "result_base64": ..., "metadata": {...}}
+            (response_format='url'이면 result_base64 등 대신 result_url 등, /process와 동일)
+        {"index": int, "page1": int, "page2": int, "error": str}
+        {"done": true, "pages": int, "failed": int}  (마지막 줄)
+    """
+    validate_content_type(file1, "file1")
+    validate_content_type(file2, "file2")
+    validate_alignment(alignment)
+    validate_response_format(response_format)
+    formats = validate_output_formats(output_formats, preview_max_dimension)
+    file1_bytes = await read_limited(file1, "file1")
+    file2_bytes = await read_limited(file2, "file2")
+
+    # 문서 파싱 / 임시 파일 쓰기(최대 수십 MB)는 스레드에서 실행 (이벤트 루프 블록 방지)
+    try:
+        pages1 = await asyncio.to_thread(get_page_count, file1_bytes, file1.content_type)
+        pages2 = await asyncio.to_thread(get_page_count, file2_bytes, file2.content_type)
+        pairs = page_pairs(pages, pages1, pages2)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 문서는 한 번만 디스크에 저장하고 worker는 경로로 열어서 필요한 페이지만 렌더링
+    # (응답 본문을 보내기 시작할 때 저장: 응답이 시작되지 않으면 임시 파일도 만들지 않음)
+    sources = [file1_bytes, file2_bytes]
+    paths = []
+    del file1_bytes, file2_bytes
+    logger.info(f"Batch comparison started: {file1.filename} vs {file2.filename}, {len(pairs)} page pairs")
+
+    async def compare_pair(index: int, page1: int, page2: int) -> dict:
+        line = {"index": index, "page1": page1, "page2": page2}
+        try:
+            result = await image_worker_pool.submit(
+                compare_document_pages,
+                paths[0], file1.content_type, paths[1], file2.content_type,
+                page1, page2, mode, diff_threshold, feature_count, bin_threshold, alignment, response_format,
+                formats, preview_max_dimension
+            )
+        except ValueError as e:
+            line["error"] = str(e)
+        except Exception as e:
+            logger.error(f"Batch page comparison failed ({page1}:{page2}): {e}")
+            line["error"] = f"Image processing failed: {str(e)}"
+        else:
+            result["metadata"].update(file1_pages=pages1, file2_pages=pages2)
+            if response_format == "url":
+                result = publish_result(request, result, formats["download"])
+            line.update(result)
+        return line
+
+    async def result_lines():
+        remaining = iter(enumerate(pairs))
+        running = set()
+
+        def start_next():
+            for index, (page1, page2) in remaining:
+                running.add(asyncio.ensure_future(compare_pair(index, page1, page2)))
+                return
+
+        try:
+            while sources:
+                paths.append(await asyncio.to_thread(_write_temp_file, sources.pop(0)))
+            async with image_processing_semaphore:
+                # worker 수만큼만 제출하고 하나가 끝날 때마다 다음 페이지 쌍 제출
+                for _ in range(max(1, image_worker_pool.max_workers)):
+                    start_next()
+                failed = 0
+                while running:
+                    done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        running.discard(task)
+                        start_next()
+                        line = task.result()
+                        failed += "error" in line
+                        yield json.dumps(line) + "\n"
+                yield json.dumps({"done": True, "pages": len(pairs), "failed": failed}) + "\n"
+                logger.info(f"Batch comparison completed: {len(pairs)} pages, {failed} failed")
+        finally:
+            # 클라이언트가 중간에 끊은 경우 나머지 페이지 쌍은 제출하지 않음
+            if running:
+                # 이미 제출한 페이지(최대 worker 수)는 취소하지 않고 끝난 뒤 삭제
+                # (asyncio 쪽을 취소해도 실행 중인 worker는 멈추지 않고 파일을 읽을 수 있음)
+                asyncio.gather(*running, return_exceptions=True).add_done_callback(
+                    lambda _: _remove_temp_files(paths)
+                )
+            else:
+                _remove_temp_files(paths)
+
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+
+
+@router.get("/results/{result_id}/{name}", name="get_result_image")
+async def get_result_image(result_id: str, name: str):
+    """
+    [GET] /image-compare/results/{result_id}/{name}
+    response_format='url' 비교 결과 이미지 (name: result, file1, file2, download)
+    
+    결과 id 자체가 접근 권한 (추측 불가능한 임의 문자열, TTL 후 삭제) → <img src>로 바로 사용 가능
+    download는 처음 요청될 때 인코딩 (기본 PNG)
+    """
+    image = await result_store.get(result_id, name)
+    if image is None:
+        raise HTTPException(status_code=404, detail="Result not found or expired")
+    data, media_type = image
+    headers = {"Cache-Control": f"private, max-age={int(result_store.ttl)}, immutable"}
+    if name == DOWNLOAD:
+        extension = next(ext for ext, _, mime, _ in IMAGE_FORMATS.values() if mime == media_type)
+        headers["Content-Disposition"] = f'attachment; filename="comparison-{result_id[:8]}{extension}"'
+    return Response(content=data, media_type=media_type, headers=headers)
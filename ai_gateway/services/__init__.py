@@ -1,7 +1,23 @@
 """
 FastAPI Services Package
 """
+from . import alignment_cache
+from . import image_pool
 from . import image_processor
+from . import job_queue
+from . import message_store
 from . import rate_limiter
+from . import rate_limit_backends
+from . import raster_cache
+from . import resilience
+from . import response_cache
+from . import result_store
+from . import sse_relay
+from . import tiled_compare
+from . import token_cache
+from . import token_store
+from . import token_usage
+from . import upload_proxy
+from . import upstream_pool
 
-__all__ = ["image_processor", "rate_limiter"]
+__all__ = ["alignment_cache", "image_pool", "image_processor", "job_queue", "message_store", "rate_limiter", "rate_limit_backends", "raster_cache", "resilience", "response_cache", "result_store", "sse_relay", "tiled_compare", "token_cache", "token_store", "token_usage", "upload_proxy", "upstream_pool"]
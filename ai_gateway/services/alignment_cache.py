@@ -0,0 +1,117 @@
+"""
+Alignment Cache for image comparison (ORB 특징점 / 호모그래피)
+정렬은 비교 파이프라인에서 가장 비싼 단계 → mode / 임계값만 바꿔 다시 비교할 때 건너뜀
+- 특징점: (raster key, feature_count) → (좌표 float32 (N, 2), ORB descriptor)
+  같은 기준 도면을 여러 개정본과 비교할 때 기준 도면 쪽은 다시 검출하지 않음
+- 호모그래피: (raster key A, raster key B, feature_count) → (H 또는 None, match_quality)
+- raster key는 raster_cache와 같은 (sha256, page, dpi, max_dimension) → 같은 래스터에만 적중
+- 프로세스별 메모리 LRU (항목 수 기준, 특징점 1건 ≈ feature_count × 40 bytes)
+"""
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+import threading
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class AlignmentCache:
+    """
+    Per-process LRU caches of ORB features and pairwise homographies.
+
+    thread backend에서는 여러 스레드가 함께 쓰므로 lock으로 보호.
+    """
+
+    def __init__(self, max_features: int = 64, max_homographies: int = 1024):
+        """
+        Initialize alignment cache.
+
+        Args:
+            max_features: Maximum cached feature sets (페이지 래스터 × feature_count)
+            max_homographies: Maximum cached image pairs
+        """
+        self.max_features = max_features
+        self.max_homographies = max_homographies
+
+        self._features = OrderedDict()
+        self._homographies = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.feature_hits = 0
+        self.feature_misses = 0
+        self.homography_hits = 0
+        self.homography_misses = 0
+
+    def configure(self, max_features: Optional[int] = None, max_homographies: Optional[int] = None):
+        """Apply new sizes (secrets.toml [gateway] 섹션에서 호출)."""
+        with self._lock:
+            if max_features is not None:
+                self.max_features = max_features
+                self._evict(self._features, self.max_features)
+            if max_homographies is not None:
+                self.max_homographies = max_homographies
+                self._evict(self._homographies, self.max_homographies)
+
+    def settings(self) -> dict:
+        """Current settings (worker 프로세스에 같은 설정을 넘길 때 사용)."""
+        return {'max_features': self.max_features, 'max_homographies': self.max_homographies}
+
+    def get_features(self, key: Hashable) -> Optional[Tuple[np.ndarray, Optional[np.ndarray]]]:
+        with self._lock:
+            entry = self._features.get(key)
+            if entry is None:
+                self.feature_misses += 1
+                return None
+            self._features.move_to_end(key)
+            self.feature_hits += 1
+            return entry
+
+    def put_features(self, key: Hashable, points: np.ndarray, descriptors: Optional[np.ndarray]):
+        points.setflags(write=False)
+        if descriptors is not None:
+            descriptors.setflags(write=False)
+        with self._lock:
+            self._features[key] = (points, descriptors)
+            self._features.move_to_end(key)
+            self._evict(self._features, self.max_features)
+
+    def get_homography(self, key: Hashable) -> Optional[Tuple[Optional[np.ndarray], float]]:
+        with self._lock:
+            entry = self._homographies.get(key)
+            if entry is None:
+                self.homography_misses += 1
+                return None
+            self._homographies.move_to_end(key)
+            self.homography_hits += 1
+            return entry
+
+    def put_homography(self, key: Hashable, H: Optional[np.ndarray], match_quality: float):
+        if H is not None:
+            H.setflags(write=False)
+        with self._lock:
+            self._homographies[key] = (H, match_quality)
+            self._homographies.move_to_end(key)
+            self._evict(self._homographies, self.max_homographies)
+
+    @staticmethod
+    def _evict(entries: OrderedDict, maxsize: int):
+        while len(entries) > maxsize:
+            entries.popitem(last=False)
+
+    def get_stats(self) -> dict:
+        """Get cache statistics (이 프로세스 기준)."""
+        with self._lock:
+            return {
+                'features': len(self._features),
+                'homographies': len(self._homographies),
+                'feature_hits': self.feature_hits,
+                'feature_misses': self.feature_misses,
+                'homography_hits': self.homography_hits,
+                'homography_misses': self.homography_misses
+            }
+
+
+# Global alignment cache instance
+alignment_cache = AlignmentCache()
@@ -0,0 +1,276 @@
+"""
+Image Worker Pool
+이미지 비교(OpenCV / NumPy / PyMuPDF)를 별도 프로세스에서 실행
+- NumPy 마스크 연산은 GIL을 잡고 있어 스레드 풀에서는 동시 비교가 직렬화됨 → 프로세스 풀로 코어 수만큼 병렬 처리
+- spawn 방식 (Windows와 동일 동작, 이벤트 루프/스레드를 가진 부모 프로세스를 fork하지 않음)
+- worker 시작 시 cv2/fitz를 미리 import하고 OpenCV 내부 스레드는 1개로 제한 (프로세스 간 과다 구독 방지)
+- 입력 파일 바이트와 결과(문자열 / 바이트 / 이미지 배열)는 pickle/pipe 대신 공유 메모리로 전달 (run())
+- backend = "thread"로 설정하면 기존처럼 기본 스레드 풀에서 실행
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, NamedTuple, Optional
+import asyncio
+import multiprocessing
+import os
+import logging
+
+import numpy as np
+
+from .alignment_cache import alignment_cache
+from .raster_cache import raster_cache
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("process", "thread")
+
+
+class _SharedSlice(NamedTuple):
+    """공유 메모리 블록 안의 한 구간 (bytes 인자/결과 자리에 대신 전달)."""
+    offset: int
+    size: int
+
+
+class _SharedText(NamedTuple):
+    """공유 메모리 블록 안의 ASCII 문자열 결과 (base64 data URI 등)."""
+    offset: int
+    size: int
+
+
+class _SharedArray(NamedTuple):
+    """공유 메모리 블록 안의 numpy 배열 결과 (인코딩 전 결과 이미지 등)."""
+    offset: int
+    shape: tuple
+    dtype: str
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+
+
+def _init_worker(raster_cache_settings: dict, alignment_cache_settings: dict):
+    """Worker process initializer: 무거운 모듈을 미리 로드하고 부모와 같은 캐시 설정 적용."""
+    import cv2
+    from . import image_processor, tiled_compare  # noqa: F401 (cv2, fitz, PIL import)
+
+    cv2.setNumThreads(1)
+    raster_cache.configure(**raster_cache_settings)
+    alignment_cache.configure(**alignment_cache_settings)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _call_shared(block_name: str, output: _SharedSlice, func: Callable, args: tuple) -> Any:
+    """
+    Worker side of ImageWorkerPool.run().
+
+    _SharedSlice 인자는 공유 메모리에서 bytes로 읽고, 결과 dict의 문자열 / bytes / 배열 값은
+    출력 구간에 들어가는 만큼 써서 _SharedText / _SharedSlice / _SharedArray로 바꿔 반환
+    (남는 값은 평소처럼 pickle).
+    블록은 부모가 만들고 해제하므로 worker는 열고 닫기만 함.
+    """
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        args = tuple(
+            bytes(block.buf[arg.offset:arg.offset + arg.size]) if isinstance(arg, _SharedSlice) else arg
+            for arg in args
+        )
+        result = func(*args)
+        if not isinstance(result, dict):
+            return result
+
+        offset, end = output.offset, output.offset + output.size
+        for key, value in result.items():
+            if isinstance(value, str) and value.isascii():
+                data, shared = value.encode("ascii"), _SharedText(offset, len(value))
+            elif isinstance(value, bytes):
+                data, shared = value, _SharedSlice(offset, len(value))
+            elif isinstance(value, np.ndarray):
+                data, shared = value, _SharedArray(offset, value.shape, value.dtype.str)
+            else:
+                continue
+            if offset + shared.size > end:
+                continue
+            if isinstance(data, np.ndarray):
+                np.ndarray(data.shape, data.dtype, buffer=block.buf, offset=offset)[...] = data
+            else:
+                block.buf[offset:offset + shared.size] = data
+            result[key] = shared
+            offset += shared.size
+        return result
+    finally:
+        block.close()
+
+
+class ImageWorkerPool:
+    """
+    Lazily started executor shared by the image endpoints.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        backend: str = "process",
+        shared_output_bytes: int = 64 * 1024 * 1024
+    ):
+        """
+        Args:
+            max_workers: Worker processes (None = CPU 수)
+            backend: "process" (ProcessPoolExecutor) 또는 "thread" (이벤트 루프 기본 스레드 풀)
+            shared_output_bytes: run() 결과를 받을 공유 메모리 크기 (넘치는 결과는 pickle로 전달)
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown image backend: {backend} (allowed: {', '.join(BACKENDS)})")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.backend = backend
+        self.shared_output_bytes = shared_output_bytes
+        self._executor = None
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.shared_in_bytes = 0
+        self.shared_out_bytes = 0
+        self.pickled_results = 0
+
+    def configure(
+        self,
+        max_workers: Optional[int] = None,
+        backend: Optional[str] = None,
+        shared_output_bytes: Optional[int] = None
+    ):
+        """Apply new settings (secrets.toml [gateway] 섹션에서 호출, 이미 시작된 풀은 다음 시작부터 적용)."""
+        if max_workers:
+            self.max_workers = max_workers
+        if backend:
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown image backend: {backend} (allowed: {', '.join(BACKENDS)})")
+            self.backend = backend
+        if shared_output_bytes is not None:
+            self.shared_output_bytes = shared_output_bytes
+        logger.info(f"Image worker pool configured: backend={self.backend}, workers={self.max_workers}")
+
+    def executor(self) -> Optional[ProcessPoolExecutor]:
+        """Process pool (thread backend이면 None = 이벤트 루프 기본 스레드 풀)."""
+        if self.backend == "thread":
+            return None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(raster_cache.settings(), alignment_cache.settings())
+            )
+            logger.info(f"✅ Image worker pool started: {self.max_workers} processes")
+        return self._executor
+
+    async def start(self):
+        """
+        Spawn every worker process now (첫 요청이 프로세스 시작 + cv2/fitz import 비용을 내지 않도록).
+        """
+        executor = self.executor()
+        if executor is None:
+            return
+        # 유휴 worker가 없으면 submit마다 프로세스 하나씩 생성됨
+        pids = await asyncio.gather(*[
+            asyncio.wrap_future(executor.submit(_warm_up)) for _ in range(self.max_workers)
+        ])
+        logger.info(f"✅ Image worker pool warmed up: {len(set(pids))} processes")
+
+    def submit(self, func: Callable, *args: Any) -> asyncio.Future:
+        """
+        Run func(*args) in a worker process (인자/결과는 pickle로 전달).
+
+        Returns:
+            asyncio Future (cancel() 시 아직 시작되지 않은 작업은 실행되지 않음)
+        """
+        future = asyncio.get_running_loop().run_in_executor(self.executor(), func, *args)
+        self.submitted += 1
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """
+        Run func(*args) in a worker, moving bytes arguments and large results through shared memory.
+
+        큰 입력 파일(최대 30MB × 2)과 결과(base64 / 인코딩된 이미지 / 결과 배열)를 pickle로 복사해 pipe로 보내지 않음.
+        결과 dict의 문자열 / bytes / numpy 배열 값은 shared_output_bytes 안에 들어가는 만큼 공유 메모리로 받음.
+        """
+        if self.backend == "thread":
+            return await self.submit(func, *args)
+
+        input_size = sum(len(arg) for arg in args if isinstance(arg, bytes))
+        block = shared_memory.SharedMemory(create=True, size=max(1, input_size + self.shared_output_bytes))
+        try:
+            shared_args = []
+            offset = 0
+            for arg in args:
+                if isinstance(arg, bytes):
+                    block.buf[offset:offset + len(arg)] = arg
+                    arg = _SharedSlice(offset, len(arg))
+                    offset += arg.size
+                shared_args.append(arg)
+            self.shared_in_bytes += input_size
+
+            future = self.executor().submit(
+                _call_shared, block.name, _SharedSlice(input_size, self.shared_output_bytes),
+                func, tuple(shared_args)
+            )
+            self.submitted += 1
+            future.add_done_callback(self._on_done)
+            result = await asyncio.wrap_future(future)
+
+            if isinstance(result, dict):
+                pickled = False
+                for key, value in result.items():
+                    if isinstance(value, _SharedText):
+                        result[key] = str(block.buf[value.offset:value.offset + value.size], "ascii")
+                    elif isinstance(value, _SharedSlice):
+                        result[key] = bytes(block.buf[value.offset:value.offset + value.size])
+                    elif isinstance(value, _SharedArray):
+                        # 블록은 곧 해제되므로 복사
+                        result[key] = np.ndarray(value.shape, value.dtype, buffer=block.buf, offset=value.offset).copy()
+                    else:
+                        pickled = pickled or isinstance(value, (str, bytes, np.ndarray))
+                        continue
+                    self.shared_out_bytes += value.size
+                if pickled:
+                    self.pickled_results += 1
+            return result
+        finally:
+            # 취소된 경우 실행 중인 worker는 자기 매핑으로 계속 쓰고, 블록은 양쪽이 닫으면 해제됨
+            block.close()
+            block.unlink()
+
+    def _on_done(self, future: Future):
+        if future.cancelled() or future.exception() is not None:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+    def shutdown(self):
+        """Stop worker processes (실행 중인 작업은 끝날 때까지 대기)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("✅ Image worker pool stopped")
+
+    def get_stats(self) -> dict:
+        return {
+            'backend': self.backend,
+            'workers': self.max_workers,
+            'started': self._executor is not None,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'in_flight': self.submitted - self.completed - self.failed,
+            'shared_in_bytes': self.shared_in_bytes,
+            'shared_out_bytes': self.shared_out_bytes,
+            'pickled_results': self.pickled_results
+        }
+
+
+# Global image worker pool instance
+image_worker_pool = ImageWorkerPool()
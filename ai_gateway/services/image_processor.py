@@ -8,14 +8,99 @@ import numpy as np
 import fitz  # PyMuPDF
 from PIL import Image
 import base64
+import hashlib
 import io
-from typing import Tuple, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import zlib
 import logging
 
+from .alignment_cache import alignment_cache
+from .raster_cache import RasterKey, raster_cache
+
 logger = logging.getLogger(__name__)
 
+# PDF 렌더링 해상도 / 비교 전 다운샘플링 최대 크기 (raster cache 키에 포함)
+RENDER_DPI = 150
+MAX_DIMENSION = 4000
+
+# 배치 비교 시 한 번에 비교할 수 있는 최대 페이지 쌍 수
+MAX_PAGE_PAIRS = 200
+
+# 응답 형식: json = base64 data URI, url = result_store에 저장 후 URL (이미지는 바이너리로 별도 요청)
+RESPONSE_FORMATS = ("json", "url")
+
+# 결과 이미지 인코딩 형식: 확장자, 품질 옵션, MIME 타입, 기본 품질
+# (PNG의 품질은 압축 레벨 0-9, None이면 OpenCV 기본값)
+IMAGE_FORMATS = {
+    "JPEG": (".jpg", cv2.IMWRITE_JPEG_QUALITY, "image/jpeg", 85),
+    "WEBP": (".webp", cv2.IMWRITE_WEBP_QUALITY, "image/webp", 80),
+    "PNG": (".png", cv2.IMWRITE_PNG_COMPRESSION, "image/png", None),
+}
+# 결과 이미지 이름 (result / file1 / file2 = 화면 표시용 미리보기, download = 원본 크기)
+OUTPUT_NAMES = ("result", "file1", "file2", "download")
+PREVIEW_NAMES = ("result", "file1", "file2")
+# 화면 표시용 미리보기 최대 크기 (0이면 원본 크기)
+PREVIEW_MAX_DIMENSION = 2000
+# 결과 이미지 동시 인코딩 스레드 수 (cv2.imencode / cv2.resize는 GIL을 놓음)
+ENCODE_THREADS = 4
+
+# 정렬 방식: orb = 원본 해상도 ORB 매칭, pyramid = 축소본에서 추정 후 원본 해상도에서 국소 보정
+ALIGNMENT_METHODS = ("orb", "pyramid")
+PYRAMID_DIMENSION = 1000      # 축소본 최대 크기 (픽셀)
+PYRAMID_FEATURES = 1500       # 축소본 ORB 특징점 수
+PYRAMID_PATCH_RADIUS = 16     # 보정용 template 반경 (33x33)
+PYRAMID_SEARCH_RADIUS = 12    # 보정 탐색 범위 (±픽셀, 원본 해상도)
+PYRAMID_MAX_POINTS = 300      # 보정에 사용할 최대 지점 수
+PYRAMID_MIN_SCORE = 0.6       # template 매칭 최소 상관계수
+PYRAMID_MIN_QUALITY = 0.3     # 이보다 낮으면 orb 방식으로 fallback
+
+
+class OutputFormat(NamedTuple):
+    """결과 이미지 하나의 인코딩 형식"""
+    format: str = "JPEG"
+    quality: Optional[int] = 85  # JPEG / WEBP 품질 1-100, PNG 압축 레벨 0-9 (None = 형식별 기본값)
+
+
+DEFAULT_OUTPUT_FORMATS = {
+    "result": OutputFormat("JPEG", 85),
+    "file1": OutputFormat("JPEG", 85),
+    "file2": OutputFormat("JPEG", 85),
+    "download": OutputFormat("PNG", None),
+}
 
-def pdf_to_image(pdf_bytes: bytes, page_num: int = 0, dpi: int = 150) -> Tuple[np.ndarray, int]:
+# 비교 결과 색상표 (BGR) - 인덱스 = B·G·R 각 채널 최상위 비트 (B << 2 | G << 1 | R)
+# 결과 이미지는 흰색 / 검정 / 파랑 / 빨강 / 주황 / 초록만 사용하므로 픽셀당 3비트로 손실 없이 표현됨
+RESULT_PALETTE = (
+    (0, 0, 0),        # 0 검정 (공통 부분)
+    (0, 0, 255),      # 1 빨강 (B에만 있는 부분)
+    (0, 255, 0),      # 2 초록 (오버레이 B)
+    (0, 165, 255),    # 3 주황 (오버레이 A)
+    (255, 0, 0),      # 4 파랑 (A에만 있는 부분)
+    (255, 0, 255),    # 5 (사용하지 않음)
+    (255, 255, 0),    # 6 (사용하지 않음)
+    (255, 255, 255),  # 7 흰색 (배경)
+)
+_PALETTE_LUT = np.zeros((1, 256, 3), dtype=np.uint8)
+_PALETTE_LUT[0, :len(RESULT_PALETTE)] = RESULT_PALETTE
+
+
+class PackedImage(NamedTuple):
+    """RESULT_PALETTE 인덱스로 압축한 비교 결과 (원본 BGR 배열의 수십 분의 일 크기)"""
+    shape: Tuple[int, ...]
+    data: bytes  # zlib 압축된 uint8 색상 인덱스 (행 우선)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data)
+
+
+_encode_executor = ThreadPoolExecutor(max_workers=ENCODE_THREADS, thread_name_prefix="image-encode")
+
+
+def pdf_to_image(pdf_bytes: bytes, page_num: int = 0, dpi: int = RENDER_DPI) -> Tuple[np.ndarray, int]:
     """
     PDF를 이미지로 변환
     
@@ -33,14 +118,7 @@ def pdf_to_image(pdf_bytes: bytes, page_num: int = 0, dpi: int = 150) -> Tuple[n
         if page_num >= pdf_document.page_count:
             page_num = 0
         
-        page = pdf_document[page_num]
-        zoom = dpi / 72
-        mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat)
-        
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        img_array = np.array(img)
-        img_bgr = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+        img_bgr = render_pdf_page(pdf_document, page_num, dpi)
         
         total_pages = pdf_document.page_count
         pdf_document.close()
@@ -51,6 +129,30 @@ def pdf_to_image(pdf_bytes: bytes, page_num: int = 0, dpi: int = 150) -> Tuple[n
         raise ValueError(f"PDF 변환 실패: {str(e)}")
 
 
+def render_pdf_page(pdf_document, page_num: int, dpi: int = RENDER_DPI) -> np.ndarray:
+    """
+    열려 있는 PDF 문서의 한 페이지를 BGR 이미지로 렌더링
+    """
+    page = pdf_document[page_num]
+    zoom = dpi / 72
+    mat = fitz.Matrix(zoom, zoom)
+    pix = page.get_pixmap(matrix=mat)
+    
+    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    img_array = np.array(img)
+    return cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+
+
+def read_tiff_page(tiff_image: Image.Image, page_num: int) -> np.ndarray:
+    """
+    열려 있는 TIFF의 한 페이지를 BGR 이미지로 변환
+    """
+    tiff_image.seek(page_num)
+    frame = tiff_image if tiff_image.mode == 'RGB' else tiff_image.convert('RGB')
+    # PIL은 RGB, OpenCV는 BGR 사용하므로 변환
+    return cv2.cvtColor(np.array(frame), cv2.COLOR_RGB2BGR)
+
+
 def tiff_to_image(tiff_bytes: bytes, page_num: int = 0) -> Tuple[np.ndarray, int]:
     """
     Multi-page TIFF를 이미지로 변환
@@ -72,16 +174,8 @@ def tiff_to_image(tiff_bytes: bytes, page_num: int = 0) -> Tuple[np.ndarray, int
         # 요청한 페이지로 이동
         if page_num >= total_pages:
             page_num = 0
-            
-        tiff_image.seek(page_num)
-        
-        # RGB로 변환 후 numpy 배열로
-        if tiff_image.mode != 'RGB':
-            tiff_image = tiff_image.convert('RGB')
         
-        img_array = np.array(tiff_image)
-        # PIL은 RGB, OpenCV는 BGR 사용하므로 변환
-        img_bgr = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+        img_bgr = read_tiff_page(tiff_image, page_num)
         
         return img_bgr, total_pages
         
@@ -90,6 +184,16 @@ def tiff_to_image(tiff_bytes: bytes, page_num: int = 0) -> Tuple[np.ndarray, int
         raise ValueError(f"TIFF 변환 실패: {str(e)}")
 
 
+def file_kind(content_type: str) -> str:
+    """MIME 타입 → pdf / tiff / image"""
+    content_type = content_type.lower()
+    if "pdf" in content_type:
+        return "pdf"
+    if "tiff" in content_type or "tif" in content_type:
+        return "tiff"
+    return "image"
+
+
 def load_file(file_bytes: bytes, content_type: str, page_num: int = 0) -> Tuple[np.ndarray, int, str]:
     """
     파일 로드 (이미지 또는 PDF)
@@ -103,10 +207,11 @@ def load_file(file_bytes: bytes, content_type: str, page_num: int = 0) -> Tuple[
         (이미지 BGR 배열, 총 페이지 수, 파일 타입)
     """
     try:
-        if "pdf" in content_type.lower():
+        kind = file_kind(content_type)
+        if kind == "pdf":
             img_bgr, total_pages = pdf_to_image(file_bytes, page_num=page_num)
             return img_bgr, total_pages, "pdf"
-        elif "tiff" in content_type.lower() or "tif" in content_type.lower():
+        elif kind == "tiff":
             img_bgr, total_pages = tiff_to_image(file_bytes, page_num=page_num)
             return img_bgr, total_pages, "tiff"
         else:
@@ -122,6 +227,188 @@ def load_file(file_bytes: bytes, content_type: str, page_num: int = 0) -> Tuple[
         raise ValueError(f"파일 로드 실패: {str(e)}")
 
 
+def raster_key(
+    file_bytes: bytes,
+    content_type: str,
+    page_num: int = 0,
+    max_dimension: int = MAX_DIMENSION
+) -> RasterKey:
+    """raster cache / alignment cache 키 (파일 내용 sha256 기준)"""
+    kind = file_kind(content_type)
+    return raster_cache.key(
+        hashlib.sha256(file_bytes).hexdigest(), page_num,
+        0 if kind == "image" else RENDER_DPI, max_dimension
+    )
+
+
+def load_cached(
+    file_bytes: bytes,
+    content_type: str,
+    page_num: int = 0,
+    max_dimension: int = MAX_DIMENSION,
+    key: Optional[RasterKey] = None
+) -> Tuple[np.ndarray, int, str]:
+    """
+    load_file() + downsample_if_needed(), raster cache 사용
+    (파일 내용이 같으면 파일명/업로드가 달라도 디코딩 없이 반환)
+    
+    Args:
+        key: raster_key() 결과 (이미 계산했으면 전달, 없으면 여기서 계산)
+    
+    Returns:
+        (다운샘플링된 읽기 전용 BGR 배열, 총 페이지 수, 파일 타입)
+    """
+    kind = file_kind(content_type)
+    if key is None:
+        key = raster_key(file_bytes, content_type, page_num, max_dimension)
+    cached = raster_cache.get(key)
+    if cached is not None:
+        img, total_pages = cached
+        return img, total_pages, kind
+
+    img, total_pages, kind = load_file(file_bytes, content_type, page_num)
+    img = downsample_if_needed(img, max_dimension=max_dimension)
+    return raster_cache.put(key, img, total_pages), total_pages, kind
+
+
+def get_page_count(file_bytes: bytes, content_type: str) -> int:
+    """
+    파일의 페이지 수 (렌더링 없이 확인, 일반 이미지는 1)
+    """
+    kind = file_kind(content_type)
+    try:
+        if kind == "pdf":
+            with fitz.open(stream=file_bytes, filetype="pdf") as pdf_document:
+                return pdf_document.page_count
+        if kind == "tiff":
+            with Image.open(io.BytesIO(file_bytes)) as tiff_image:
+                return getattr(tiff_image, 'n_frames', 1)
+        return 1
+    except Exception as e:
+        raise ValueError(f"파일 로드 실패: {str(e)}")
+
+
+# 스레드별로 열어둔 문서 (배치 비교 시 같은 파일의 여러 페이지를 렌더링할 때 재사용)
+# fitz.Document / PIL Image는 스레드 안전하지 않으므로 (TIFF는 seek 후 디코딩) 스레드끼리 공유하지 않음
+# - process backend는 worker 프로세스당 스레드 1개, thread backend는 기본 스레드 풀의 스레드마다 따로 엶
+# 파일 핸들을 잡고 있지 않도록 메모리로 읽어서 엶 (요청이 끝나면 임시 파일을 바로 삭제할 수 있음)
+_thread_documents = threading.local()
+_MAX_OPEN_DOCUMENTS = 4
+
+
+def _open_document(path: str, kind: str):
+    """Returns (현재 스레드에서 연 문서, 파일 내용 sha256)."""
+    documents = getattr(_thread_documents, "documents", None)
+    if documents is None:
+        documents = _thread_documents.documents = OrderedDict()
+    entry = documents.get(path)
+    if entry is not None:
+        documents.move_to_end(path)
+        return entry
+
+    with open(path, "rb") as f:
+        data = f.read()
+    if kind == "pdf":
+        document = fitz.open(stream=data, filetype="pdf")
+    else:
+        document = Image.open(io.BytesIO(data))
+    entry = (document, hashlib.sha256(data).hexdigest())
+    documents[path] = entry
+    while len(documents) > _MAX_OPEN_DOCUMENTS:
+        _, (oldest, _) = documents.popitem(last=False)
+        oldest.close()
+    return entry
+
+
+def load_page(
+    path: str,
+    content_type: str,
+    page_num: int,
+    max_dimension: int = MAX_DIMENSION
+) -> Tuple[np.ndarray, RasterKey]:
+    """
+    디스크에 저장된 파일의 한 페이지를 다운샘플링된 BGR 이미지로 로드
+    (문서는 스레드별로 재사용, 페이지는 raster cache 사용)
+    
+    Args:
+        path: 파일 경로
+        content_type: MIME 타입
+        page_num: 페이지 번호 (0-based, 범위를 벗어나면 ValueError)
+        max_dimension: 다운샘플링 최대 크기
+    
+    Returns:
+        (읽기 전용 BGR 배열, raster key)
+    """
+    kind = file_kind(content_type)
+    try:
+        if kind == "image":
+            data = np.fromfile(path, np.uint8)
+            key = raster_cache.key(hashlib.sha256(data).hexdigest(), page_num, 0, max_dimension)
+            cached = raster_cache.get(key)
+            if cached is not None:
+                return cached[0], key
+            total_pages = 1
+            img = cv2.imdecode(data, cv2.IMREAD_COLOR)
+            if img is None:
+                raise ValueError("이미지 디코딩 실패")
+        else:
+            document, digest = _open_document(path, kind)
+            total_pages = document.page_count if kind == "pdf" else getattr(document, 'n_frames', 1)
+            if not 0 <= page_num < total_pages:
+                raise ValueError(f"페이지 번호 범위 초과: {page_num} (전체 {total_pages}페이지)")
+            key = raster_cache.key(digest, page_num, RENDER_DPI, max_dimension)
+            cached = raster_cache.get(key)
+            if cached is not None:
+                return cached[0], key
+            if kind == "pdf":
+                img = render_pdf_page(document, page_num)
+            else:
+                img = read_tiff_page(document, page_num)
+
+        img = downsample_if_needed(img, max_dimension=max_dimension)
+        return raster_cache.put(key, img, total_pages), key
+    except Exception as e:
+        logger.error(f"페이지 로드 실패: {str(e)}")
+        raise ValueError(f"페이지 로드 실패: {str(e)}")
+
+
+def page_pairs(spec: str, pages1: int, pages2: int) -> List[Tuple[int, int]]:
+    """
+    배치 비교할 페이지 쌍 해석
+    
+    Args:
+        spec: "all" (같은 번호끼리, 짧은 문서 기준) 또는 "0:0,1:2,3" (0-based, "3"은 3:3)
+        pages1: file1 페이지 수
+        pages2: file2 페이지 수
+    
+    Returns:
+        [(page1, page2), ...]
+    """
+    spec = (spec or "all").strip().lower()
+    if spec == "all":
+        pairs = [(i, i) for i in range(min(pages1, pages2))]
+    else:
+        pairs = []
+        for item in spec.split(","):
+            item = item.strip()
+            if not item:
+                continue
+            left, _, right = item.partition(":")
+            try:
+                pair = (int(left), int(right or left))
+            except ValueError:
+                raise ValueError(f"잘못된 페이지 지정: '{item}' (예: 0:0,1:2)")
+            if not (0 <= pair[0] < pages1 and 0 <= pair[1] < pages2):
+                raise ValueError(f"페이지 번호 범위 초과: {item} (file1 {pages1}페이지, file2 {pages2}페이지)")
+            pairs.append(pair)
+
+    if not pairs:
+        raise ValueError("비교할 페이지가 없습니다")
+    if len(pairs) > MAX_PAGE_PAIRS:
+        raise ValueError(f"한 번에 비교할 수 있는 페이지는 최대 {MAX_PAGE_PAIRS}쌍입니다")
+    return pairs
+
+
 def downsample_if_needed(img: np.ndarray, max_dimension: int = 4000) -> np.ndarray:
     """
     이미지가 너무 크면 다운샘플링
@@ -146,35 +433,58 @@ def downsample_if_needed(img: np.ndarray, max_dimension: int = 4000) -> np.ndarr
     return img
 
 
-def align_images(A_bgr: np.ndarray, B_bgr: np.ndarray, nfeatures: int = 4000) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray], float]:
+def detect_features(img_bgr: np.ndarray, nfeatures: int = 4000) -> Tuple[np.ndarray, Optional[np.ndarray]]:
     """
-    ORB 특징점 매칭을 이용한 이미지 정렬
-    
-    Args:
-        A_bgr: 기준 이미지
-        B_bgr: 정렬할 이미지
-        nfeatures: ORB 특징점 개수
+    ORB 특징점 검출
     
     Returns:
-        (기준 이미지, 정렬된 이미지, 호모그래피 행렬, 매칭 품질)
+        (특징점 좌표 float32 (N, 2), descriptor 또는 None)
     """
-    A_gray = cv2.cvtColor(A_bgr, cv2.COLOR_BGR2GRAY)
-    B_gray = cv2.cvtColor(B_bgr, cv2.COLOR_BGR2GRAY)
-
+    gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
     orb = cv2.ORB_create(nfeatures=nfeatures)
-    kp1, des1 = orb.detectAndCompute(A_gray, None)
-    kp2, des2 = orb.detectAndCompute(B_gray, None)
+    keypoints, descriptors = orb.detectAndCompute(gray, None)
+    points = np.float32([kp.pt for kp in keypoints]).reshape(-1, 2)
+    return points, descriptors
+
+
+def cached_features(
+    img_bgr: np.ndarray,
+    nfeatures: int,
+    key: Optional[RasterKey] = None
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """detect_features(), key가 있으면 alignment cache 사용"""
+    if key is None:
+        return detect_features(img_bgr, nfeatures)
+    cache_key = (key, nfeatures)
+    features = alignment_cache.get_features(cache_key)
+    if features is None:
+        features = detect_features(img_bgr, nfeatures)
+        alignment_cache.put_features(cache_key, *features)
+    return features
 
-    if des1 is None or des2 is None or len(kp1) < 4 or len(kp2) < 4:
+
+def estimate_homography(
+    pts1: np.ndarray,
+    des1: Optional[np.ndarray],
+    pts2: np.ndarray,
+    des2: Optional[np.ndarray]
+) -> Tuple[Optional[np.ndarray], float]:
+    """
+    특징점 매칭(BF knnMatch + ratio test) + RANSAC으로 B → A 호모그래피 계산
+    
+    Returns:
+        (호모그래피 행렬 또는 None, 매칭 품질)
+    """
+    if des1 is None or des2 is None or len(pts1) < 4 or len(pts2) < 4:
         logger.warning("특징점 부족, 정렬 실패")
-        return A_bgr, None, None, 0
+        return None, 0
 
     bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=False)
     try:
         matches = bf.knnMatch(des1, des2, k=2)
     except Exception:
         logger.warning("특징점 매칭 실패")
-        return A_bgr, None, None, 0
+        return None, 0
 
     good_matches = []
     for match_pair in matches:
@@ -186,19 +496,187 @@ def align_images(A_bgr: np.ndarray, B_bgr: np.ndarray, nfeatures: int = 4000) ->
     min_matches = 10
     if len(good_matches) < min_matches:
         logger.warning(f"충분한 매칭 부족: {len(good_matches)}/{min_matches}")
-        return A_bgr, None, None, len(good_matches) / min_matches
+        return None, len(good_matches) / min_matches
 
-    src_pts = np.float32([kp1[m.queryIdx].pt for m in good_matches]).reshape(-1, 1, 2)
-    dst_pts = np.float32([kp2[m.trainIdx].pt for m in good_matches]).reshape(-1, 1, 2)
+    src_pts = pts1[[m.queryIdx for m in good_matches]].reshape(-1, 1, 2)
+    dst_pts = pts2[[m.trainIdx for m in good_matches]].reshape(-1, 1, 2)
 
     H, mask = cv2.findHomography(dst_pts, src_pts, cv2.RANSAC, 5.0)
     
     if H is None:
         logger.warning("호모그래피 계산 실패")
-        return A_bgr, None, None, 0
+        return None, 0
 
     inliers = np.sum(mask)
     match_quality = inliers / len(good_matches) if len(good_matches) > 0 else 0
+    return H, match_quality
+
+
+def _pyramid_level(img: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    PYRAMID_DIMENSION 이하로 정수배 축소 (INTER_AREA 정수배는 단순 평균이라 빠름)
+    
+    Returns:
+        (축소 이미지, 원본 좌표 → 축소본 좌표 행렬, 픽셀 중심 기준)
+    """
+    factor = -(-max(img.shape[:2]) // PYRAMID_DIMENSION)
+    if factor <= 1:
+        return img, np.eye(3)
+    small = cv2.resize(img, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA)
+    scale = 1 / factor
+    return small, np.array([[scale, 0, 0.5 * scale - 0.5], [0, scale, 0.5 * scale - 0.5], [0, 0, 1]])
+
+
+def _subpixel_peak(scores: np.ndarray, x: int, y: int) -> Tuple[float, float]:
+    """matchTemplate 결과 최대값 주변 포물선 보간 → (dx, dy)"""
+    dx = dy = 0.0
+    if 0 < x < scores.shape[1] - 1:
+        left, center, right = scores[y, x - 1], scores[y, x], scores[y, x + 1]
+        denominator = left - 2 * center + right
+        if denominator < 0:
+            dx = 0.5 * (left - right) / denominator
+    if 0 < y < scores.shape[0] - 1:
+        up, center, down = scores[y - 1, x], scores[y, x], scores[y + 1, x]
+        denominator = up - 2 * center + down
+        if denominator < 0:
+            dy = 0.5 * (up - down) / denominator
+    return dx, dy
+
+
+def estimate_pyramid_alignment(
+    A_bgr: np.ndarray,
+    B_bgr: np.ndarray,
+    cache_keys: Optional[Tuple[RasterKey, RasterKey]] = None
+) -> Tuple[Optional[np.ndarray], float]:
+    """
+    Coarse-to-fine B → A 호모그래피
+    
+    1. 두 이미지를 PYRAMID_DIMENSION 이하로 축소해 ORB 매칭 (대략적인 H0)
+    2. B를 H0로 warp한 뒤, A의 특징점 주변 patch를 원본 해상도에서
+       ±PYRAMID_SEARCH_RADIUS 안에서 template 매칭 (서브픽셀 보정)
+    3. 보정된 대응점으로 잔여 호모그래피 R을 RANSAC 추정, H = R @ H0
+    
+    Returns:
+        (호모그래피 행렬 또는 None, 매칭 품질 = 보정 inlier / 시도한 지점 수)
+    """
+    hA, wA = A_bgr.shape[:2]
+    small_A, scale_A = _pyramid_level(A_bgr)
+    small_B, scale_B = _pyramid_level(B_bgr)
+    key1, key2 = cache_keys or (None, None)
+    pts1, des1 = cached_features(small_A, PYRAMID_FEATURES, key1 and (key1, "pyramid", PYRAMID_DIMENSION))
+    pts2, des2 = cached_features(small_B, PYRAMID_FEATURES, key2 and (key2, "pyramid", PYRAMID_DIMENSION))
+    coarse_H, coarse_quality = estimate_homography(pts1, des1, pts2, des2)
+    if coarse_H is None:
+        return None, coarse_quality
+
+    H0 = np.linalg.inv(scale_A) @ coarse_H @ scale_B
+    H0_inv = np.linalg.inv(H0)
+
+    # 축소본 특징점을 원본 좌표로 (고르게 골라서 최대 PYRAMID_MAX_POINTS개)
+    points = cv2.perspectiveTransform(pts1.reshape(-1, 1, 2).astype(np.float64), np.linalg.inv(scale_A)).reshape(-1, 2)
+    points = points[np.linspace(0, len(points) - 1, min(PYRAMID_MAX_POINTS, len(points))).astype(int)]
+
+    # 각 지점 주변만 H0로 warp해서 (전체 페이지 warp 없이) A patch를 template 매칭
+    r, s = PYRAMID_PATCH_RADIUS, PYRAMID_SEARCH_RADIUS
+    size = 2 * (r + s) + 1
+    src_pts, dst_pts = [], []
+    for x, y in np.rint(points).astype(int):
+        if x - r - s < 0 or y - r - s < 0 or x + r + s >= wA or y + r + s >= hA:
+            continue
+        template = cv2.cvtColor(A_bgr[y - r:y + r + 1, x - r:x + r + 1], cv2.COLOR_BGR2GRAY)
+        if template.std() < 10:  # 평탄한 영역은 위치가 정해지지 않음
+            continue
+        offset = np.array([[1, 0, x - r - s], [0, 1, y - r - s], [0, 0, 1]])
+        window = cv2.warpPerspective(B_bgr, H0_inv @ offset, (size, size),
+                                     flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+                                     borderMode=cv2.BORDER_CONSTANT,
+                                     borderValue=(255, 255, 255))
+        window = cv2.cvtColor(window, cv2.COLOR_BGR2GRAY)
+        scores = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (px, py) = cv2.minMaxLoc(scores)
+        if score < PYRAMID_MIN_SCORE:
+            continue
+        dx, dy = _subpixel_peak(scores, px, py)
+        dst_pts.append((x, y))
+        src_pts.append((x + px + dx - s, y + py + dy - s))
+
+    if len(src_pts) < 10:
+        logger.warning(f"피라미드 보정 지점 부족: {len(src_pts)}/{len(points)}")
+        return None, 0
+
+    R, mask = cv2.findHomography(np.float32(src_pts).reshape(-1, 1, 2),
+                                 np.float32(dst_pts).reshape(-1, 1, 2),
+                                 cv2.RANSAC, 3.0)
+    if R is None:
+        logger.warning("피라미드 보정 호모그래피 계산 실패")
+        return None, 0
+
+    match_quality = float(np.sum(mask)) / len(points)
+    logger.info(f"피라미드 정렬: 축소본 품질 {coarse_quality:.2f}, 보정 {len(src_pts)}/{len(points)}지점")
+    return R @ H0, match_quality
+
+
+def estimate_alignment(
+    A_bgr: np.ndarray,
+    B_bgr: np.ndarray,
+    nfeatures: int = 4000,
+    cache_keys: Optional[Tuple[RasterKey, RasterKey]] = None,
+    method: str = "orb"
+) -> Tuple[Optional[np.ndarray], float]:
+    """
+    B → A 호모그래피와 매칭 품질 (warp 없이, cache_keys가 있으면 alignment cache 사용)
+    
+    method="pyramid"는 품질이 PYRAMID_MIN_QUALITY 미만이면 orb 방식으로 다시 계산
+    """
+    if method not in ALIGNMENT_METHODS:
+        raise ValueError(f"지원하지 않는 정렬 방식: {method} ({', '.join(ALIGNMENT_METHODS)})")
+
+    key1, key2 = cache_keys or (None, None)
+    pair_key = (key1, key2, nfeatures, method) if cache_keys else None
+    cached = alignment_cache.get_homography(pair_key) if pair_key else None
+    if cached is not None:
+        return cached
+
+    H, match_quality = None, 0
+    if method == "pyramid":
+        H, match_quality = estimate_pyramid_alignment(A_bgr, B_bgr, cache_keys)
+        if H is None or match_quality < PYRAMID_MIN_QUALITY:
+            logger.info(f"피라미드 정렬 신뢰도 낮음 ({match_quality:.2f}), ORB 정렬로 대체")
+            H = None
+
+    if H is None:
+        pts1, des1 = cached_features(A_bgr, nfeatures, key1)
+        pts2, des2 = cached_features(B_bgr, nfeatures, key2)
+        H, match_quality = estimate_homography(pts1, des1, pts2, des2)
+    if pair_key:
+        alignment_cache.put_homography(pair_key, H, match_quality)
+    return H, match_quality
+
+
+def align_images(
+    A_bgr: np.ndarray,
+    B_bgr: np.ndarray,
+    nfeatures: int = 4000,
+    cache_keys: Optional[Tuple[RasterKey, RasterKey]] = None,
+    method: str = "orb"
+) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray], float]:
+    """
+    ORB 특징점 매칭을 이용한 이미지 정렬
+    
+    Args:
+        A_bgr: 기준 이미지
+        B_bgr: 정렬할 이미지
+        nfeatures: ORB 특징점 개수
+        cache_keys: (A, B)의 raster key. 있으면 특징점 / 호모그래피를 alignment cache에서 재사용
+            (mode나 임계값만 바뀐 재비교는 warp만 다시 수행)
+        method: 정렬 방식 ("orb" 또는 "pyramid", ALIGNMENT_METHODS)
+    
+    Returns:
+        (기준 이미지, 정렬된 이미지, 호모그래피 행렬, 매칭 품질)
+    """
+    H, match_quality = estimate_alignment(A_bgr, B_bgr, nfeatures, cache_keys, method)
+    if H is None:
+        return A_bgr, None, None, match_quality
 
     hA, wA = A_bgr.shape[:2]
     warped_B = cv2.warpPerspective(B_bgr, H, (wA, hA),
@@ -238,14 +716,22 @@ def fallback_align(A_bgr: np.ndarray, B_bgr: np.ndarray) -> np.ndarray:
     return canvas
 
 
-def compare_images(A_bgr: np.ndarray, B_aligned_bgr: np.ndarray, diff_thresh: int = 30, bin_thresh: int = 200) -> np.ndarray:
+class DiffMasks(NamedTuple):
     """
-    두 이미지 비교 (차이점 강조)
+    차이 비교 마스크 (uint8, 0 / 255, 서로 겹치지 않음)
     
-    - A에만 있는 부분 -> 파랑
-    - B에만 있는 부분 -> 빨강
-    - 공통 부분 -> 검정
-    - 배경 -> 흰색
+    - only_A: A에만 있거나 A 쪽이 더 진한 부분
+    - only_B: B에만 있거나 B 쪽이 더 진한 부분
+    - both: 양쪽에 같게 있는 부분
+    """
+    only_A: np.ndarray
+    only_B: np.ndarray
+    both: np.ndarray
+
+
+def compute_diff_masks(A_bgr: np.ndarray, B_aligned_bgr: np.ndarray, diff_thresh: int = 30, bin_thresh: int = 200) -> DiffMasks:
+    """
+    그레이스케일 / 이진화 / 차이 마스크를 한 번만 계산 (cv2 비트 연산, 버퍼 재사용)
     
     Args:
         A_bgr: 첫 번째 이미지
@@ -254,37 +740,94 @@ def compare_images(A_bgr: np.ndarray, B_aligned_bgr: np.ndarray, diff_thresh: in
         bin_thresh: 이진화 임계값 (기본 200)
     
     Returns:
-        비교 결과 이미지
+        DiffMasks
     """
-    h, w = A_bgr.shape[:2]
-    
     A_gray = cv2.cvtColor(A_bgr, cv2.COLOR_BGR2GRAY)
     B_gray = cv2.cvtColor(B_aligned_bgr, cv2.COLOR_BGR2GRAY)
     
-    _, A_bin = cv2.threshold(A_gray, bin_thresh, 255, cv2.THRESH_BINARY_INV)
-    _, B_bin = cv2.threshold(B_gray, bin_thresh, 255, cv2.THRESH_BINARY_INV)
+    _, only_A = cv2.threshold(A_gray, bin_thresh, 255, cv2.THRESH_BINARY_INV)
+    _, only_B = cv2.threshold(B_gray, bin_thresh, 255, cv2.THRESH_BINARY_INV)
+    both = cv2.bitwise_and(only_A, only_B)
+    # A_bin & ~B_bin == A_bin ^ both (both ⊂ A_bin)
+    cv2.bitwise_xor(only_A, both, dst=only_A)
+    cv2.bitwise_xor(only_B, both, dst=only_B)
     
-    diff = cv2.absdiff(A_gray, B_gray)
-    _, diff_mask = cv2.threshold(diff, diff_thresh, 255, cv2.THRESH_BINARY)
+    # 엣지 노이즈 보정: 양쪽에 있지만 밝기 차이가 큰 부분은 더 진한 쪽으로 분류
+    diff_common = cv2.absdiff(A_gray, B_gray)
+    cv2.threshold(diff_common, diff_thresh, 255, cv2.THRESH_BINARY, dst=diff_common)
+    cv2.bitwise_and(diff_common, both, dst=diff_common)
+    # 차이가 있으면 A < B 또는 B < A 중 하나 → A < B가 아니면 B 쪽
+    darker = cv2.compare(A_gray, B_gray, cv2.CMP_LT)
+    cv2.bitwise_and(darker, diff_common, dst=darker)
+    cv2.bitwise_or(only_A, darker, dst=only_A)
+    cv2.bitwise_xor(darker, diff_common, dst=darker)
+    cv2.bitwise_or(only_B, darker, dst=only_B)
+    # both & ~diff_common (diff_common ⊂ both)
+    cv2.subtract(both, diff_common, dst=both)
     
-    only_A = np.logical_and(A_bin > 0, B_bin == 0).astype(np.uint8) * 255
-    only_B = np.logical_and(B_bin > 0, A_bin == 0).astype(np.uint8) * 255
-    both = np.logical_and(A_bin > 0, B_bin > 0).astype(np.uint8) * 255
+    return DiffMasks(only_A, only_B, both)
+
+
+def paint(img: np.ndarray, mask: np.ndarray, color: Tuple[int, int, int]) -> np.ndarray:
+    """mask 위치를 color(BGR)로 칠함 (제자리 수정, 불리언 인덱싱 없이 cv2 마스크 연산)"""
+    # (x | c) & c == c : color 비트를 켠 뒤 나머지 비트를 끔
+    scalar = tuple(color) + (0,)
+    cv2.bitwise_or(img, scalar, dst=img, mask=mask)
+    cv2.bitwise_and(img, scalar, dst=img, mask=mask)
+    return img
+
+
+def render_difference(masks: DiffMasks) -> np.ndarray:
+    """
+    차이 결과 이미지: A에만 → 파랑, B에만 → 빨강, 공통 → 검정, 배경 → 흰색
+    채널별로 직접 계산 (세 마스크는 서로 겹치지 않음)
+    """
+    # B 채널: 공통/빨강이면 0, G 채널: 어느 마스크든 0, R 채널: 공통/파랑이면 0
+    blue = cv2.bitwise_or(masks.both, masks.only_B)
+    red = cv2.bitwise_or(masks.both, masks.only_A)
+    cv2.bitwise_not(blue, dst=blue)
+    cv2.bitwise_not(red, dst=red)
+    green = cv2.bitwise_and(blue, red)
+    return cv2.merge((blue, green, red))
+
+
+def highlight_differences(A_bgr: np.ndarray, B_aligned_bgr: np.ndarray, masks: DiffMasks) -> Tuple[np.ndarray, np.ndarray]:
+    """원본 복사본에 A만의 부분은 파랑, B만의 부분은 빨강으로 표시"""
+    imgA_out = paint(A_bgr.copy(), masks.only_A, (255, 0, 0))  # Blue
+    imgB_out = paint(B_aligned_bgr.copy(), masks.only_B, (0, 0, 255))  # Red
+    return imgA_out, imgB_out
+
+
+def compare_difference(A_bgr: np.ndarray, B_aligned_bgr: np.ndarray, diff_thresh: int = 30, bin_thresh: int = 200) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Difference 모드 전체: 마스크를 한 번 계산해서 결과 이미지와 하이라이트 이미지 두 장을 생성
     
-    diff_common = np.logical_and(diff_mask > 0, both > 0)
-    darker_in_A = np.logical_and(diff_common, A_gray < B_gray)
-    darker_in_B = np.logical_and(diff_common, B_gray < A_gray)
+    Returns:
+        (비교 결과 이미지, A 하이라이트, B 하이라이트)
+    """
+    masks = compute_diff_masks(A_bgr, B_aligned_bgr, diff_thresh, bin_thresh)
+    return (render_difference(masks),) + highlight_differences(A_bgr, B_aligned_bgr, masks)
+
+
+def compare_images(A_bgr: np.ndarray, B_aligned_bgr: np.ndarray, diff_thresh: int = 30, bin_thresh: int = 200) -> np.ndarray:
+    """
+    두 이미지 비교 (차이점 강조)
     
-    only_A = np.logical_or(only_A > 0, darker_in_A)
-    only_B = np.logical_or(only_B > 0, darker_in_B)
-    both = np.logical_and(both > 0, ~diff_mask.astype(bool))
+    - A에만 있는 부분 -> 파랑
+    - B에만 있는 부분 -> 빨강
+    - 공통 부분 -> 검정
+    - 배경 -> 흰색
     
-    result = np.full((h, w, 3), 255, dtype=np.uint8)
-    result[both] = [0, 0, 0]
-    result[only_A] = [255, 0, 0]
-    result[only_B] = [0, 0, 255]
+    Args:
+        A_bgr: 첫 번째 이미지
+        B_aligned_bgr: 정렬된 두 번째 이미지
+        diff_thresh: 차이 임계값
+        bin_thresh: 이진화 임계값 (기본 200)
     
-    return result
+    Returns:
+        비교 결과 이미지
+    """
+    return render_difference(compute_diff_masks(A_bgr, B_aligned_bgr, diff_thresh, bin_thresh))
 
 
 def compare_images_overlay(A_bgr: np.ndarray, B_aligned_bgr: np.ndarray, bin_thresh: int = 200) -> np.ndarray:
@@ -307,87 +850,285 @@ def compare_images_overlay(A_bgr: np.ndarray, B_aligned_bgr: np.ndarray, bin_thr
     A_gray = cv2.cvtColor(A_bgr, cv2.COLOR_BGR2GRAY)
     B_gray = cv2.cvtColor(B_aligned_bgr, cv2.COLOR_BGR2GRAY)
     
-    _, A_bin = cv2.threshold(A_gray, bin_thresh, 255, cv2.THRESH_BINARY_INV)
-    _, B_bin = cv2.threshold(B_gray, bin_thresh, 255, cv2.THRESH_BINARY_INV)
+    cv2.threshold(A_gray, bin_thresh, 255, cv2.THRESH_BINARY_INV, dst=A_gray)
+    cv2.threshold(B_gray, bin_thresh, 255, cv2.THRESH_BINARY_INV, dst=B_gray)
     
     result = np.full((h, w, 3), 255, dtype=np.uint8)
     
     # A: 주황색 (BGR: 0, 165, 255)
-    result[A_bin > 0] = [0, 165, 255]
+    paint(result, A_gray, (0, 165, 255))
     
     # B: 초록색 (BGR: 0, 255, 0)
-    result[B_bin > 0] = [0, 255, 0]
+    paint(result, B_gray, (0, 255, 0))
     
     return result
 
 
-def encode_image_to_base64(img: np.ndarray, format: str = 'JPEG', quality: int = 85) -> str:
+def encode_image(img: np.ndarray, format: str = 'JPEG', quality: Optional[int] = None) -> Tuple[bytes, str]:
+    """
+    이미지를 JPEG / WebP / PNG 바이트로 인코딩
+    
+    Args:
+        img: 입력 이미지 (BGR)
+        format: 'JPEG', 'WEBP' 또는 'PNG'
+        quality: JPEG / WebP 품질 (1-100), PNG 압축 레벨 (0-9). None이면 형식별 기본값
+    
+    Returns:
+        (인코딩된 바이트, MIME 타입)
+    """
+    extension, quality_flag, mime_type, default_quality = IMAGE_FORMATS[format.upper()]
+    quality = default_quality if quality is None else quality
+    encode_param = [quality_flag, quality] if quality is not None else []
+    _, buffer = cv2.imencode(extension, img, encode_param)
+    return buffer.tobytes(), mime_type
+
+
+def encode_image_to_base64(img: np.ndarray, format: str = 'JPEG', quality: Optional[int] = None) -> str:
     """
     이미지를 base64 문자열로 인코딩
     
     Args:
         img: 입력 이미지 (BGR)
-        format: 'JPEG' 또는 'PNG'
-        quality: JPEG 품질 (1-100)
+        format: 'JPEG', 'WEBP' 또는 'PNG'
+        quality: encode_image()와 동일
     
     Returns:
         base64 인코딩된 data URI
     """
-    if format.upper() == 'JPEG':
-        encode_param = [cv2.IMWRITE_JPEG_QUALITY, quality]
-        _, buffer = cv2.imencode('.jpg', img, encode_param)
-        mime_type = 'image/jpeg'
-    else:  # PNG
-        _, buffer = cv2.imencode('.png', img)
-        mime_type = 'image/png'
+    data, mime_type = encode_image(img, format, quality)
+    return to_data_uri(data, mime_type)
+
+
+def pack_result(img: np.ndarray) -> PackedImage:
+    """
+    비교 결과 이미지를 색상표 인덱스로 압축 (RESULT_PALETTE 색상만 쓰는 결과 전용)
+    
+    Args:
+        img: compare_difference() / compare_images_overlay() 결과 (BGR)
     
-    base64_str = base64.b64encode(buffer).decode('utf-8')
+    Returns:
+        PackedImage (unpack_result()로 복원)
+    """
+    codes = (img[:, :, 0] >> 7) << 2
+    codes |= (img[:, :, 1] >> 7) << 1
+    codes |= img[:, :, 2] >> 7
+    # 색상 인덱스는 긴 연속 구간이 대부분이라 가장 빠른 압축 레벨로도 충분히 작아짐
+    return PackedImage(img.shape, zlib.compress(codes, 1))
+
+
+def unpack_result(packed: PackedImage) -> np.ndarray:
+    """pack_result()로 압축한 결과를 BGR 배열로 복원"""
+    codes = np.frombuffer(zlib.decompress(packed.data), dtype=np.uint8).reshape(packed.shape[:2])
+    return cv2.LUT(cv2.cvtColor(codes, cv2.COLOR_GRAY2BGR), _PALETTE_LUT)
+
+
+def to_data_uri(data: bytes, mime_type: str) -> str:
+    base64_str = base64.b64encode(data).decode('utf-8')
     return f"data:{mime_type};base64,{base64_str}"
 
 
+def parse_output_formats(spec: str = "") -> Dict[str, OutputFormat]:
+    """
+    결과 이미지별 인코딩 형식 지정 문자열 해석
+    
+    Args:
+        spec: "이름:형식[:품질]"을 쉼표로 연결 (예: "preview:webp:75,download:png:3")
+            이름: result, file1, file2, download, preview (= result + file1 + file2)
+            형식: jpeg, webp, png / 품질: JPEG·WebP 1-100, PNG 압축 레벨 0-9
+    
+    Returns:
+        OUTPUT_NAMES 전체의 OutputFormat (지정하지 않은 이미지는 DEFAULT_OUTPUT_FORMATS)
+    """
+    formats = dict(DEFAULT_OUTPUT_FORMATS)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        parts = item.split(":")
+        if len(parts) not in (2, 3):
+            raise ValueError(f"잘못된 출력 형식 지정: {item} (이름:형식[:품질])")
+        name, format = parts[0].lower(), parts[1].upper()
+        format = "JPEG" if format == "JPG" else format
+        names = PREVIEW_NAMES if name == "preview" else (name,)
+        if name != "preview" and name not in OUTPUT_NAMES:
+            raise ValueError(f"알 수 없는 결과 이미지: {name} ({', '.join(OUTPUT_NAMES)}, preview)")
+        if format not in IMAGE_FORMATS:
+            raise ValueError(f"지원하지 않는 이미지 형식: {parts[1]} (jpeg, webp, png)")
+
+        quality = None
+        if len(parts) == 3:
+            try:
+                quality = int(parts[2])
+            except ValueError:
+                raise ValueError(f"잘못된 품질 값: {item}")
+            low, high = (0, 9) if format == "PNG" else (1, 100)
+            if not low <= quality <= high:
+                raise ValueError(f"{format} 품질은 {low}-{high} 범위여야 합니다: {item}")
+        for target in names:
+            formats[target] = OutputFormat(format, quality)
+    return formats
+
+
+def preview_scale(width: int, height: int, max_dimension: int) -> Tuple[float, Tuple[int, int]]:
+    """
+    미리보기 축소 비율과 크기 (max_dimension이 0이거나 이미 작으면 원본 크기)
+    
+    Returns:
+        (비율, (너비, 높이)) - 크기는 cv2.resize(fx=fy=비율)의 반올림과 같음
+    """
+    if not max_dimension or max(width, height) <= max_dimension:
+        return 1.0, (width, height)
+    scale = max_dimension / max(width, height)
+    return scale, (round(width * scale), round(height * scale))
+
+
+def _encode_output(img: np.ndarray, output_format: OutputFormat, max_dimension: int, as_data_uri: bool):
+    """결과 이미지 하나 축소 + 인코딩 (인코딩 스레드에서 실행)"""
+    scale, _ = preview_scale(img.shape[1], img.shape[0], max_dimension)
+    if scale < 1:
+        # dsize 대신 fx / fy로 지정해야 정수배 축소(4000 → 2000 등)에서 INTER_AREA 빠른 경로 사용
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    data, mime_type = encode_image(img, output_format.format, output_format.quality)
+    return to_data_uri(data, mime_type) if as_data_uri else (data, mime_type)
+
+
+def encode_outputs(
+    result: np.ndarray,
+    file1_result: np.ndarray,
+    file2_result: np.ndarray,
+    response_format: str = "json",
+    download_png: Optional[bytes] = None,
+    output_formats: Optional[Dict[str, OutputFormat]] = None,
+    preview_max_dimension: int = PREVIEW_MAX_DIMENSION
+) -> dict:
+    """
+    비교 결과 인코딩 (이미지별로 인코딩 스레드에서 동시에 실행)
+    
+    Args:
+        response_format:
+            "json" - result/file1/file2/download_base64 (data URI)
+            "url" - result/file1/file2/download_image (바이트) + 각 *_media_type
+                    download_image는 인코딩하지 않은 결과 (pack_result()로 압축, 다운로드 요청 시 result_store에서 인코딩)
+        download_png: 이미 인코딩된 다운로드 PNG (tile 비교의 원본 해상도 결과, 없으면 result를 사용)
+        output_formats: 이미지별 인코딩 형식 (parse_output_formats(), 기본 미리보기 JPEG 85 / 다운로드 PNG)
+        preview_max_dimension: result / file1 / file2 미리보기 최대 크기 (0이면 원본 크기, download는 항상 원본 크기)
+    """
+    output_formats = output_formats or DEFAULT_OUTPUT_FORMATS
+    as_data_uri = response_format != "url"
+    images = {"result": result, "file1": file1_result, "file2": file2_result}
+    if as_data_uri and download_png is None:
+        images["download"] = result
+
+    if not as_data_uri and download_png is None:
+        packed = _encode_executor.submit(pack_result, result)
+
+    futures = {
+        name: _encode_executor.submit(
+            _encode_output, img, output_formats[name],
+            0 if name == "download" else preview_max_dimension, as_data_uri
+        )
+        for name, img in images.items()
+    }
+
+    outputs = {}
+    for name, future in futures.items():
+        if as_data_uri:
+            outputs[f"{name}_base64"] = future.result()
+        else:
+            outputs[f"{name}_image"], outputs[f"{name}_media_type"] = future.result()
+
+    if as_data_uri:
+        if download_png is not None:
+            outputs["download_base64"] = to_data_uri(download_png, "image/png")
+    elif download_png is None:
+        outputs["download_image"] = packed.result()
+    else:
+        outputs["download_image"], outputs["download_media_type"] = download_png, "image/png"
+    return outputs
+
+
 def generate_highlighted_images(A_bgr: np.ndarray, B_aligned_bgr: np.ndarray, diff_thresh: int = 30, bin_thresh: int = 200) -> Tuple[np.ndarray, np.ndarray]:
     """
     각 이미지에 차이점 강조 (Side-by-Side 뷰용)
     A에는 A만의 특징(삭제됨)을, B에는 B만의 특징(추가됨)을 강조
     """
-    h, w = A_bgr.shape[:2]
+    return highlight_differences(
+        A_bgr, B_aligned_bgr, compute_diff_masks(A_bgr, B_aligned_bgr, diff_thresh, bin_thresh)
+    )
+
+
+def compare_loaded(
+    img1: np.ndarray,
+    img2: np.ndarray,
+    mode: str = "difference",
+    diff_threshold: int = 30,
+    feature_count: int = 4000,
+    bin_threshold: int = 200,
+    cache_keys: Optional[Tuple[RasterKey, RasterKey]] = None,
+    alignment: str = "orb",
+    response_format: str = "json",
+    output_formats: Optional[Dict[str, OutputFormat]] = None,
+    preview_max_dimension: int = PREVIEW_MAX_DIMENSION
+) -> dict:
+    """
+    로드된 두 이미지 비교 (다운샘플링 → 정렬 → 비교 → 인코딩)
     
-    A_gray = cv2.cvtColor(A_bgr, cv2.COLOR_BGR2GRAY)
-    B_gray = cv2.cvtColor(B_aligned_bgr, cv2.COLOR_BGR2GRAY)
+    Args:
+        cache_keys: 두 이미지의 raster key (있으면 정렬 결과를 alignment cache에서 재사용)
+        alignment: 정렬 방식 ("orb" 또는 "pyramid")
+        response_format: "json" 또는 "url" (encode_outputs() 참고)
+        output_formats: 결과 이미지별 인코딩 형식 (parse_output_formats())
+        preview_max_dimension: 화면 표시용 이미지 최대 크기 (0이면 원본 크기)
     
-    _, A_bin = cv2.threshold(A_gray, bin_thresh, 255, cv2.THRESH_BINARY_INV)
-    _, B_bin = cv2.threshold(B_gray, bin_thresh, 255, cv2.THRESH_BINARY_INV)
+    Returns:
+        process_comparison()과 같은 형식 (metadata에 페이지 수 제외)
+    """
+    # 2. 다운샘플링 (raster cache에서 온 이미지는 이미 다운샘플링되어 있음)
+    img1 = downsample_if_needed(img1, max_dimension=MAX_DIMENSION)
+    img2 = downsample_if_needed(img2, max_dimension=MAX_DIMENSION)
     
-    diff = cv2.absdiff(A_gray, B_gray)
-    _, diff_mask = cv2.threshold(diff, diff_thresh, 255, cv2.THRESH_BINARY)
+    # 3. 이미지 정렬
+    logger.info("이미지 정렬 중...")
+    _, aligned_img2, H, quality = align_images(
+        img1, img2, nfeatures=feature_count, cache_keys=cache_keys, method=alignment
+    )
     
-    # Masks
-    only_A = np.logical_and(A_bin > 0, B_bin == 0).astype(np.uint8) * 255
-    only_B = np.logical_and(B_bin > 0, A_bin == 0).astype(np.uint8) * 255
-    both = np.logical_and(A_bin > 0, B_bin > 0).astype(np.uint8) * 255
+    alignment_failed = False
+    # 폴백: 정렬 실패 시
+    if aligned_img2 is None or quality < 0.3:
+        logger.warning("ORB 정렬 실패, 폴백 정렬 사용")
+        aligned_img2 = fallback_align(img1, img2)
+        alignment_failed = True
     
-    # 엣지 노이즈 보정 (Common diff)
-    diff_common = np.logical_and(diff_mask > 0, both > 0)
-    darker_in_A = np.logical_and(diff_common, A_gray < B_gray)
-    darker_in_B = np.logical_and(diff_common, B_gray < A_gray)
+    # 4. 비교
+    logger.info(f"비교 모드: {mode}")
     
-    only_A = np.logical_or(only_A > 0, darker_in_A)
-    only_B = np.logical_or(only_B > 0, darker_in_B)
+    file1_result = img1
+    file2_result = aligned_img2
 
-    # Image A Highlighted (Blue for missing/changed)
-    # 원본 이미지를 흐리게 하고 차이 부분만 강조
-    imgA_out = A_bgr.copy()
-    # 배경 흐리게
-    # imgA_out = cv2.addWeighted(imgA_out, 0.7, np.full_like(imgA_out, 255), 0.3, 0)
-    # 강조 (Blue)
-    imgA_out[only_A] = [255, 0, 0] # Blue
-    
-    # Image B Highlighted (Red for added/changed)
-    imgB_out = B_aligned_bgr.copy()
-    # imgB_out = cv2.addWeighted(imgB_out, 0.7, np.full_like(imgB_out, 255), 0.3, 0)
-    imgB_out[only_B] = [0, 0, 255] # Red
+    if mode == "overlay":
+        result = compare_images_overlay(img1, aligned_img2, bin_thresh=bin_threshold)
+        # Overlay 모드에서는 원본(정렬된) 그냥 반환
+    else:  # difference
+        # Difference 모드에서는 하이라이트된 개별 이미지도 생성 (마스크는 한 번만 계산)
+        result, file1_result, file2_result = compare_difference(
+            img1, aligned_img2, diff_thresh=diff_threshold, bin_thresh=bin_threshold
+        )
     
-    return imgA_out, imgB_out
+    # 5. 인코딩
+    logger.info("이미지 인코딩 중...")
+    outputs = encode_outputs(
+        result, file1_result, file2_result, response_format,
+        output_formats=output_formats, preview_max_dimension=preview_max_dimension
+    )
+    _, (preview_width, preview_height) = preview_scale(result.shape[1], result.shape[0], preview_max_dimension)
+    outputs["metadata"] = {
+        "mode": mode,
+        "alignment": alignment,
+        "match_quality": quality,
+        "alignment_failed": alignment_failed,
+        "result_size": f"{result.shape[1]}x{result.shape[0]}",
+        "preview_size": f"{preview_width}x{preview_height}"
+    }
+    return outputs
+
 
 def process_comparison(
     file1_bytes: bytes,
@@ -399,7 +1140,11 @@ def process_comparison(
     feature_count: int = 4000,
     page1: int = 0,
     page2: int = 0,
-    bin_threshold: int = 200
+    bin_threshold: int = 200,
+    alignment: str = "orb",
+    response_format: str = "json",
+    output_formats: Optional[Dict[str, OutputFormat]] = None,
+    preview_max_dimension: int = PREVIEW_MAX_DIMENSION
 ) -> dict:
     """
     이미지 비교 전체 파이프라인
@@ -415,74 +1160,68 @@ def process_comparison(
         page1: PDF 페이지 번호 (file1)
         page2: PDF 페이지 번호 (file2)
         bin_threshold: 이진화 임계값 (기본 200)
+        alignment: 정렬 방식 ("orb" 또는 "pyramid", 기본 orb)
+        response_format: "json" (기본) 또는 "url"
+        output_formats: 결과 이미지별 인코딩 형식 (parse_output_formats(), 기본 미리보기 JPEG 85 / 다운로드 PNG)
+        preview_max_dimension: 화면 표시용 이미지 최대 크기 (기본 2000, 0이면 원본 크기)
     
     Returns:
         {
-            "result_base64": str (JPEG 압축, 화면 표시용),
+            "result_base64": str (화면 표시용 미리보기, 기본 JPEG),
             "file1_base64": str,
             "file2_base64": str,
-            "download_base64": str (PNG 고품질, 다운로드용),
+            "download_base64": str (원본 크기, 기본 PNG, 다운로드용),
             "metadata": dict
         }
+        response_format="url"이면 *_base64 대신 encode_outputs()의 바이트 / 압축한 결과 (PackedImage)
     """
     try:
         # 1. 파일 로드
         logger.info("파일 로드 중...")
-        img1, pages1, type1 = load_file(file1_bytes, file1_type, page1)
-        img2, pages2, type2 = load_file(file2_bytes, file2_type, page2)
-        
-        # 2. 다운샘플링
-        img1 = downsample_if_needed(img1, max_dimension=4000)
-        img2 = downsample_if_needed(img2, max_dimension=4000)
-        
-        # 3. 이미지 정렬
-        logger.info("이미지 정렬 중...")
-        _, aligned_img2, H, quality = align_images(img1, img2, nfeatures=feature_count)
-        
-        alignment_failed = False
-        # 폴백: 정렬 실패 시
-        if aligned_img2 is None or quality < 0.3:
-            logger.warning("ORB 정렬 실패, 폴백 정렬 사용")
-            aligned_img2 = fallback_align(img1, img2)
-            alignment_failed = True
-        
-        # 4. 비교
-        logger.info(f"비교 모드: {mode}")
+        key1 = raster_key(file1_bytes, file1_type, page1)
+        key2 = raster_key(file2_bytes, file2_type, page2)
+        img1, pages1, type1 = load_cached(file1_bytes, file1_type, page1, key=key1)
+        img2, pages2, type2 = load_cached(file2_bytes, file2_type, page2, key=key2)
         
-        file1_result = img1
-        file2_result = aligned_img2
-
-        if mode == "overlay":
-            result = compare_images_overlay(img1, aligned_img2, bin_thresh=bin_threshold)
-            # Overlay 모드에서는 원본(정렬된) 그냥 반환
-        else:  # difference
-            result = compare_images(img1, aligned_img2, diff_thresh=diff_threshold, bin_thresh=bin_threshold)
-            # Difference 모드에서는 하이라이트된 개별 이미지 생성
-            file1_result, file2_result = generate_highlighted_images(img1, aligned_img2, diff_thresh=diff_threshold, bin_thresh=bin_threshold)
-        
-        # 5. 인코딩
-        logger.info("이미지 인코딩 중...")
-        result_base64 = encode_image_to_base64(result, format='JPEG', quality=85)
-        file1_base64 = encode_image_to_base64(file1_result, format='JPEG', quality=85)
-        file2_base64 = encode_image_to_base64(file2_result, format='JPEG', quality=85)
-        
-        download_base64 = encode_image_to_base64(result, format='PNG')
-        
-        return {
-            "result_base64": result_base64,
-            "file1_base64": file1_base64,
-            "file2_base64": file2_base64,
-            "download_base64": download_base64,
-            "metadata": {
-                "mode": mode,
-                "file1_pages": pages1,
-                "file2_pages": pages2,
-                "match_quality": quality,
-                "alignment_failed": alignment_failed,
-                "result_size": f"{result.shape[1]}x{result.shape[0]}"
-            }
-        }
+        result = compare_loaded(
+            img1, img2, mode, diff_threshold, feature_count, bin_threshold,
+            cache_keys=(key1, key2), alignment=alignment, response_format=response_format,
+            output_formats=output_formats, preview_max_dimension=preview_max_dimension
+        )
+        result["metadata"].update(file1_pages=pages1, file2_pages=pages2)
+        return result
     
     except Exception as e:
         logger.error(f"비교 처리 실패: {str(e)}")
-        raise
\ No newline at end of file
+        raise
+
+
+def compare_document_pages(
+    file1_path: str,
+    file1_type: str,
+    file2_path: str,
+    file2_type: str,
+    page1: int,
+    page2: int,
+    mode: str = "difference",
+    diff_threshold: int = 30,
+    feature_count: int = 4000,
+    bin_threshold: int = 200,
+    alignment: str = "orb",
+    response_format: str = "json",
+    output_formats: Optional[Dict[str, OutputFormat]] = None,
+    preview_max_dimension: int = PREVIEW_MAX_DIMENSION
+) -> dict:
+    """
+    디스크에 저장된 두 문서의 페이지 한 쌍 비교 (배치 비교용, 프로세스 풀 worker에서 실행)
+    
+    Returns:
+        compare_loaded()와 같은 형식
+    """
+    img1, key1 = load_page(file1_path, file1_type, page1)
+    img2, key2 = load_page(file2_path, file2_type, page2)
+    return compare_loaded(
+        img1, img2, mode, diff_threshold, feature_count, bin_threshold,
+        cache_keys=(key1, key2), alignment=alignment, response_format=response_format,
+        output_formats=output_formats, preview_max_dimension=preview_max_dimension
+    )
@@ -0,0 +1,321 @@
+"""
+Background Job Queue for long-running FabriX calls (파일 분석 등)
+- 제출 즉시 job id 반환, 제한된 수의 worker가 업스트림 호출을 실행
+- 결과는 완료 후 TTL 동안 메모리에 보관 (폴링 / SSE 구독으로 조회)
+- 프로세스 메모리 저장소이므로 uvicorn 워커별로 독립 (단일 워커 또는 sticky 라우팅 전제)
+"""
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+import asyncio
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue already holds max_queue_size pending jobs."""
+
+
+class Job:
+    """
+    One submitted job (이벤트 루프에서만 상태 변경).
+    """
+
+    def __init__(
+        self,
+        owner: Any,
+        func: Callable[[], Awaitable[Any]],
+        cleanup: Optional[Callable[[], None]] = None
+    ):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.status = QUEUED
+        self.result = None
+        self.error = None  # {"status_code": int, "detail": Any}
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+        self._func = func
+        self._cleanup = cleanup
+        self._task = None
+        self._expires_at = None
+        # 상태가 바뀔 때마다 set 후 새 Event로 교체 (구독자 깨우기)
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def _set_status(self, status: str):
+        self.status = status
+        if status == RUNNING:
+            self.started_at = time.time()
+        elif status in FINISHED_STATES:
+            self.finished_at = time.time()
+            self._run_cleanup()
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _run_cleanup(self):
+        cleanup, self._cleanup = self._cleanup, None
+        if cleanup is not None:
+            try:
+                cleanup()
+            except Exception as e:
+                logger.error(f"Job {self.id} cleanup failed: {e}")
+
+    def snapshot(self) -> dict:
+        """Job state for API responses (result/error는 완료된 경우에만)."""
+        data = {
+            'jobId': self.id,
+            'status': self.status,
+            'createdAt': self.created_at,
+            'startedAt': self.started_at,
+            'finishedAt': self.finished_at
+        }
+        if self.status == SUCCEEDED:
+            data['result'] = self.result
+        elif self.error is not None:
+            data['error'] = self.error
+        return data
+
+
+class JobManager:
+    """
+    Bounded worker pool with an in-memory TTL result store.
+
+    동시 실행 수(max_workers)와 대기열 길이(max_queue_size)를 제한해
+    긴 분석 작업이 업스트림 연결과 요청 슬롯을 무한정 점유하지 않도록 함.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int = 4,
+        max_queue_size: int = 100,
+        result_ttl_seconds: float = 600.0,
+        max_jobs: int = 1000
+    ):
+        """
+        Initialize job manager.
+
+        Args:
+            name: Name used in logs ("file" 등)
+            max_workers: Jobs running concurrently
+            max_queue_size: Jobs waiting for a worker before submit() is rejected
+            result_ttl_seconds: How long finished jobs stay retrievable
+            max_jobs: Maximum jobs kept in the store (오래된 완료 job부터 제거)
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.result_ttl = result_ttl_seconds
+        self.max_jobs = max_jobs
+
+        self._jobs = OrderedDict()
+        self._queue = asyncio.Queue()
+        self._workers = []
+        # 대기 중(QUEUED)인 job 수 (취소된 job은 큐에서 꺼내기 전이라도 제외)
+        self._waiting = 0
+
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.expired = 0
+
+        logger.info(
+            f"Job Manager '{name}' initialized: workers={max_workers}, "
+            f"queue={max_queue_size}, result TTL={result_ttl_seconds}s"
+        )
+
+    async def start(self):
+        """Start the worker tasks."""
+        if not self._workers:
+            loop = asyncio.get_running_loop()
+            self._workers = [loop.create_task(self._worker()) for _ in range(self.max_workers)]
+
+    @property
+    def pending(self) -> int:
+        return self._waiting
+
+    def is_full(self) -> bool:
+        return self._waiting >= self.max_queue_size
+
+    def submit(
+        self,
+        owner: Any,
+        func: Callable[[], Awaitable[Any]],
+        cleanup: Optional[Callable[[], None]] = None
+    ) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            owner: Only this owner can read the job (user id)
+            func: Coroutine function doing the work; its return value becomes job.result.
+                Exceptions with status_code/detail (HTTPException 등) are stored as-is, others as 500.
+            cleanup: Called exactly once when the job finishes, fails or is cancelled
+                (임시 파일 정리, rate limit 정산 등)
+
+        Raises:
+            JobQueueFull: Too many jobs are waiting
+        """
+        self._expire()
+        if self.is_full():
+            self.rejected += 1
+            raise JobQueueFull(f"{self.pending} {self.name} jobs are already waiting")
+
+        job = Job(owner, func, cleanup)
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        self._waiting += 1
+        self.submitted += 1
+        logger.debug(f"Job {job.id} queued ({self.name}, pending={self.pending})")
+        return job
+
+    def get(self, job_id: str, owner: Any) -> Optional[Job]:
+        """Return the job if it exists, has not expired and belongs to owner."""
+        self._expire()
+        job = self._jobs.get(job_id)
+        if job is None or job.owner != owner:
+            return None
+        return job
+
+    async def cancel(self, job: Job) -> bool:
+        """
+        Cancel a queued or running job (실행 중이면 업스트림 호출이 정리될 때까지 대기).
+
+        Returns:
+            False if the job had already finished
+        """
+        if job.finished:
+            return False
+        if job._task is not None:
+            changed = job._changed
+            job._task.cancel()
+            await changed.wait()
+        else:
+            # 대기 중인 job은 worker가 꺼낼 때 건너뜀
+            self._finish(job, CANCELLED)
+        return True
+
+    async def updates(self, job: Job, timeout: Optional[float] = None) -> AsyncIterator[dict]:
+        """
+        Yield the job's snapshot now and after every state change until it finishes.
+
+        Args:
+            timeout: Stop waiting after this many seconds (None = until finished)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = job._changed
+            yield job.snapshot()
+            if job.finished:
+                return
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[dict] = None):
+        if job.status == QUEUED:
+            self._waiting -= 1
+        job.result = result
+        job.error = error
+        job._task = None
+        job._func = None
+        job._expires_at = time.monotonic() + self.result_ttl
+        job._set_status(status)
+        if status == SUCCEEDED:
+            self.succeeded += 1
+        elif status == FAILED:
+            self.failed += 1
+        else:
+            self.cancelled += 1
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            if job.finished:
+                continue
+
+            self._waiting -= 1
+            job._set_status(RUNNING)
+            job._task = asyncio.get_running_loop().create_task(job._func())
+            try:
+                # worker 자신이 취소되지 않는 한 job task의 취소/예외는 여기서 처리
+                await asyncio.wait({job._task})
+            except asyncio.CancelledError:
+                job._task.cancel()
+                self._finish(job, CANCELLED)
+                raise
+
+            task = job._task
+            if task.cancelled():
+                self._finish(job, CANCELLED)
+            elif task.exception() is not None:
+                e = task.exception()
+                status_code = getattr(e, "status_code", 500)
+                if status_code >= 500:
+                    logger.error(f"Job {job.id} failed: {e!r}")
+                self._finish(job, FAILED, error={
+                    'status_code': status_code,
+                    'detail': getattr(e, "detail", str(e))
+                })
+            else:
+                self._finish(job, SUCCEEDED, result=task.result())
+
+    def _expire(self):
+        """Drop finished jobs past their TTL and the oldest finished jobs above max_jobs."""
+        now = time.monotonic()
+        over = len(self._jobs) - self.max_jobs
+        for job_id, job in list(self._jobs.items()):
+            if not job.finished:
+                continue
+            if job._expires_at <= now or over > 0:
+                del self._jobs[job_id]
+                self.expired += 1
+                over -= 1
+
+    async def close(self):
+        """Cancel workers, running and queued jobs."""
+        for worker in self._workers:
+            worker.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        for job in self._jobs.values():
+            if not job.finished:
+                self._finish(job, CANCELLED)
+        logger.info(f"Job Manager '{self.name}' closed")
+
+    def get_stats(self) -> dict:
+        """Get queue statistics."""
+        self._expire()
+        return {
+            'workers': self.max_workers,
+            'running': sum(1 for job in self._jobs.values() if job.status == RUNNING),
+            'queued': sum(1 for job in self._jobs.values() if job.status == QUEUED),
+            'stored': len(self._jobs),
+            'submitted': self.submitted,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+            'rejected': self.rejected,
+            'expired': self.expired
+        }
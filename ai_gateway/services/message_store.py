@@ -0,0 +1,221 @@
+"""
+Chat Message Store (write-behind)
+스트리밍 답변을 Gateway에서 직접 Django DB(fabrix_agent_chat_chatmessage)에 저장
+- 요청 처리 경로에서는 큐에 넣기만 함 (HTTP 왕복 / DB 쓰기 대기 없음)
+- 전용 스레드 1개가 모아서 배치 트랜잭션으로 INSERT, 세션 updated_at은 배치당 1회 갱신
+- INSERT ... SELECT로 세션 소유자를 함께 확인 (다른 사용자의 세션에는 기록되지 않음)
+  (요청 시점의 소유자 확인은 TokenStore.session_owner: 읽기 전용 풀에서 조회, 배치 쓰기를 기다리지 않음)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple, Optional
+import asyncio
+import sqlite3
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+INSERT_MESSAGE_SQL = (
+    "INSERT INTO fabrix_agent_chat_chatmessage (role, content, created_at, session_id) "
+    "SELECT ?, ?, ?, id FROM fabrix_agent_chat_chatsession WHERE id = ? AND user_id = ?"
+)
+TOUCH_SESSION_SQL = "UPDATE fabrix_agent_chat_chatsession SET updated_at = ? WHERE id = ?"
+
+# close() 시 큐에 넣는 종료 표시
+_STOP = object()
+
+
+def django_timestamp(moment: Optional[datetime] = None) -> str:
+    """Format a datetime the way Django stores it in SQLite (USE_TZ=True: naive UTC)."""
+    moment = moment or datetime.now(timezone.utc)
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+class PendingMessage(NamedTuple):
+    session_id: int
+    user_id: int
+    role: str
+    content: str
+    created_at: str
+
+
+class ChatMessageWriter:
+    """
+    Async write-behind queue for chat messages.
+
+    enqueue()는 이벤트 루프에서 호출, 실제 쓰기는 전용 스레드의 장기 유지 커넥션에서 실행.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        batch_size: int = 100,
+        flush_interval_seconds: float = 0.2,
+        max_queue_size: int = 10000,
+        busy_timeout_ms: int = 5000,
+        max_retries: int = 3
+    ):
+        """
+        Initialize message writer.
+
+        Args:
+            db_path: Path to Django db.sqlite3
+            batch_size: Maximum messages written in one transaction
+            flush_interval_seconds: How long to gather messages after the first one arrives
+            max_queue_size: Messages kept in memory before new ones are dropped
+            busy_timeout_ms: SQLite busy timeout (Django 쓰기와 경합 시 대기)
+            max_retries: Attempts per batch before it is dropped
+        """
+        self.db_path = Path(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_seconds
+        self.busy_timeout_ms = busy_timeout_ms
+        self.max_retries = max_retries
+
+        self._queue = asyncio.Queue(maxsize=max_queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-writer")
+        self._conn = None
+        self._task = None
+
+        self.enqueued = 0
+        self.written = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failures = 0
+
+        logger.info(
+            f"Chat Message Writer initialized: batch={batch_size}, "
+            f"interval={flush_interval_seconds}s, queue={max_queue_size}, DB={self.db_path}"
+        )
+
+    # --- 전용 스레드에서만 실행 ---
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                self.db_path,
+                isolation_level=None,  # BEGIN/COMMIT 직접 관리
+                check_same_thread=False,  # close()는 메인 스레드에서
+                timeout=self.busy_timeout_ms / 1000
+            )
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        return self._conn
+
+    def _write_batch(self, batch: list) -> int:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            inserted = 0
+            touched = {}
+            for message in batch:
+                cursor = conn.execute(
+                    INSERT_MESSAGE_SQL,
+                    (message.role, message.content, message.created_at, message.session_id, message.user_id)
+                )
+                if cursor.rowcount:
+                    inserted += 1
+                    touched[message.session_id] = max(touched.get(message.session_id, ""), message.created_at)
+            # 세션별 updated_at은 배치당 한 번만 갱신
+            conn.executemany(TOUCH_SESSION_SQL, [(updated_at, session_id) for session_id, updated_at in touched.items()])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return inserted
+
+    # --- 이벤트 루프 ---
+
+    async def start(self):
+        """Start the background flush task."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def enqueue(self, session_id: int, user_id: int, role: str, content: str) -> bool:
+        """
+        Queue a message for writing (created_at은 호출 시점).
+
+        Returns:
+            False if the queue is full and the message was dropped
+        """
+        message = PendingMessage(session_id, user_id, role, content, django_timestamp())
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.error(f"Chat message queue full, dropping {role} message for session {session_id}")
+            return False
+        self.enqueued += 1
+        return True
+
+    async def _next_batch(self) -> tuple[list, bool]:
+        """Wait for one message, then gather more for up to flush_interval."""
+        batch = []
+        item = await self._queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while item is not _STOP:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return batch, item is _STOP
+
+    async def _flush(self, batch: list):
+        loop = asyncio.get_running_loop()
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                inserted = await loop.run_in_executor(self._executor, self._write_batch, batch)
+            except sqlite3.Error as e:
+                self.failures += 1
+                logger.warning(f"Chat message batch failed (attempt {attempt}/{self.max_retries}): {e}")
+                await asyncio.sleep(0.1 * 2 ** attempt)
+                continue
+            self.batches += 1
+            self.written += inserted
+            self.rejected += len(batch) - inserted
+            return
+        self.dropped += len(batch)
+        logger.error(f"Dropping {len(batch)} chat messages after {self.max_retries} failed attempts")
+
+    async def _run(self):
+        while True:
+            batch, stop = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+            if stop:
+                return
+
+    async def close(self):
+        """Flush every queued message and close the connection."""
+        if self._task is not None:
+            # 종료 표시 앞에 쌓인 메시지까지 모두 기록한 뒤 종료
+            await self._queue.put(_STOP)
+            await self._task
+            self._task = None
+
+        self._executor.shutdown(wait=True)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        logger.info(f"Chat Message Writer closed ({self.written} messages written)")
+
+    def get_stats(self) -> dict:
+        """Get queue statistics."""
+        return {
+            'queued': self._queue.qsize(),
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'rejected': self.rejected,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'failures': self.failures
+        }
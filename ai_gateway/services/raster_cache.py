@@ -0,0 +1,226 @@
+"""
+Raster Cache for decoded page images (이미지 비교용)
+같은 기준 도면을 여러 개정본과 비교하거나 임계값만 바꿔 다시 비교할 때 PDF 렌더링 / 이미지 디코딩을 건너뜀
+- 키: (파일 바이트 sha256, 페이지, DPI, max_dimension) → 다운샘플링까지 끝난 BGR 배열
+- 메모리 tier: 바이트 크기 기준 LRU (프로세스별, worker 프로세스마다 따로 가짐)
+- 디스크 tier (선택): .npy 파일을 memory-map으로 읽음 → worker 프로세스끼리, 재시작 후에도 공유
+- 캐시된 배열은 읽기 전용 (호출자가 수정하면 ValueError)
+"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+import os
+import tempfile
+import threading
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RasterKey = Tuple[str, int, int, int]
+
+
+class RasterCache:
+    """
+    Two-tier (memory LRU + optional memory-mapped .npy files) cache of page rasters.
+
+    thread backend에서는 여러 스레드가 함께 쓰므로 메모리 tier는 lock으로 보호.
+    디스크 tier는 임시 파일에 쓴 뒤 os.replace로 교체하므로 여러 프로세스가 동시에 써도 안전.
+    """
+
+    def __init__(
+        self,
+        memory_max_bytes: int = 256 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 2 * 1024 * 1024 * 1024
+    ):
+        """
+        Initialize raster cache.
+
+        Args:
+            memory_max_bytes: Memory tier size per process (0 = disabled)
+            disk_dir: Directory for the .npy tier (None = disabled)
+            disk_max_bytes: Disk tier size (오래 사용하지 않은 파일부터 삭제)
+        """
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+
+        # key -> (image, total_pages)
+        self._entries = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_errors = 0
+
+    def configure(
+        self,
+        memory_max_bytes: Optional[int] = None,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: Optional[int] = None
+    ):
+        """Apply new settings (secrets.toml [gateway] 섹션에서 호출)."""
+        with self._lock:
+            if memory_max_bytes is not None:
+                self.memory_max_bytes = memory_max_bytes
+                self._evict_memory()
+            if disk_dir is not None:
+                self.disk_dir = Path(disk_dir) if disk_dir else None
+            if disk_max_bytes is not None:
+                self.disk_max_bytes = disk_max_bytes
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def settings(self) -> dict:
+        """Current settings (worker 프로세스에 같은 설정을 넘길 때 사용)."""
+        return {
+            'memory_max_bytes': self.memory_max_bytes,
+            'disk_dir': str(self.disk_dir) if self.disk_dir else "",
+            'disk_max_bytes': self.disk_max_bytes
+        }
+
+    @staticmethod
+    def key(digest: str, page: int, dpi: int, max_dimension: int) -> RasterKey:
+        return (digest, page, dpi, max_dimension)
+
+    def get(self, key: RasterKey) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        Returns:
+            (image, total_pages) or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store_memory(key, entry)
+        return entry
+
+    def put(self, key: RasterKey, image: np.ndarray, total_pages: int) -> np.ndarray:
+        """
+        Cache a decoded page.
+
+        Returns:
+            The cached (read-only) array
+        """
+        image.setflags(write=False)
+        with self._lock:
+            self._store_memory(key, (image, total_pages))
+        self._write_disk(key, image, total_pages)
+        return image
+
+    def _store_memory(self, key: RasterKey, entry: Tuple[np.ndarray, int]):
+        size = entry[0].nbytes
+        if size > self.memory_max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous[0].nbytes
+        self._entries[key] = entry
+        self._memory_bytes += size
+        self._evict_memory()
+
+    def _evict_memory(self):
+        while self._memory_bytes > self.memory_max_bytes and self._entries:
+            _, (image, _) = self._entries.popitem(last=False)
+            self._memory_bytes -= image.nbytes
+
+    def _disk_path(self, key: RasterKey) -> Path:
+        digest, page, dpi, max_dimension = key
+        return self.disk_dir / f"{digest}-p{page}-d{dpi}-m{max_dimension}.npy"
+
+    def _pages_path(self, digest: str) -> Path:
+        return self.disk_dir / f"{digest}.pages"
+
+    def _read_disk(self, key: RasterKey) -> Optional[Tuple[np.ndarray, int]]:
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            total_pages = int(self._pages_path(key[0]).read_text())
+            image = np.load(path, mmap_mode="r")
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.disk_errors += 1
+            logger.warning(f"Raster cache read failed ({path.name}): {e}")
+            return None
+        return image, total_pages
+
+    def _write_disk(self, key: RasterKey, image: np.ndarray, total_pages: int):
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            self._pages_path(key[0]).write_text(str(total_pages))
+            # 다른 프로세스가 읽는 중에도 완성된 파일만 보이도록 임시 파일 → os.replace
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.save(f, image)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            self._evict_disk()
+        except OSError as e:
+            # Windows: 다른 프로세스가 memory-map으로 열고 있는 파일은 교체/삭제 불가
+            self.disk_errors += 1
+            logger.warning(f"Raster cache write failed ({path.name}): {e}")
+
+    def _evict_disk(self):
+        files = []
+        total = 0
+        for path in self.disk_dir.glob("*.npy"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.disk_max_bytes:
+            return
+
+        files.sort()
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+            # 문서의 마지막 페이지 파일이면 페이지 수 파일도 삭제
+            digest = path.name.split("-", 1)[0]
+            if not any(self.disk_dir.glob(f"{digest}-*.npy")):
+                self._pages_path(digest).unlink(missing_ok=True)
+
+    def get_stats(self) -> dict:
+        """Get cache statistics (이 프로세스 기준)."""
+        with self._lock:
+            return {
+                'memory_entries': len(self._entries),
+                'memory_bytes': self._memory_bytes,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'disk_errors': self.disk_errors,
+                'disk_enabled': self.disk_dir is not None
+            }
+
+
+# Global raster cache instance
+raster_cache = RasterCache()
@@ -0,0 +1,402 @@
+"""
+Rate Limiter Window Backends
+TokenRateLimiter의 슬라이딩 윈도우 저장소
+- MemoryWindowBackend: 프로세스 내부 (기본값, 단일 워커)
+- SQLiteWindowBackend: SQLite WAL 파일 공유 (같은 호스트의 여러 uvicorn 워커가 하나의 RPM/TPM 예산 사용)
+"""
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock, local
+from typing import Iterator, Optional, Tuple
+import sqlite3
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class WindowBackend:
+    """
+    Interface for rate-limit window storage.
+
+    모든 메서드는 원자적으로 동작해야 함 (check-and-record가 다른 스레드/프로세스와 경합하지 않도록).
+    """
+
+    # 다른 프로세스가 용량을 해제할 수 있는지 여부 (대기자 wakeup 주기 상한에 사용)
+    shared = False
+    # blocking I/O를 하는 backend는 이 executor에서 실행 (None: 이벤트 루프에서 바로 호출)
+    executor: Optional[Executor] = None
+
+    def __init__(self, time_window_seconds: float = 60):
+        self.window_seconds = float(time_window_seconds)
+
+    def reserve(self, tokens: int, rpm_limit: int, tpm_limit: int) -> Tuple[Optional[object], int, int]:
+        """
+        Record a request if it fits within the limits.
+
+        Returns:
+            (handle or None if rejected, request_count, total_tokens) - counts before recording
+        """
+        raise NotImplementedError
+
+    def adjust(self, handle, delta: int) -> bool:
+        """Apply a token delta to a recorded request if it is still in the window."""
+        raise NotImplementedError
+
+    def release(self, handle) -> bool:
+        """Remove a recorded request (요청이 실제로 전송되지 않은 경우 RPM/TPM 모두 반환)."""
+        raise NotImplementedError
+
+    def wait_time(self, tokens: int, rpm_limit: int, tpm_limit: int) -> float:
+        """Seconds until a request of this size would fit (0 if it fits now)."""
+        raise NotImplementedError
+
+    def usage(self) -> Tuple[int, int]:
+        """Return (request_count, total_tokens) currently in the window."""
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return type(self).__name__
+
+    @staticmethod
+    def _wait_from_entries(
+        entries: Iterator[Tuple[float, int, int]],
+        now: float,
+        requests_to_free: int,
+        tokens_to_free: int
+    ) -> float:
+        """Walk (expires_at, requests, tokens) from oldest until enough capacity is freed."""
+        if requests_to_free <= 0 and tokens_to_free <= 0:
+            return 0.0
+
+        freed_requests = 0
+        freed_tokens = 0
+        expires_at = now
+        for expires_at, requests, tokens in entries:
+            freed_requests += requests
+            freed_tokens += tokens
+            if freed_requests >= requests_to_free and freed_tokens >= tokens_to_free:
+                break
+
+        # 최악의 경우: 전체 윈도우 대기 (마지막 항목 만료 시점)
+        return max(0.0, expires_at - now)
+
+
+class MemoryWindowBackend(WindowBackend):
+    """
+    In-process window with running totals.
+
+    bucket_count를 지정하면 고정 크기 링 버퍼(예: 60개 x 1초)로 동작하여
+    요청 빈도와 무관하게 메모리 사용량이 일정함.
+    """
+
+    def __init__(self, time_window_seconds: float = 60, bucket_count: Optional[int] = None):
+        super().__init__(time_window_seconds)
+        self.bucket_count = bucket_count
+
+        # 윈도우 내 누적값 (append/eviction 시 갱신)
+        self.request_count = 0
+        self.total_tokens = 0
+
+        if bucket_count:
+            # 링 버퍼: 버킷별 (요청 수, 토큰 수, 절대 버킷 번호)
+            self.bucket_width = self.window_seconds / bucket_count
+            self.bucket_requests = [0] * bucket_count
+            self.bucket_tokens = [0] * bucket_count
+            self.bucket_ids = [-1] * bucket_count
+            self.head_bucket = None
+        else:
+            # [monotonic timestamp, tokens_used, request_count] 형태로 저장
+            # (commit 시 tokens 갱신, release 시 둘 다 0으로)
+            self.requests = deque()
+        self.lock = Lock()
+
+    def describe(self) -> str:
+        return f"memory (buckets={self.bucket_count})" if self.bucket_count else "memory"
+
+    def _cleanup_old_requests(self, now: float):
+        """Remove requests outside the time window (누적값에서 차감)."""
+        if self.bucket_count:
+            self._advance_buckets(now)
+            return
+
+        cutoff_time = now - self.window_seconds
+
+        while self.requests and self.requests[0][0] < cutoff_time:
+            _, tokens, requests = self.requests.popleft()
+            self.request_count -= requests
+            self.total_tokens -= tokens
+
+    def _advance_buckets(self, now: float):
+        """Expire buckets that fell out of the window (최대 bucket_count개만 검사)."""
+        current = int(now // self.bucket_width)
+        if self.head_bucket is None:
+            self.head_bucket = current
+            self.bucket_ids[current % self.bucket_count] = current
+            return
+        if current <= self.head_bucket:
+            return
+
+        # 새로 진입한 버킷 슬롯을 비움 (해당 슬롯의 이전 값은 윈도우 밖)
+        start = max(self.head_bucket + 1, current - self.bucket_count + 1)
+        for bucket_id in range(start, current + 1):
+            idx = bucket_id % self.bucket_count
+            if self.bucket_ids[idx] != bucket_id:
+                self.request_count -= self.bucket_requests[idx]
+                self.total_tokens -= self.bucket_tokens[idx]
+                self.bucket_requests[idx] = 0
+                self.bucket_tokens[idx] = 0
+                self.bucket_ids[idx] = bucket_id
+        self.head_bucket = current
+
+    def _record(self, now: float, tokens: int):
+        """Add a request to the window and return its handle."""
+        self.request_count += 1
+        self.total_tokens += tokens
+        if self.bucket_count:
+            idx = self.head_bucket % self.bucket_count
+            self.bucket_requests[idx] += 1
+            self.bucket_tokens[idx] += tokens
+            return self.head_bucket
+        entry = [now, tokens, 1]
+        self.requests.append(entry)
+        return entry
+
+    def _window_entries(self):
+        """Yield (expires_at, requests, tokens) from oldest to newest."""
+        if self.bucket_count:
+            for bucket_id in range(self.head_bucket - self.bucket_count + 1, self.head_bucket + 1):
+                idx = bucket_id % self.bucket_count
+                if self.bucket_ids[idx] == bucket_id and self.bucket_requests[idx]:
+                    expires_at = (bucket_id + self.bucket_count) * self.bucket_width
+                    yield expires_at, self.bucket_requests[idx], self.bucket_tokens[idx]
+        else:
+            for timestamp, tokens, requests in self.requests:
+                yield timestamp + self.window_seconds, requests, tokens
+
+    def reserve(self, tokens: int, rpm_limit: int, tpm_limit: int):
+        with self.lock:
+            now = time.monotonic()
+            self._cleanup_old_requests(now)
+
+            request_count = self.request_count
+            total_tokens = self.total_tokens
+            if request_count >= rpm_limit or total_tokens + tokens > tpm_limit:
+                return None, request_count, total_tokens
+            return self._record(now, tokens), request_count, total_tokens
+
+    def adjust(self, handle, delta: int) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self._cleanup_old_requests(now)
+
+            if self.bucket_count:
+                idx = handle % self.bucket_count
+                if self.bucket_ids[idx] != handle:
+                    return False
+                delta = max(delta, -self.bucket_tokens[idx])
+                self.bucket_tokens[idx] += delta
+            else:
+                if handle[0] < now - self.window_seconds:
+                    return False
+                delta = max(delta, -handle[1])
+                handle[1] += delta
+            self.total_tokens += delta
+            return True
+
+    def release(self, handle) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self._cleanup_old_requests(now)
+
+            if self.bucket_count:
+                # 버킷 모드는 개별 요청의 토큰 수를 알 수 없으므로 요청 수만 반환
+                idx = handle % self.bucket_count
+                if self.bucket_ids[idx] != handle or not self.bucket_requests[idx]:
+                    return False
+                self.bucket_requests[idx] -= 1
+                self.request_count -= 1
+                return True
+
+            if handle[0] < now - self.window_seconds or not handle[2]:
+                return False
+            self.request_count -= handle[2]
+            self.total_tokens -= handle[1]
+            handle[1] = 0
+            handle[2] = 0
+            return True
+
+    def wait_time(self, tokens: int, rpm_limit: int, tpm_limit: int) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self._cleanup_old_requests(now)
+
+            return self._wait_from_entries(
+                self._window_entries(),
+                now,
+                requests_to_free=self.request_count - rpm_limit + 1,
+                tokens_to_free=(self.total_tokens + tokens) - tpm_limit
+            )
+
+    def usage(self) -> Tuple[int, int]:
+        with self.lock:
+            self._cleanup_old_requests(time.monotonic())
+            return self.request_count, self.total_tokens
+
+    def reset(self):
+        with self.lock:
+            self.request_count = 0
+            self.total_tokens = 0
+            if self.bucket_count:
+                self.bucket_requests = [0] * self.bucket_count
+                self.bucket_tokens = [0] * self.bucket_count
+                self.bucket_ids = [-1] * self.bucket_count
+                self.head_bucket = None
+            else:
+                self.requests.clear()
+
+
+class SQLiteWindowBackend(WindowBackend):
+    """
+    Window shared by every worker process on the host through a SQLite WAL file.
+
+    - BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡아 check-and-record가 프로세스 간 원자적
+    - 윈도우 행 수는 RPM 한도를 넘지 않으므로 (scope, ts) 인덱스 범위 집계 비용이 작음
+    - 프로세스 간 비교가 가능하도록 timestamp는 wall clock(time.time()) 사용
+    - 다른 워커가 쓰기 잠금을 잡고 있으면 busy_timeout까지 대기하므로
+      TokenRateLimiter는 모든 호출을 전용 스레드(executor)에서 실행 (이벤트 루프를 막지 않음)
+    """
+
+    shared = True
+    # 프로세스당 스레드 1개 / 커넥션 1개 (모든 scope 공유, 호출 순서대로 실행되므로 commit 후 reserve 순서 보장)
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rate-limit-db")
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS rate_limit_window (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            scope TEXT NOT NULL,
+            ts REAL NOT NULL,
+            tokens INTEGER NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS rate_limit_window_scope_ts ON rate_limit_window (scope, ts)",
+    )
+
+    # 같은 파일을 쓰는 모든 backend(scope)가 스레드별 커넥션 하나를 공유
+    _local = local()
+    _initialized_paths = set()
+    _init_lock = Lock()
+
+    def __init__(
+        self,
+        db_path: Path,
+        time_window_seconds: float = 60,
+        scope: str = "global",
+        busy_timeout_ms: int = 5000
+    ):
+        """
+        Args:
+            db_path: Shared SQLite file (모든 워커가 같은 경로 사용)
+            time_window_seconds: Sliding window length
+            scope: Budget name (같은 파일에 여러 예산을 둘 수 있음)
+            busy_timeout_ms: Wait time for the write lock held by another worker
+        """
+        super().__init__(time_window_seconds)
+        self.db_path = Path(db_path)
+        self.scope = scope
+        self.busy_timeout_ms = busy_timeout_ms
+
+        with self._init_lock:
+            if str(self.db_path) not in self._initialized_paths:
+                conn = self._connection()
+                for statement in self.SCHEMA:
+                    conn.execute(statement)
+                self._initialized_paths.add(str(self.db_path))
+
+    def describe(self) -> str:
+        return f"sqlite ({self.db_path}, scope={self.scope})"
+
+    def _connection(self) -> sqlite3.Connection:
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = self._local.connections = {}
+        conn = connections.get(str(self.db_path))
+        if conn is None:
+            # autocommit 모드: 트랜잭션은 BEGIN IMMEDIATE로 직접 제어
+            conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=self.busy_timeout_ms / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            connections[str(self.db_path)] = conn
+        return conn
+
+    def _totals(self, conn: sqlite3.Connection, cutoff: float) -> Tuple[int, int]:
+        row = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tokens), 0) FROM rate_limit_window WHERE scope = ? AND ts >= ?",
+            (self.scope, cutoff)
+        ).fetchone()
+        return row[0], row[1]
+
+    def reserve(self, tokens: int, rpm_limit: int, tpm_limit: int):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 쓰기 잠금을 기다린 뒤의 시각으로 기록 (대기 시간만큼 일찍 만료되지 않도록)
+            now = time.time()
+            cutoff = now - self.window_seconds
+            conn.execute(
+                "DELETE FROM rate_limit_window WHERE scope = ? AND ts < ?", (self.scope, cutoff)
+            )
+            request_count, total_tokens = self._totals(conn, cutoff)
+            if request_count >= rpm_limit or total_tokens + tokens > tpm_limit:
+                conn.execute("COMMIT")
+                return None, request_count, total_tokens
+
+            cursor = conn.execute(
+                "INSERT INTO rate_limit_window (scope, ts, tokens) VALUES (?, ?, ?)",
+                (self.scope, now, tokens)
+            )
+            conn.execute("COMMIT")
+            return cursor.lastrowid, request_count, total_tokens
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def adjust(self, handle, delta: int) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE rate_limit_window SET tokens = MAX(0, tokens + ?) WHERE id = ? AND ts >= ?",
+            (delta, handle, time.time() - self.window_seconds)
+        )
+        return cursor.rowcount > 0
+
+    def release(self, handle) -> bool:
+        cursor = self._connection().execute("DELETE FROM rate_limit_window WHERE id = ?", (handle,))
+        return cursor.rowcount > 0
+
+    def wait_time(self, tokens: int, rpm_limit: int, tpm_limit: int) -> float:
+        conn = self._connection()
+        now = time.time()
+        cutoff = now - self.window_seconds
+
+        request_count, total_tokens = self._totals(conn, cutoff)
+        rows = conn.execute(
+            "SELECT ts, tokens FROM rate_limit_window WHERE scope = ? AND ts >= ? ORDER BY ts",
+            (self.scope, cutoff)
+        )
+        return self._wait_from_entries(
+            ((ts + self.window_seconds, 1, row_tokens) for ts, row_tokens in rows),
+            now,
+            requests_to_free=request_count - rpm_limit + 1,
+            tokens_to_free=(total_tokens + tokens) - tpm_limit
+        )
+
+    def usage(self) -> Tuple[int, int]:
+        return self._totals(self._connection(), time.time() - self.window_seconds)
+
+    def reset(self):
+        self._connection().execute("DELETE FROM rate_limit_window WHERE scope = ?", (self.scope,))
@@ -3,177 +3,658 @@ Rate Limiter for FabriX API
 RPM (Requests Per Minute) = 100
 TPM (Tokens Per Minute) = 10000
 """
-from datetime import datetime, timedelta
-from collections import deque
-from threading import Lock
-from typing import Optional
+from collections import OrderedDict
+from typing import Callable, Optional
+import asyncio
+import heapq
+import itertools
 import logging
+import time
+
+from .rate_limit_backends import WindowBackend, MemoryWindowBackend
 
 logger = logging.getLogger(__name__)
 
 
+class Reservation:
+    """
+    Tokens reserved at admission time.
+    commit()으로 실제 사용량과의 차이를 윈도우에 반영 (환불 또는 추가 차감).
+    """
+    __slots__ = ("tokens", "handle", "committed")
+
+    def __init__(self, tokens: int, handle):
+        self.tokens = tokens
+        self.handle = handle  # backend별 항목 식별자 (deque 항목 / 버킷 번호 / SQLite rowid)
+        self.committed = False
+
+
 class TokenRateLimiter:
     """
-    Thread-safe rate limiter for API requests with token tracking.
-    
+    Event-loop confined rate limiter for API requests with token tracking.
+    (별도 lock 없음: 대기열 힙 / future / 예약 상태는 이벤트 루프 스레드에서만 접근,
+    다른 스레드에서 호출하려면 loop.call_soon_threadsafe 사용)
+
     Limits:
     - RPM (Requests Per Minute): 100
     - TPM (Tokens Per Minute): 10000
+
+    윈도우 저장소는 backend로 교체 가능 (rate_limit_backends 참고).
+    기본 MemoryWindowBackend는 누적값을 유지하므로 모든 연산이 O(1) (amortized).
+    여러 워커가 하나의 예산을 공유하려면 SQLiteWindowBackend 사용
+    (backend.executor가 있으면 acquire / commit / release / get_wait_time / get_current_usage의 backend 호출은
+    그 스레드에서 실행되어 다른 워커의 쓰기 잠금을 기다리는 동안에도 이벤트 루프가 멈추지 않음).
+
+    acquire()는 한도 초과 시 대기열(우선순위 → 도착 순서)에 넣고,
+    용량이 확보되는 시점에 맞춰 한 번만 깨워서 순서대로 통과시킴.
+
+    reserve()/acquire()는 추정 토큰을 예약하고, 응답 완료 후 commit()으로
+    실제 사용량을 반영함 (추정치가 크면 환불, 작으면 추가 차감).
     """
-    
+
+    # eviction은 cutoff보다 "오래된" 항목만 제거하므로 만료 시점 직후에 깨움
+    WAKE_MARGIN_SECONDS = 0.001
+    # 공유 backend는 다른 워커의 환불/만료를 알 수 없으므로 주기적으로 재확인
+    SHARED_MAX_WAKE_SECONDS = 0.5
+
     def __init__(
-        self, 
-        rpm_limit: int = 100, 
+        self,
+        rpm_limit: int = 100,
         tpm_limit: int = 1000000,
-        time_window_seconds: int = 60
+        time_window_seconds: int = 60,
+        bucket_count: Optional[int] = None,
+        backend: Optional[WindowBackend] = None,
+        name: str = "global"
     ):
         """
         Initialize rate limiter.
-        
+
         Args:
             rpm_limit: Maximum requests per minute
             tpm_limit: Maximum tokens per minute
             time_window_seconds: Time window for rate limiting (default: 60 seconds)
+            bucket_count: Use a ring buffer of this many buckets instead of
+                tracking each request (None: exact per-request sliding window)
+            backend: Window storage (default: in-process MemoryWindowBackend)
+            name: Partition name used in logs ("global", "user:1", ...)
         """
+        self.name = name
         self.rpm_limit = rpm_limit
         self.tpm_limit = tpm_limit
-        self.time_window = timedelta(seconds=time_window_seconds)
-        
-        # (timestamp, tokens_used) 형태로 저장
-        self.requests = deque()
-        self.lock = Lock()
-        
-        logger.info(
-            f"Rate Limiter initialized: RPM={rpm_limit}, TPM={tpm_limit}, "
-            f"Window={time_window_seconds}s"
+        self.backend = backend or MemoryWindowBackend(time_window_seconds, bucket_count)
+
+        # asyncio 대기열: [priority, seq, tokens, future] 힙 (이벤트 루프에서만 접근)
+        self.waiters = []
+        self._waiter_seq = itertools.count()
+        self._wake_handle = None
+        # 대기자 입장 처리 task (blocking backend 호출을 await 하므로 한 번에 하나만 실행)
+        self._dispatch_task = None
+        self._dispatch_again = False
+        self.wakeups = 0
+
+        # 파티션은 요청마다 생성될 수 있으므로 debug 레벨로 기록
+        logger.log(
+            logging.INFO if name == "global" else logging.DEBUG,
+            f"Rate Limiter [{name}] initialized: RPM={rpm_limit}, TPM={tpm_limit}, "
+            f"Window={self.backend.window_seconds:.0f}s, Backend={self.backend.describe()}"
         )
-    
-    def _cleanup_old_requests(self, now: datetime):
-        """Remove requests outside the time window."""
-        cutoff_time = now - self.time_window
-        
-        while self.requests and self.requests[0][0] < cutoff_time:
-            self.requests.popleft()
-    
+
+    def use_backend(self, backend: WindowBackend):
+        """Switch window storage (main.py에서 secrets.toml 설정에 따라 호출)."""
+        self.backend = backend
+        logger.info(f"Rate Limiter backend: {backend.describe()}")
+
     def can_proceed(self, estimated_tokens: int = 100) -> tuple[bool, Optional[str]]:
         """
         Check if request can proceed within rate limits.
-        
+
         Args:
             estimated_tokens: Estimated token count for the request
-            
+
         Returns:
             (can_proceed: bool, error_message: Optional[str])
         """
-        with self.lock:
-            now = datetime.now()
-            self._cleanup_old_requests(now)
-            
-            # 현재 요청 수 및 토큰 수 계산
-            request_count = len(self.requests)
-            total_tokens = sum(tokens for _, tokens in self.requests)
-            
+        reservation, error_msg = self.reserve(estimated_tokens)
+        return reservation is not None, error_msg
+
+    def reserve(self, estimated_tokens: int = 100) -> tuple[Optional[Reservation], Optional[str]]:
+        """
+        Reserve estimated tokens if the request fits within rate limits.
+        backend를 현재 스레드에서 바로 호출 (이벤트 루프에서는 acquire() 사용).
+
+        Args:
+            estimated_tokens: Estimated token count for the request
+
+        Returns:
+            (reservation or None, error_message: Optional[str])
+        """
+        return self._admit(
+            self.backend.reserve(estimated_tokens, self.rpm_limit, self.tpm_limit), estimated_tokens
+        )
+
+    async def _reserve(self, estimated_tokens: int) -> tuple[Optional[Reservation], Optional[str]]:
+        """reserve() without blocking the event loop (blocking backend는 executor에서 실행)."""
+        return self._admit(
+            await self._run(self.backend.reserve, estimated_tokens, self.rpm_limit, self.tpm_limit),
+            estimated_tokens
+        )
+
+    async def _run(self, method, *args):
+        """Call a backend method, on backend.executor if it does blocking I/O."""
+        if self.backend.executor is None:
+            return method(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.backend.executor, method, *args)
+
+    def _submit(self, method, *args, dispatch: bool = False):
+        """
+        Run a backend update without waiting for it (commit / release는 SSE generator의 finally 등
+        await 할 수 없는 곳에서도 호출됨). dispatch=True면 반영 후 대기자 재평가.
+        """
+        if self.backend.executor is None:
+            result = method(*args)
+            if dispatch and result and self.waiters:
+                self._dispatch_waiters()
+            return result
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 이벤트 루프 밖 (종료 중 generator 정리 등): 대기자가 없으므로 반영만
+            loop = None
+        future = self.backend.executor.submit(method, *args)
+
+        def done(future):
+            if future.exception() is not None:
+                logger.error(f"Rate limit backend update failed [{self.name}]: {future.exception()}")
+            elif dispatch and loop is not None and future.result() and not loop.is_closed():
+                loop.call_soon_threadsafe(self._dispatch_waiters)
+
+        future.add_done_callback(done)
+        return True
+
+    def _admit(self, result: tuple, estimated_tokens: int) -> tuple[Optional[Reservation], Optional[str]]:
+        handle, request_count, total_tokens = result
+
+        if handle is None:
             # RPM 체크
             if request_count >= self.rpm_limit:
-                remaining = self.rpm_limit - request_count
                 logger.warning(
                     f"RPM limit reached: {request_count}/{self.rpm_limit}"
                 )
-                return False, f"Rate limit exceeded: {request_count} requests in last minute (limit: {self.rpm_limit})"
-            
+                return None, f"Rate limit exceeded: {request_count} requests in last minute (limit: {self.rpm_limit})"
+
             # TPM 체크
-            if total_tokens + estimated_tokens > self.tpm_limit:
-                logger.warning(
-                    f"TPM limit reached: {total_tokens + estimated_tokens}/{self.tpm_limit}"
-                )
-                return False, f"Token limit exceeded: {total_tokens + estimated_tokens} tokens in last minute (limit: {self.tpm_limit})"
-            
-            # 요청 추가
-            self.requests.append((now, estimated_tokens))
-            
-            logger.debug(
-                f"Request allowed: {request_count + 1}/{self.rpm_limit} requests, "
-                f"{total_tokens + estimated_tokens}/{self.tpm_limit} tokens"
+            logger.warning(
+                f"TPM limit reached: {total_tokens + estimated_tokens}/{self.tpm_limit}"
             )
-            
-            return True, None
-    
-    def get_wait_time(self, estimated_tokens: int = 100) -> float:
+            return None, f"Token limit exceeded: {total_tokens + estimated_tokens} tokens in last minute (limit: {self.tpm_limit})"
+
+        logger.debug(
+            f"Request allowed: {request_count + 1}/{self.rpm_limit} requests, "
+            f"{total_tokens + estimated_tokens}/{self.tpm_limit} tokens"
+        )
+
+        return Reservation(estimated_tokens, handle), None
+
+    def commit(self, reservation: Reservation, actual_tokens: int) -> int:
+        """
+        Reconcile a reservation with the actual token usage.
+        이벤트 루프에서 호출 (환불된 용량으로 대기자를 바로 통과시킴).
+
+        Args:
+            reservation: Reservation returned by reserve()/acquire()
+            actual_tokens: Token count actually consumed upstream
+
+        Returns:
+            Applied delta (negative: refunded, 0: already committed or expired;
+            executor backend는 반영을 기다리지 않으므로 요청한 delta)
+        """
+        if reservation.committed:
+            return 0
+        reservation.committed = True
+
+        delta = max(0, actual_tokens) - reservation.tokens
+        if delta == 0:
+            return 0
+
+        # 이미 윈도우 밖으로 만료된 요청은 반영하지 않음
+        if not self._submit(self.backend.adjust, reservation.handle, delta, dispatch=delta < 0):
+            return 0
+
+        logger.debug(
+            f"Reservation committed: estimated={reservation.tokens}, actual={actual_tokens}, delta={delta}"
+        )
+        return delta
+
+    def release(self, reservation: Reservation) -> bool:
+        """
+        Return a reservation that was never used upstream (RPM/TPM 모두 반환).
+        상위 파티션 대기가 타임아웃된 경우 하위 파티션 예약을 되돌릴 때 사용.
+        """
+        if reservation.committed:
+            return False
+        reservation.committed = True
+
+        return self._submit(self._release_handle, reservation.handle, reservation.tokens, dispatch=True)
+
+    def _release_handle(self, handle, tokens: int) -> bool:
+        self.backend.adjust(handle, -tokens)
+        return self.backend.release(handle)
+
+    async def get_wait_time(self, estimated_tokens: int = 100) -> float:
         """
         Calculate how long to wait before the request can proceed.
-        
+
         Args:
             estimated_tokens: Estimated token count for the request
-            
+
         Returns:
             Wait time in seconds (0 if can proceed immediately)
         """
-        with self.lock:
-            now = datetime.now()
-            self._cleanup_old_requests(now)
-            
-            request_count = len(self.requests)
-            total_tokens = sum(tokens for _, tokens in self.requests)
-            
-            # 요청 수 초과
-            if request_count >= self.rpm_limit:
-                # 가장 오래된 요청이 만료될 때까지 대기
-                oldest_request_time = self.requests[0][0]
-                wait_until = oldest_request_time + self.time_window
-                wait_seconds = (wait_until - now).total_seconds()
-                return max(0, wait_seconds)
-            
-            # 토큰 수 초과
-            if total_tokens + estimated_tokens > self.tpm_limit:
-                # 토큰이 충분해질 때까지 대기 (추정)
-                tokens_to_free = (total_tokens + estimated_tokens) - self.tpm_limit
-                # 가장 오래된 요청부터 토큰 해제
-                freed_tokens = 0
-                for timestamp, tokens in self.requests:
-                    freed_tokens += tokens
-                    if freed_tokens >= tokens_to_free:
-                        wait_until = timestamp + self.time_window
-                        wait_seconds = (wait_until - now).total_seconds()
-                        return max(0, wait_seconds)
-                
-                # 최악의 경우: 전체 윈도우 대기
-                if self.requests:
-                    oldest_request_time = self.requests[0][0]
-                    wait_until = oldest_request_time + self.time_window
-                    wait_seconds = (wait_until - now).total_seconds()
-                    return max(0, wait_seconds)
-            
-            return 0.0
-    
-    def get_current_usage(self) -> dict:
+        return await self._run(self.backend.wait_time, estimated_tokens, self.rpm_limit, self.tpm_limit)
+
+    async def acquire(
+        self,
+        estimated_tokens: int = 100,
+        timeout: Optional[float] = None,
+        priority: int = 0
+    ) -> tuple[Optional[Reservation], Optional[str]]:
+        """
+        Wait in a fair queue until the request fits within rate limits.
+
+        Args:
+            estimated_tokens: Estimated token count for the request
+            timeout: Maximum seconds to wait (None: wait indefinitely)
+            priority: Lower values are admitted first; equal priorities are FIFO
+
+        Returns:
+            (reservation or None, error_message: Optional[str]) - None only on
+            timeout or when the request can never fit (RPM 한도 0 / TPM 한도 초과)
+        """
+        # 기다려도 통과할 수 없는 요청 (RPM 한도 0 = 차단된 파티션)
+        if self.rpm_limit <= 0:
+            return None, f"Rate limit exceeded: requests are blocked (limit: {self.rpm_limit})"
+        if estimated_tokens > self.tpm_limit:
+            return None, f"Token limit exceeded: {estimated_tokens} tokens requested (limit: {self.tpm_limit})"
+
+        # 대기열이 비어 있으면 즉시 시도 (대기 중인 요청을 추월하지 않음)
+        if not self.waiters:
+            reservation, error_msg = await self._reserve(estimated_tokens)
+            if reservation is not None:
+                return reservation, None
+            if timeout is not None and timeout <= 0:
+                return None, error_msg
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self.waiters, [priority, next(self._waiter_seq), estimated_tokens, future])
+        self._dispatch_waiters()
+
+        try:
+            await asyncio.wait({future}, timeout=timeout)
+        finally:
+            if not future.done():
+                # 타임아웃 또는 클라이언트 취소: 대기열에서 제외하고 다음 대기자 재평가
+                future.cancel()
+                self._dispatch_waiters()
+
+        if future.cancelled():
+            wait_time = await self.get_wait_time(estimated_tokens)
+            logger.warning(f"Rate limit wait timed out after {timeout}s (next slot in {wait_time:.2f}s)")
+            return None, f"Rate limit exceeded: no capacity within {timeout}s (retry after {wait_time:.2f}s)"
+        return future.result(), None
+
+    def _dispatch_waiters(self):
+        """Start (or re-run) the task that admits queued waiters in order."""
+        if self._wake_handle is not None:
+            self._wake_handle.cancel()
+            self._wake_handle = None
+
+        if self._dispatch_task is not None:
+            # 실행 중인 task가 끝나면 다시 평가 (그 사이 환불 / 취소 / 새 대기자 반영)
+            self._dispatch_again = True
+            return
+        if self.waiters:
+            self._dispatch_task = asyncio.get_running_loop().create_task(self._run_dispatch())
+
+    async def _run_dispatch(self):
+        try:
+            while True:
+                self._dispatch_again = False
+                await self._admit_waiters()
+                if not self._dispatch_again:
+                    break
+        finally:
+            self._dispatch_task = None
+
+    async def _admit_waiters(self):
+        """Admit queued waiters in order and schedule one wakeup for the head."""
+        while self.waiters:
+            waiter = self.waiters[0]
+            _, _, tokens, future = waiter
+            if future.done():
+                self._remove_waiter(waiter)
+                continue
+
+            reservation, _ = await self._reserve(tokens)
+            if reservation is not None:
+                self._remove_waiter(waiter)
+                if future.done():
+                    # backend 호출 중에 타임아웃 / 취소된 대기자: 예약을 반환
+                    self.release(reservation)
+                else:
+                    future.set_result(reservation)
+                continue
+
+            # 맨 앞 대기자가 통과할 수 있는 정확한 시점에 한 번만 깨움
+            wait_time = await self.get_wait_time(tokens)
+            if self.backend.shared:
+                wait_time = min(wait_time, self.SHARED_MAX_WAKE_SECONDS)
+            if self._wake_handle is not None:
+                self._wake_handle.cancel()
+            self._wake_handle = asyncio.get_running_loop().call_later(
+                wait_time + self.WAKE_MARGIN_SECONDS, self._on_wake
+            )
+            break
+
+    def _remove_waiter(self, waiter: list):
+        # await 도중 더 높은 우선순위 대기자가 들어와 맨 앞이 바뀌었을 수 있음
+        if self.waiters[0] is waiter:
+            heapq.heappop(self.waiters)
+        else:
+            self.waiters.remove(waiter)
+            heapq.heapify(self.waiters)
+
+    def _on_wake(self):
+        self._wake_handle = None
+        self.wakeups += 1
+        self._dispatch_waiters()
+
+    async def get_current_usage(self) -> dict:
         """
         Get current usage statistics.
-        
+
         Returns:
             dict with current_rpm, current_tpm, remaining_rpm, remaining_tpm
         """
-        with self.lock:
-            now = datetime.now()
-            self._cleanup_old_requests(now)
-            
-            request_count = len(self.requests)
-            total_tokens = sum(tokens for _, tokens in self.requests)
-            
-            return {
-                'current_rpm': request_count,
-                'current_tpm': total_tokens,
-                'remaining_rpm': max(0, self.rpm_limit - request_count),
-                'remaining_tpm': max(0, self.tpm_limit - total_tokens),
-                'rpm_limit': self.rpm_limit,
-                'tpm_limit': self.tpm_limit
-            }
-    
+        request_count, total_tokens = await self._run(self.backend.usage)
+
+        return {
+            'current_rpm': request_count,
+            'current_tpm': total_tokens,
+            'remaining_rpm': max(0, self.rpm_limit - request_count),
+            'remaining_tpm': max(0, self.tpm_limit - total_tokens),
+            'rpm_limit': self.rpm_limit,
+            'tpm_limit': self.tpm_limit,
+            'waiting': sum(1 for waiter in self.waiters if not waiter[3].done()),
+            'wakeups': self.wakeups,
+            'backend': self.backend.describe()
+        }
+
     def reset(self):
         """Reset rate limiter (for testing purposes)."""
-        with self.lock:
-            self.requests.clear()
-            logger.info("Rate limiter reset")
+        self.backend.reset()
+        logger.info("Rate limiter reset")
+
+
+class PartitionedReservation:
+    """
+    Reservations taken at every partition level for one request.
+    commit()/release()는 모든 레벨에 동일하게 반영됨.
+    """
+    __slots__ = ("reservations",)
+
+    def __init__(self, reservations: list):
+        self.reservations = reservations  # [(TokenRateLimiter, Reservation), ...]
+
+
+class PartitionedRateLimiter:
+    """
+    Hierarchical rate limiting: global → per-user → per-(user, agentId).
+
+    - 요청은 가장 좁은 파티션(agent)부터 global까지 순서대로 용량을 확보해야 통과
+      (한 사용자의 긴 스트리밍 요청이 global 예산을 독점하지 못함)
+    - 파티션별 TokenRateLimiter를 lazy 생성, LRU + idle 시간 기준으로 제거
+    - max_partitions로 메모리 사용량 상한 유지
+    """
+
+    def __init__(
+        self,
+        global_limiter: TokenRateLimiter,
+        user_rpm_limit: Optional[int] = 30,
+        user_tpm_limit: Optional[int] = None,
+        agent_rpm_limit: Optional[int] = None,
+        agent_tpm_limit: Optional[int] = None,
+        max_partitions: int = 1024,
+        idle_seconds: Optional[float] = None,
+        backend_factory: Optional[Callable[[str], WindowBackend]] = None
+    ):
+        """
+        Initialize partitioned rate limiter.
+
+        Args:
+            global_limiter: Limiter shared by every caller
+            user_rpm_limit / user_tpm_limit: Per-user limits (both None: no per-user level,
+                one None: use the global limit for it - 기본은 RPM 30, TPM은 global과 같음)
+            agent_rpm_limit / agent_tpm_limit: Per-(user, agentId) limits (None: no per-agent level)
+            max_partitions: Maximum number of partitions kept in memory
+            idle_seconds: Evict partitions unused for this long (default: 2 windows)
+            backend_factory: Creates the window storage for a partition scope
+                (default: in-process MemoryWindowBackend)
+        """
+        self.global_limiter = global_limiter
+        self.user_limits = (user_rpm_limit, user_tpm_limit)
+        self.agent_limits = (agent_rpm_limit, agent_tpm_limit)
+        self.max_partitions = max_partitions
+        self.idle_seconds = idle_seconds or global_limiter.backend.window_seconds * 2
+        self.backend_factory = backend_factory or self._memory_backend
+
+        # key -> [TokenRateLimiter, last_used] (LRU 순서)
+        self.partitions = OrderedDict()
+        self.evictions = 0
+
+    def _memory_backend(self, scope: str) -> WindowBackend:
+        return MemoryWindowBackend(self.global_limiter.backend.window_seconds)
+
+    def configure(
+        self,
+        user_limits: Optional[tuple] = None,
+        agent_limits: Optional[tuple] = None,
+        max_partitions: Optional[int] = None,
+        idle_seconds: Optional[float] = None,
+        backend_factory: Optional[Callable[[str], WindowBackend]] = None
+    ):
+        """
+        Apply partition settings (main.py에서 secrets.toml 설정에 따라 호출) and drop partitions.
+
+        Args:
+            user_limits / agent_limits: (rpm, tpm) tuples; (None, None) disables the level
+            max_partitions: Maximum number of partitions kept in memory
+            idle_seconds: Evict partitions unused for this long
+            backend_factory: Creates the window storage for a partition scope
+        """
+        if user_limits is not None:
+            self.user_limits = tuple(user_limits)
+        if agent_limits is not None:
+            self.agent_limits = tuple(agent_limits)
+        if max_partitions is not None:
+            self.max_partitions = max_partitions
+        if idle_seconds is not None:
+            self.idle_seconds = idle_seconds
+        if backend_factory is not None:
+            self.backend_factory = backend_factory
+        self.partitions.clear()
+
+        logger.info(
+            f"Rate Limit partitions configured: user={self.user_limits}, "
+            f"agent={self.agent_limits}, max={self.max_partitions}, idle={self.idle_seconds}s"
+        )
+
+    @staticmethod
+    def _resolve_limits(limits: tuple, parent: TokenRateLimiter) -> Optional[tuple]:
+        rpm, tpm = limits
+        if rpm is None and tpm is None:
+            return None
+        # 한쪽만 설정된 경우 나머지는 상위 한도를 그대로 사용 (0은 "차단"으로 그대로 적용)
+        return (
+            parent.rpm_limit if rpm is None else rpm,
+            parent.tpm_limit if tpm is None else tpm
+        )
+
+    def _partition(self, key: str, rpm_limit: int, tpm_limit: int) -> TokenRateLimiter:
+        """Get or create the limiter for a partition key (LRU touch)."""
+        now = time.monotonic()
+        entry = self.partitions.get(key)
+        if entry is not None:
+            entry[1] = now
+            self.partitions.move_to_end(key)
+            return entry[0]
+
+        self._evict(now)
+        limiter = TokenRateLimiter(
+            rpm_limit=rpm_limit,
+            tpm_limit=tpm_limit,
+            backend=self.backend_factory(key),
+            name=key
+        )
+        self.partitions[key] = [limiter, now]
+        return limiter
+
+    def _evict(self, now: float):
+        """
+        Drop idle partitions, then the least recently used ones above max_partitions.
+        대기자가 있는 파티션은 건너뜀 (제거하면 같은 키로 새 limiter가 생겨 대기열과 한도가 둘로 나뉨).
+        프로세스 메모리 backend는 윈도우가 빌 때까지 건너뜀 (제거하면 그 사용자의 예산이 초기화됨).
+        따라서 건너뛴 파티션 수만큼은 max_partitions를 넘을 수 있음.
+        """
+        evicted = []
+        remaining = len(self.partitions)
+        for key, (limiter, last_used) in self.partitions.items():
+            if remaining < self.max_partitions and now - last_used < self.idle_seconds:
+                break
+            if limiter.waiters:
+                continue
+            # 공유 backend(SQLite)는 윈도우가 파일에 남으므로 다시 만들어도 같은 예산을 읽음
+            if not limiter.backend.shared and limiter.backend.usage()[0] > 0:
+                continue
+            evicted.append(key)
+            remaining -= 1
+
+        # 진행 중인 예약은 limiter 객체를 직접 참조하므로 (공유 backend는) 제거해도 commit 가능
+        for key in evicted:
+            del self.partitions[key]
+            self.evictions += 1
+            logger.debug(f"Rate limit partition evicted: {key}")
+
+    def _levels(self, user_id, agent_id) -> list:
+        """Limiters a request must pass, narrowest first."""
+        levels = []
+        if user_id is not None:
+            user_limits = self._resolve_limits(self.user_limits, self.global_limiter)
+            if user_limits is not None:
+                user_limiter = self._partition(f"user:{user_id}", *user_limits)
+                if agent_id:
+                    agent_limits = self._resolve_limits(self.agent_limits, user_limiter)
+                    if agent_limits is not None:
+                        levels.append(self._partition(f"user:{user_id}:agent:{agent_id}", *agent_limits))
+                levels.append(user_limiter)
+        levels.append(self.global_limiter)
+        return levels
+
+    async def acquire(
+        self,
+        estimated_tokens: int = 100,
+        timeout: Optional[float] = None,
+        user_id=None,
+        agent_id: Optional[str] = None,
+        priority: int = 0
+    ) -> tuple[Optional[PartitionedReservation], Optional[str]]:
+        """
+        Wait until the request fits in every partition level.
+
+        Args:
+            estimated_tokens: Estimated token count for the request
+            timeout: Maximum total seconds to wait across all levels
+            user_id: Django user id from verify_token (None: global only)
+            agent_id: FabriX agentId (per-agent level)
+            priority: Lower values are admitted first within each level
+
+        Returns:
+            (reservation or None, error_message: Optional[str])
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        acquired = []
+
+        try:
+            for limiter in self._levels(user_id, agent_id):
+                remaining = None if deadline is None else max(0.0, deadline - loop.time())
+                reservation, error_msg = await limiter.acquire(
+                    estimated_tokens, timeout=remaining, priority=priority
+                )
+                if reservation is None:
+                    # 앞 단계에서 확보한 예약은 사용하지 않았으므로 반환
+                    self._release_all(acquired)
+                    return None, f"[{limiter.name}] {error_msg}"
+                acquired.append((limiter, reservation))
+        except BaseException:
+            self._release_all(acquired)
+            raise
+
+        return PartitionedReservation(acquired), None
+
+    @staticmethod
+    def _release_all(acquired: list):
+        for limiter, reservation in acquired:
+            limiter.release(reservation)
+
+    def commit(self, reservation: PartitionedReservation, actual_tokens: int):
+        """Reconcile every level with the actual token usage."""
+        for limiter, level_reservation in reservation.reservations:
+            limiter.commit(level_reservation, actual_tokens)
+
+    def release(self, reservation: PartitionedReservation):
+        """Return every level of a reservation that was never used upstream."""
+        self._release_all(reservation.reservations)
+
+    async def get_wait_time(self, estimated_tokens: int = 100, user_id=None, agent_id: Optional[str] = None) -> float:
+        """Longest wait among the levels the request must pass."""
+        return max([
+            await limiter.get_wait_time(estimated_tokens)
+            for limiter in self._levels(user_id, agent_id)
+        ])
+
+    async def get_current_usage(self, user_id=None) -> dict:
+        """
+        Get global usage plus per-partition usage.
+
+        Args:
+            user_id: Only report this user's partitions (None: every partition)
+
+        Returns:
+            dict with the global usage keys and a 'partitions' mapping
+        """
+        prefix = None if user_id is None else f"user:{user_id}"
+        partitions = {
+            key: await entry[0].get_current_usage()
+            for key, entry in list(self.partitions.items())
+            if prefix is None or key == prefix or key.startswith(prefix + ":")
+        }
+        usage = await self.global_limiter.get_current_usage()
+        usage['partitions'] = partitions
+        usage['partition_count'] = len(self.partitions)
+        usage['max_partitions'] = self.max_partitions
+        usage['partition_evictions'] = self.evictions
+        return usage
+
+    def reset(self):
+        """Drop every partition and reset the global limiter (for testing purposes)."""
+        self.partitions.clear()
+        self.global_limiter.reset()
 
 
 # Global rate limiter instance
 rate_limiter = TokenRateLimiter(rpm_limit=100, tpm_limit=10000)
+
+# 사용자/에이전트별 파티션 (global 한도는 rate_limiter와 공유)
+partitioned_rate_limiter = PartitionedRateLimiter(rate_limiter)
@@ -0,0 +1,361 @@
+"""
+Upstream Resilience for FabriX calls
+재시도(지수 백오프 + jitter, Retry-After 준수)와 엔드포인트별 Circuit Breaker
+- 재시도는 멱등 요청이거나 요청이 업스트림에 전달되지 않은 경우(연결 실패, 429)에만
+- FabriX 장애 시 Circuit Breaker가 즉시 실패 처리 → 60초 타임아웃이 쌓여 연결 풀/워커가 고갈되지 않음
+"""
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+import asyncio
+import random
+import time
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+# 요청이 업스트림에 도달하기 전에 실패한 경우 (POST도 재시도 가능)
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# 요청 전송 후 실패 (멱등 요청만 재시도)
+TRANSIENT_ERRORS = (httpx.ReadTimeout, httpx.WriteTimeout, httpx.ReadError, httpx.WriteError,
+                    httpx.RemoteProtocolError)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling FabriX while the endpoint's circuit is open."""
+
+    def __init__(self, endpoint: str, retry_after: float):
+        super().__init__(f"FabriX '{endpoint}' is unavailable (circuit open, retry in {retry_after:.0f}s)")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a Retry-After header (초 단위 숫자 또는 HTTP-date).
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    now = datetime.now(timezone.utc).timestamp() if now is None else now
+    return max(0.0, moment.timestamp() - now)
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        max_retry_after: float = 30.0,
+        retry_statuses: Tuple[int, ...] = (429, 502, 503, 504)
+    ):
+        """
+        Args:
+            max_attempts: Total attempts including the first one (1 = no retry)
+            base_delay: Backoff cap of the first retry (시도마다 2배)
+            max_delay: Maximum backoff cap
+            max_retry_after: Retry-After longer than this is not waited for (바로 실패 반환)
+            retry_statuses: Response statuses that are retried
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = retry_statuses
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (1부터): uniform(0, min(max, base * 2^(attempt-1)))."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def delay_for_response(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """
+        Delay before retrying after a retryable status.
+
+        Returns:
+            Seconds to wait, or None if Retry-After asks for longer than max_retry_after
+        """
+        retry_after = parse_retry_after(response.headers.get("retry-after"))
+        if retry_after is None:
+            return self.backoff(attempt)
+        if retry_after > self.max_retry_after:
+            return None
+        # 같은 Retry-After를 받은 요청들이 동시에 몰리지 않도록 약간의 jitter 추가
+        return retry_after + random.uniform(0, self.base_delay)
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker (연속 실패 횟수 기준).
+
+    closed → (연속 실패 failure_threshold회) → open → (recovery_timeout 경과) → half_open
+    half_open에서 시험 호출이 성공하면 closed, 실패하면 다시 open.
+    이벤트 루프에서만 접근하므로 별도 lock 없음.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        Args:
+            name: Endpoint name ("agents", "chat", "file")
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds the circuit stays open before a trial call
+            half_open_max_calls: Concurrent trial calls allowed while half open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_calls = 0
+
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self):
+        """
+        Check whether a call may proceed.
+
+        Raises:
+            CircuitOpenError: The circuit is open (or half open with a trial call in flight)
+        """
+        if self.state == OPEN:
+            remaining = self._opened_at + self.recovery_timeout - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, remaining)
+            self.state = HALF_OPEN
+            self._trial_calls = 0
+            logger.info(f"Circuit '{self.name}' half open, allowing a trial call")
+
+        if self.state == HALF_OPEN:
+            if self._trial_calls >= self.half_open_max_calls:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.recovery_timeout)
+            self._trial_calls += 1
+
+    def release(self):
+        """End a call that says nothing about upstream health (클라이언트 측 오류, 취소, 풀 대기 초과)."""
+        if self.state == HALF_OPEN and self._trial_calls > 0:
+            self._trial_calls -= 1
+
+    def record_success(self):
+        if self.state != CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self.state = CLOSED
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.opened += 1
+                logger.warning(
+                    f"Circuit '{self.name}' opened after {self.consecutive_failures} consecutive failures "
+                    f"(fail fast for {self.recovery_timeout}s)"
+                )
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'opened': self.opened,
+            'rejected': self.rejected
+        }
+
+
+class UpstreamResilience:
+    """
+    Retry policy plus one circuit breaker per FabriX endpoint.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy] = None,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0
+    ):
+        self.policy = policy or RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+        self.retries = 0
+        self.retry_after_waits = 0
+
+    def configure(
+        self,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        max_retry_after: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+        recovery_timeout: Optional[float] = None
+    ):
+        """Apply new settings (secrets.toml [gateway] 섹션에서 호출)."""
+        policy = self.policy
+        if max_attempts is not None:
+            policy.max_attempts = max(1, max_attempts)
+        if base_delay is not None:
+            policy.base_delay = base_delay
+        if max_delay is not None:
+            policy.max_delay = max_delay
+        if max_retry_after is not None:
+            policy.max_retry_after = max_retry_after
+        if failure_threshold is not None:
+            self.failure_threshold = failure_threshold
+        if recovery_timeout is not None:
+            self.recovery_timeout = recovery_timeout
+        for breaker in self._breakers.values():
+            breaker.failure_threshold = self.failure_threshold
+            breaker.recovery_timeout = self.recovery_timeout
+        logger.info(
+            f"Upstream resilience configured: attempts={policy.max_attempts}, "
+            f"backoff={policy.base_delay}~{policy.max_delay}s, "
+            f"breaker={self.failure_threshold} failures / {self.recovery_timeout}s"
+        )
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(endpoint, self.failure_threshold, self.recovery_timeout)
+            self._breakers[endpoint] = breaker
+        return breaker
+
+    def check(self, endpoint: str):
+        """
+        Fail fast before doing any work for an endpoint whose circuit is open.
+
+        Raises:
+            CircuitOpenError
+        """
+        breaker = self.breaker(endpoint)
+        if breaker.state == OPEN and breaker._opened_at + breaker.recovery_timeout > time.monotonic():
+            breaker.rejected += 1
+            raise CircuitOpenError(endpoint, breaker._opened_at + breaker.recovery_timeout - time.monotonic())
+
+    async def send(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        build_request: Callable[[], httpx.Request],
+        stream: bool = False,
+        replayable: bool = True
+    ) -> httpx.Response:
+        """
+        Send a request with retries and the endpoint's circuit breaker.
+
+        Args:
+            client: Upstream client
+            endpoint: Circuit breaker name
+            build_request: Builds a fresh request for every attempt (client.build_request)
+            stream: Return without reading the body (caller must aclose())
+            replayable: False if the body can only be sent once (스트리밍 업로드 등)
+
+        Returns:
+            The last response (재시도 후에도 오류 상태면 그대로 반환, 호출자가 raise_for_status)
+
+        Raises:
+            CircuitOpenError: The circuit is open
+            httpx.RequestError: The last attempt failed
+        """
+        policy = self.policy
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.allow()
+            request = build_request()
+            idempotent = request.method in IDEMPOTENT_METHODS
+            can_retry = replayable and attempt < policy.max_attempts
+
+            try:
+                response = await client.send(request, stream=stream)
+            except NOT_SENT_ERRORS as e:
+                # 풀 대기 초과는 Gateway 쪽 포화이므로 FabriX 장애로 집계하지 않음
+                if isinstance(e, httpx.PoolTimeout):
+                    breaker.release()
+                else:
+                    breaker.record_failure()
+                if not can_retry:
+                    raise
+                delay = policy.backoff(attempt)
+                logger.warning(f"FabriX '{endpoint}' {type(e).__name__}, retry {attempt} in {delay:.2f}s")
+            except TRANSIENT_ERRORS as e:
+                breaker.record_failure()
+                if not (can_retry and idempotent):
+                    raise
+                delay = policy.backoff(attempt)
+                logger.warning(f"FabriX '{endpoint}' {type(e).__name__}, retry {attempt} in {delay:.2f}s")
+            except httpx.TransportError:
+                breaker.record_failure()
+                raise
+            except BaseException:
+                # 업로드 크기 초과, 클라이언트 연결 종료로 인한 취소 등
+                breaker.release()
+                raise
+            else:
+                status = response.status_code
+                # 429는 FabriX가 요청을 처리하지 않은 것이므로 장애로 보지 않음
+                if status >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+
+                retryable_status = status in policy.retry_statuses and (idempotent or status == 429)
+                if not (can_retry and retryable_status):
+                    return response
+                delay = policy.delay_for_response(response, attempt)
+                if delay is None:
+                    return response
+                if "retry-after" in response.headers:
+                    self.retry_after_waits += 1
+                await response.aclose()
+                logger.warning(f"FabriX '{endpoint}' returned {status}, retry {attempt} in {delay:.2f}s")
+
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> dict:
+        return {
+            'retries': self.retries,
+            'retry_after_waits': self.retry_after_waits,
+            'breakers': {name: breaker.snapshot() for name, breaker in self._breakers.items()}
+        }
+
+
+# Global resilience instance (모든 FabriX 호출이 공유)
+fabrix_resilience = UpstreamResilience()
@@ -0,0 +1,156 @@
+"""
+Response Cache for slow-changing FabriX endpoints (Agent 목록 등)
+Stale-While-Revalidate + single-flight
+- TTL 이내: 캐시된 응답 즉시 반환
+- TTL 경과 ~ stale TTL 이내: 캐시된 응답을 즉시 반환하고 백그라운드에서 1회만 갱신
+- 캐시가 없거나 너무 오래된 경우: 동시 요청이 하나의 upstream 호출 결과를 함께 기다림
+"""
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Async stale-while-revalidate cache with request coalescing.
+
+    이벤트 루프에서만 접근하므로 별도 lock 없음.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 60.0,
+        stale_ttl_seconds: float = 600.0,
+        maxsize: int = 64
+    ):
+        """
+        Initialize response cache.
+
+        Args:
+            ttl_seconds: Entries younger than this are served without revalidation
+            stale_ttl_seconds: Entries younger than this are served while refreshing
+                in the background (also served when the refresh fails)
+            maxsize: Maximum number of cached keys
+        """
+        self.ttl = ttl_seconds
+        self.stale_ttl = max(stale_ttl_seconds, ttl_seconds)
+        self.maxsize = maxsize
+
+        # key -> (fetched_at, value)
+        self._entries = OrderedDict()
+        # key -> asyncio.Task (진행 중인 upstream 호출)
+        self._inflight = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def configure(self, ttl_seconds: Optional[float] = None, stale_ttl_seconds: Optional[float] = None):
+        """Apply new TTLs (secrets.toml [gateway] 섹션에서 호출)."""
+        if ttl_seconds is not None:
+            self.ttl = ttl_seconds
+        if stale_ttl_seconds is not None:
+            self.stale_ttl = stale_ttl_seconds
+        self.stale_ttl = max(self.stale_ttl, self.ttl)
+        logger.info(f"Response Cache configured: TTL={self.ttl}s, stale TTL={self.stale_ttl}s")
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for key, calling fetch() at most once concurrently.
+
+        Args:
+            key: Cache key (URL, params 등)
+            fetch: Coroutine function producing a fresh value
+
+        Returns:
+            Cached or freshly fetched value
+
+        Raises:
+            Whatever fetch() raises when there is no usable cached value
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            fetched_at, value = entry
+            age = now - fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            if age < self.stale_ttl:
+                # 오래된 값을 바로 반환하고 갱신은 백그라운드에서 (single-flight)
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                self._start_fetch(key, fetch)
+                return value
+
+        self.misses += 1
+        task = self._start_fetch(key, fetch)
+        # 대기 중인 요청이 취소되어도 다른 대기자를 위해 upstream 호출은 유지
+        return await asyncio.shield(task)
+
+    def _start_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+
+        task = asyncio.get_running_loop().create_task(self._fetch(key, fetch))
+        # 백그라운드 갱신은 기다리는 요청이 없을 수 있으므로 예외를 여기서 회수
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[key] = task
+        return task
+
+    async def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        self.fetches += 1
+        try:
+            value = await fetch()
+        except Exception as e:
+            self.errors += 1
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.stale_ttl:
+                # 갱신 실패: 기존 값을 계속 사용 (stale-if-error)
+                logger.warning(f"Response cache refresh failed, serving stale value: {e}")
+                return entry[1]
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one key (or every key when None)."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def get_stats(self) -> dict:
+        """Get cache statistics."""
+        return {
+            'size': len(self._entries),
+            'inflight': len(self._inflight),
+            'ttl_seconds': self.ttl,
+            'stale_ttl_seconds': self.stale_ttl,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'fetches': self.fetches,
+            'coalesced': self.coalesced,
+            'errors': self.errors
+        }
+
+
+# Global agent list cache instance
+agent_list_cache = ResponseCache(ttl_seconds=60.0, stale_ttl_seconds=600.0)
@@ -0,0 +1,183 @@
+"""
+Result Store for image comparison (response_format="url")
+비교 결과 이미지를 base64 JSON 대신 짧게 유지되는 URL로 제공
+- /process, /batch 응답에는 URL만 담고 이미지는 GET /image-compare/results/{id}/{name}에서
+  Content-Type: image/* 바이너리로 전달 (base64 33% 증가 / JSON 파싱 / data URI 디코딩 없음)
+- 다운로드 이미지(기본 PNG)는 요청될 때 한 번만 인코딩 (대부분의 비교는 다운로드하지 않음)
+  그 전까지는 색상표 인덱스로 압축한 결과(PackedImage)만 보관 (원본 BGR 배열의 수십 분의 일)
+- 결과 id는 추측할 수 없는 임의 문자열 (<img src>로 바로 쓸 수 있도록 URL 자체가 접근 권한)
+- TTL 경과 / 메모리 한도 초과 시 오래된 결과부터 삭제
+"""
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import asyncio
+import secrets
+import time
+import logging
+
+from .image_processor import (
+    DEFAULT_OUTPUT_FORMATS, OutputFormat, PackedImage, encode_image, unpack_result
+)
+
+logger = logging.getLogger(__name__)
+
+# 다운로드 이미지 이름 (기본 PNG, 지연 인코딩)
+DOWNLOAD = "download"
+
+
+class StoredResult:
+    """
+    One comparison result: 인코딩된 이미지들 + (아직 인코딩하지 않은) 압축된 다운로드 결과.
+    """
+    __slots__ = ("images", "download_image", "download_format", "created_at", "size", "lock")
+
+    def __init__(
+        self,
+        images: Dict[str, Tuple[bytes, str]],
+        download_image: Optional[PackedImage],
+        download_format: OutputFormat
+    ):
+        self.images = images  # name -> (bytes, media type)
+        self.download_image = download_image
+        self.download_format = download_format
+        self.created_at = time.monotonic()
+        self.size = sum(len(data) for data, _ in images.values())
+        if download_image is not None:
+            self.size += download_image.nbytes
+        self.lock = asyncio.Lock()
+
+
+def _encode_download(packed: PackedImage, download_format: OutputFormat) -> Tuple[bytes, str]:
+    """압축된 결과를 복원해 다운로드 형식으로 인코딩 (스레드에서 실행)"""
+    return encode_image(unpack_result(packed), *download_format)
+
+
+class ResultStore:
+    """
+    In-memory TTL store of comparison result images.
+
+    이벤트 루프에서만 접근하므로 별도 lock 없음 (다운로드 인코딩만 결과별 lock으로 1회 보장).
+    """
+
+    def __init__(self, ttl_seconds: float = 600.0, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize result store.
+
+        Args:
+            ttl_seconds: 결과 URL 유효 시간
+            max_bytes: 보관할 최대 바이트 (인코딩된 이미지 + 인코딩 전 압축된 다운로드 결과)
+        """
+        self.ttl = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, StoredResult]" = OrderedDict()
+        self.total_bytes = 0
+
+        self.stored = 0
+        self.served = 0
+        self.expired = 0
+        self.evicted = 0
+        self.downloads_encoded = 0
+
+    def configure(self, ttl_seconds: Optional[float] = None, max_bytes: Optional[int] = None):
+        """Apply new settings (secrets.toml [gateway] 섹션에서 호출)."""
+        if ttl_seconds is not None:
+            self.ttl = ttl_seconds
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        self._purge()
+        logger.info(f"Result Store configured: TTL={self.ttl}s, max={self.max_bytes // (1024 * 1024)}MB")
+
+    def put(
+        self,
+        images: Dict[str, Tuple[bytes, str]],
+        download_image: Optional[PackedImage] = None,
+        download_format: OutputFormat = DEFAULT_OUTPUT_FORMATS[DOWNLOAD]
+    ) -> str:
+        """
+        Store one result.
+
+        Args:
+            images: 이름 → (인코딩된 바이트, media type). DOWNLOAD가 있으면 그대로 사용
+            download_image: DOWNLOAD를 요청받았을 때 복원 후 인코딩할 결과 (pack_result())
+            download_format: download_image 인코딩 형식 (기본 PNG)
+
+        Returns:
+            result id
+        """
+        result_id = secrets.token_urlsafe(16)
+        entry = StoredResult(images, download_image, download_format)
+        self._entries[result_id] = entry
+        self.total_bytes += entry.size
+        self.stored += 1
+        self._purge()
+        return result_id
+
+    async def get(self, result_id: str, name: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Get one image of a stored result (DOWNLOAD는 첫 요청 때 인코딩).
+
+        Returns:
+            (바이트, media type) 또는 None (없는 결과 / 만료 / 없는 이름)
+        """
+        self._purge()
+        entry = self._entries.get(result_id)
+        if entry is None:
+            return None
+
+        if name == DOWNLOAD and name not in entry.images and entry.download_image is not None:
+            async with entry.lock:
+                if name not in entry.images:
+                    # zlib 해제 / cv2.imencode는 GIL을 놓으므로 스레드에서 실행 (이벤트 루프 블록 방지)
+                    data, media_type = await asyncio.to_thread(
+                        _encode_download, entry.download_image, entry.download_format
+                    )
+                    delta = len(data) - entry.download_image.nbytes
+                    if self._entries.get(result_id) is entry:
+                        self._resize(entry, delta)
+                    else:
+                        # 인코딩 중에 만료 / 삭제된 결과는 total_bytes에서 이미 빠졌음 (이번 응답에만 사용)
+                        entry.size += delta
+                    entry.images[name] = (data, media_type)
+                    entry.download_image = None
+                    self.downloads_encoded += 1
+
+        image = entry.images.get(name)
+        if image is not None:
+            self.served += 1
+        return image
+
+    def _resize(self, entry: StoredResult, delta: int):
+        entry.size += delta
+        self.total_bytes += delta
+
+    def _purge(self):
+        """만료된 결과 삭제 후 max_bytes를 넘으면 오래된 결과부터 삭제 (모든 결과의 TTL이 같으므로 삽입 순서 = 만료 순서)."""
+        cutoff = time.monotonic() - self.ttl
+        while self._entries:
+            result_id, entry = next(iter(self._entries.items()))
+            if entry.created_at < cutoff:
+                self.expired += 1
+            elif self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                self.evicted += 1
+            else:
+                break
+            del self._entries[result_id]
+            self.total_bytes -= entry.size
+
+    def get_stats(self) -> dict:
+        """Get store statistics."""
+        self._purge()
+        return {
+            'results': len(self._entries),
+            'bytes': self.total_bytes,
+            'stored': self.stored,
+            'served': self.served,
+            'expired': self.expired,
+            'evicted': self.evicted,
+            'downloads_encoded': self.downloads_encoded
+        }
+
+
+# Global result store instance
+result_store = ResultStore()
@@ -0,0 +1,419 @@
+"""
+SSE Relay for FabriX streaming responses
+업스트림 바이트 스트림(aiter_bytes, Content-Encoding 해제 후)을 SSE 이벤트 경계 단위로 그대로 전달
+- 줄 단위 디코딩/재조합 없이 완성된 이벤트 바이트를 그대로 전달 (multi-line 이벤트 보존)
+- 선택적으로 작은 토큰 이벤트를 모아서 한 번에 write (coalescing)
+- 업스트림 읽기는 별도 task에서 실행, 크기 제한 버퍼로 느린 클라이언트에 backpressure 적용
+- 클라이언트 연결이 끊기면 업스트림 스트림을 즉시 취소
+"""
+from collections import deque
+from typing import AsyncIterator, Callable, List, Optional
+import asyncio
+import json
+import re
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# SSE 이벤트 경계 (빈 줄: "\n\n" 또는 "\r\n\r\n")
+_CRLF_BOUNDARY_RE = re.compile(rb"\r\n\r\n|\n\n")
+# 경계가 chunk 사이에 걸칠 수 있으므로 이전 buffer 끝에서 이만큼 되돌아가서 재탐색
+_BOUNDARY_OVERLAP = 3
+
+
+class SSEFrameParser:
+    """
+    Incremental splitter of an SSE byte stream at event boundaries.
+
+    이벤트를 하나씩 잘라내지 않고, 완성된 이벤트들을 하나의 연속된 블록으로 반환
+    (chunk가 이벤트 경계에서 끝나면 복사 없이 그대로 반환).
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        # CRLF 줄바꿈을 쓰는 스트림에서만 "\r\n\r\n" 경계를 추가로 탐색
+        self.has_cr = False
+
+    def _complete_end(self, data, start: int) -> int:
+        """End offset of the last complete frame in data (-1 if none)."""
+        end = data.rfind(b"\n\n", start)
+        end = end + 2 if end != -1 else -1
+        if self.has_cr:
+            crlf_end = data.rfind(b"\r\n\r\n", start)
+            if crlf_end != -1:
+                end = max(end, crlf_end + 4)
+        return end
+
+    def feed(self, chunk: bytes) -> Optional[bytes]:
+        """
+        Add upstream bytes.
+
+        Returns:
+            Every frame completed so far as one block (including the terminating
+            blank lines), or None if no frame is complete yet
+        """
+        if not self.has_cr and b"\r" in chunk:
+            self.has_cr = True
+
+        buffer = self._buffer
+        if not buffer:
+            # 빠른 경로: 이전에 남은 바이트가 없음
+            end = self._complete_end(chunk, 0)
+            if end == len(chunk):
+                return chunk
+            if end == -1:
+                buffer += chunk
+                return None
+            buffer += memoryview(chunk)[end:]
+            return chunk[:end]
+
+        scan = max(0, len(buffer) - _BOUNDARY_OVERLAP)
+        buffer += chunk
+        end = self._complete_end(buffer, scan)
+        if end == -1:
+            return None
+        block = bytes(buffer[:end])
+        del buffer[:end]
+        return block
+
+    def split(self, block: bytes) -> List[bytes]:
+        """Split a block returned by feed() into frames (without the blank lines)."""
+        frames = _CRLF_BOUNDARY_RE.split(block) if self.has_cr else block.split(b"\n\n")
+        frames.pop()  # 블록은 항상 경계로 끝나므로 마지막 항목은 빈 값
+        return frames
+
+    def flush(self) -> Optional[bytes]:
+        """Return a trailing frame that the upstream closed without a blank line."""
+        if not self._buffer.strip():
+            self._buffer.clear()
+            return None
+        frame = bytes(self._buffer).rstrip(b"\r\n") + b"\n\n"
+        self._buffer.clear()
+        return frame
+
+
+class RelaySettings:
+    """Relay settings shared by every streamed chat."""
+
+    def __init__(
+        self,
+        coalesce_max_bytes: int = 0,
+        coalesce_max_delay: float = 0.02,
+        max_buffer_bytes: int = 256 * 1024,
+        send_timeout: Optional[float] = 30.0
+    ):
+        """
+        Args:
+            coalesce_max_bytes: Pending bytes that trigger a write (0: no coalescing)
+            coalesce_max_delay: Maximum seconds a buffered event may wait
+            max_buffer_bytes: Bytes read ahead from upstream before reading pauses
+            send_timeout: Abort the stream when one write to the client takes longer
+        """
+        self.coalesce_max_bytes = coalesce_max_bytes
+        self.coalesce_max_delay = coalesce_max_delay
+        self.max_buffer_bytes = max_buffer_bytes
+        self.send_timeout = send_timeout
+
+    def configure(
+        self,
+        coalesce_max_bytes: Optional[int] = None,
+        coalesce_max_delay: Optional[float] = None,
+        max_buffer_bytes: Optional[int] = None,
+        send_timeout: Optional[float] = None
+    ):
+        """Apply new settings (secrets.toml [gateway] 섹션에서 호출)."""
+        if coalesce_max_bytes is not None:
+            self.coalesce_max_bytes = coalesce_max_bytes
+        if coalesce_max_delay is not None:
+            self.coalesce_max_delay = coalesce_max_delay
+        if max_buffer_bytes is not None:
+            self.max_buffer_bytes = max_buffer_bytes
+        if send_timeout is not None:
+            self.send_timeout = send_timeout or None
+        logger.info(
+            f"SSE relay configured: coalesce={self.coalesce_max_bytes} bytes, "
+            f"max delay={self.coalesce_max_delay * 1000:.0f}ms, "
+            f"buffer={self.max_buffer_bytes} bytes, send timeout={self.send_timeout}s"
+        )
+
+
+class StreamMetrics:
+    """
+    Counters for relayed chat streams (이벤트 루프에서만 갱신).
+    """
+
+    def __init__(self):
+        self.started = 0
+        self.completed = 0
+        self.client_disconnects = 0
+        self.aborted = 0
+        self.backpressure_waits = 0
+        self.peak_buffered_bytes = 0
+
+    @property
+    def active(self) -> int:
+        return self.started - self.completed - self.client_disconnects - self.aborted
+
+    def snapshot(self) -> dict:
+        """Get metrics as a dict."""
+        return {
+            'active': self.active,
+            'started': self.started,
+            'completed': self.completed,
+            'cancelled': self.client_disconnects + self.aborted,
+            'client_disconnects': self.client_disconnects,
+            'aborted': self.aborted,
+            'backpressure_waits': self.backpressure_waits,
+            'peak_buffered_bytes': self.peak_buffered_bytes
+        }
+
+
+class _RelayBuffer:
+    """Byte-bounded buffer between the upstream reader task and the client writer."""
+
+    def __init__(self, max_bytes: int, metrics: StreamMetrics):
+        self.max_bytes = max_bytes
+        self.metrics = metrics
+        self._blocks = deque()
+        self._size = 0
+        self._closed = False
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+
+    async def put(self, block: bytes):
+        # 버퍼가 차면 업스트림 읽기를 멈춤 (TCP 수신 윈도우로 FabriX에 backpressure 전달)
+        while self._size and self._size + len(block) > self.max_bytes:
+            self._writable.clear()
+            self.metrics.backpressure_waits += 1
+            await self._writable.wait()
+        self._blocks.append(block)
+        self._size += len(block)
+        if self._size > self.metrics.peak_buffered_bytes:
+            self.metrics.peak_buffered_bytes = self._size
+        self._readable.set()
+
+    async def get(self) -> Optional[bytes]:
+        """Everything buffered as one write (None when the upstream finished)."""
+        while not self._blocks:
+            if self._closed:
+                return None
+            self._readable.clear()
+            await self._readable.wait()
+
+        if len(self._blocks) == 1:
+            block = self._blocks.popleft()
+        else:
+            # 클라이언트가 느려서 쌓인 이벤트는 한 번에 전송
+            block = b"".join(self._blocks)
+            self._blocks.clear()
+        self._size = 0
+        self._writable.set()
+        return block
+
+    def close(self):
+        self._closed = True
+        self._readable.set()
+
+
+class BufferedRelay:
+    """
+    Runs the upstream read in its own task so it can be cancelled on client disconnect.
+
+    사용법: EventSourceResponse(
+        relay.stream(source),
+        client_close_handler_callable=relay.client_closed,
+        send_timeout=relay_settings.send_timeout
+    )
+    """
+
+    def __init__(self, max_buffer_bytes: Optional[int] = None, metrics: Optional["StreamMetrics"] = None):
+        """
+        Args:
+            max_buffer_bytes: Read-ahead limit (default: relay_settings.max_buffer_bytes)
+            metrics: Counters to update (default: global stream_metrics)
+        """
+        self.metrics = metrics or stream_metrics
+        self._buffer = _RelayBuffer(max_buffer_bytes or relay_settings.max_buffer_bytes, self.metrics)
+        self._task = None
+        self.disconnected = False
+
+    async def _produce(self, source: AsyncIterator[bytes]):
+        try:
+            async for block in source:
+                await self._buffer.put(block)
+        finally:
+            self._buffer.close()
+
+    async def stream(self, source: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """
+        Yield blocks produced by source, reading ahead at most max_buffer_bytes.
+
+        Args:
+            source: Upstream relay generator (relay_sse 등)
+        """
+        self.metrics.started += 1
+        self._task = asyncio.get_running_loop().create_task(self._produce(source))
+        finished = False
+        try:
+            while True:
+                block = await self._buffer.get()
+                if block is None:
+                    break
+                yield block
+            # 업스트림 task의 예외를 그대로 전달
+            await self._task
+            finished = True
+        finally:
+            if not finished:
+                await self._cancel_upstream()
+            if finished:
+                self.metrics.completed += 1
+            elif self.disconnected:
+                self.metrics.client_disconnects += 1
+            else:
+                # send timeout, 서버 종료, 업스트림 예외 등
+                self.metrics.aborted += 1
+
+    async def _cancel_upstream(self):
+        task = self._task
+        if task is None or task.done():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.debug(f"Upstream relay ended with error after cancel: {e}")
+
+    async def client_closed(self, message: dict):
+        """EventSourceResponse client_close_handler_callable: 업스트림 읽기를 즉시 중단."""
+        if self._task is not None and not self._task.done():
+            self.disconnected = True
+            logger.info("Client disconnected, cancelling upstream stream")
+            self._task.cancel()
+
+
+def frame_data(frame: bytes) -> Optional[bytes]:
+    """
+    Payload of the data: fields of one frame (여러 data 줄은 \\n으로 연결).
+
+    Args:
+        frame: One frame from SSEFrameParser.split()
+
+    Returns:
+        Data payload, or None for frames without data (comments, retry 등)
+    """
+    # 대부분의 이벤트는 "data: {...}" 한 줄이므로 빠른 경로
+    if frame.startswith(b"data:") and b"\n" not in frame:
+        return frame[6:] if frame.startswith(b"data: ") else frame[5:]
+
+    lines = []
+    for line in frame.splitlines():
+        if line.startswith(b"data:"):
+            value = line[5:]
+            lines.append(value[1:] if value.startswith(b" ") else value)
+    return b"\n".join(lines) if lines else None
+
+
+def sse_event(payload: dict) -> bytes:
+    """Encode a gateway-generated event (오류 알림 등) as one SSE frame."""
+    return b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n"
+
+
+async def relay_sse(
+    chunks: AsyncIterator[bytes],
+    on_data: Optional[Callable[[bytes], None]] = None,
+    coalesce_max_bytes: int = 0,
+    coalesce_max_delay: float = 0.02
+) -> AsyncIterator[bytes]:
+    """
+    Forward complete SSE frames from an upstream byte stream.
+
+    Args:
+        chunks: Upstream body (response.aiter_bytes(): gzip 등 Content-Encoding이 해제된 바이트)
+        on_data: Called with the data payload of every forwarded frame (사용량 집계)
+        coalesce_max_bytes: Buffer frames until this many bytes are pending
+            (0: write every upstream chunk's complete frames immediately)
+        coalesce_max_delay: Maximum seconds a buffered frame may wait
+
+    Yields:
+        Bytes ready to send to the client (frame boundaries preserved)
+    """
+    parser = SSEFrameParser()
+    pending = []
+    pending_bytes = 0
+    pending_since = 0.0
+    first = True
+
+    iterator = chunks.__aiter__()
+    next_chunk = None
+
+    def inspect(block: bytes):
+        for frame in parser.split(block):
+            data = frame_data(frame)
+            if data is not None:
+                on_data(data)
+
+    try:
+        while True:
+            if pending and coalesce_max_bytes > 0:
+                # 대기 중인 이벤트가 있으면 지연 한도까지만 다음 chunk를 기다림
+                if next_chunk is None:
+                    next_chunk = asyncio.ensure_future(iterator.__anext__())
+                remaining = coalesce_max_delay - (time.monotonic() - pending_since)
+                if remaining > 0:
+                    await asyncio.wait({next_chunk}, timeout=remaining)
+                if not next_chunk.done():
+                    yield b"".join(pending)
+                    pending.clear()
+                    pending_bytes = 0
+                    continue
+
+            try:
+                if next_chunk is not None:
+                    task, next_chunk = next_chunk, None
+                    chunk = await task
+                else:
+                    chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+
+            block = parser.feed(chunk)
+            if block is None:
+                continue
+
+            if coalesce_max_bytes <= 0 or first:
+                # 첫 이벤트는 TTFB를 위해 즉시 전달 (사용량 집계는 전송 후)
+                first = False
+                yield block
+            else:
+                if not pending:
+                    pending_since = time.monotonic()
+                pending.append(block)
+                pending_bytes += len(block)
+                if pending_bytes >= coalesce_max_bytes:
+                    yield b"".join(pending)
+                    pending.clear()
+                    pending_bytes = 0
+
+            if on_data is not None:
+                inspect(block)
+
+        tail = parser.flush()
+        if tail is not None:
+            pending.append(tail)
+            if on_data is not None:
+                inspect(tail)
+        if pending:
+            yield b"".join(pending)
+    finally:
+        if next_chunk is not None and not next_chunk.done():
+            next_chunk.cancel()
+
+
+# Global relay settings / metrics instances
+relay_settings = RelaySettings()
+stream_metrics = StreamMetrics()
@@ -0,0 +1,310 @@
+"""
+Tiled Image Compare - 대형 도면(A0 @ 300 DPI 등)을 원본 해상도로, 고정된 메모리 안에서 비교
+- 정렬: raster cache의 축소 페이지(≤ MAX_DIMENSION)로 호모그래피 계산 후 원본 좌표로 변환 (alignment cache 공유)
+- 비교: A를 tile 단위로 읽고, tile에 대응하는 B 영역(+ 보간용 여유)만 읽어 warp → compare_difference
+- PDF는 tile 영역만 렌더링(clip), 이미지/TIFF는 디코딩된 원본에서 잘라 씀 (원본 1장만 메모리에 있음)
+- 원본 해상도 결과는 tile 한 줄씩 PNG 스트림으로 압축 (원본 크기 버퍼 없음, download_base64 / download_image)
+- 화면 표시용 이미지(result / file1 / file2)는 tile마다 축소해 미리보기 캔버스(≤ preview_max_dimension)에 채움
+"""
+import math
+import struct
+import zlib
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+from .image_processor import (
+    DEFAULT_OUTPUT_FORMATS, MAX_DIMENSION, PREVIEW_MAX_DIMENSION, OutputFormat, compare_difference,
+    compare_images_overlay, encode_outputs, estimate_alignment, file_kind, load_cached, raster_key, tiff_to_image
+)
+
+logger = logging.getLogger(__name__)
+
+# tile 한 변 크기 (px)
+TILE_SIZE = 1024
+# PDF 렌더링 해상도 (페이지가 TILED_MAX_DIMENSION을 넘으면 그만큼 낮춤)
+TILED_DPI = 300
+TILED_MAX_DIMENSION = 30000
+# 원본 해상도 PNG 스트림 zlib 압축 레벨 (download 형식에 압축 레벨을 지정하지 않은 경우)
+PNG_LEVEL = 6
+# B 영역을 읽을 때 tile 경계 바깥으로 더 읽는 폭 (bilinear 보간용 겹침)
+TILE_OVERLAP = 2
+
+WHITE = (255, 255, 255)
+
+
+class PngStreamWriter:
+    """
+    행 단위로 받아 바로 압축하는 PNG(8-bit RGB) 인코더.
+    cv2.imencode는 전체 이미지가 메모리에 있어야 하므로 tile 비교 결과에는 사용하지 않음.
+    """
+
+    def __init__(self, width: int, height: int, level: int = PNG_LEVEL):
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(level)
+        self._chunks: List[bytes] = [b"\x89PNG\r\n\x1a\n"]
+        # IHDR: 8-bit, color type 2 (RGB), deflate, adaptive filter, no interlace
+        self._add_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def _add_chunk(self, kind: bytes, data: bytes):
+        self._chunks.append(struct.pack(">I", len(data)) + kind + data
+                            + struct.pack(">I", zlib.crc32(kind + data)))
+
+    def write_rows(self, rows_bgr: np.ndarray):
+        """BGR 행 묶음 (h, width, 3) 추가 (각 행 앞에 filter 0 바이트)"""
+        h = rows_bgr.shape[0]
+        raw = np.empty((h, 1 + self.width * 3), np.uint8)
+        raw[:, 0] = 0
+        raw[:, 1:].reshape(h, self.width, 3)[:] = rows_bgr[:, :, ::-1]
+        data = self._compressor.compress(raw.tobytes())
+        if data:
+            self._add_chunk(b"IDAT", data)
+        self.rows_written += h
+
+    def finish(self) -> bytes:
+        if self.rows_written != self.height:
+            raise ValueError(f"PNG rows written {self.rows_written} != height {self.height}")
+        self._add_chunk(b"IDAT", self._compressor.flush())
+        self._add_chunk(b"IEND", b"")
+        return b"".join(self._chunks)
+
+
+class PdfPageSource:
+    """PDF 한 페이지를 필요한 영역만 렌더링하는 tile source."""
+
+    def __init__(self, pdf_bytes: bytes, page_num: int, dpi: int):
+        self.document = fitz.open(stream=pdf_bytes, filetype="pdf")
+        if page_num >= self.document.page_count:
+            page_num = 0  # pdf_to_image()와 동일
+        try:
+            self.page = self.document[page_num]
+        except Exception:
+            self.document.close()
+            raise
+        rect = self.page.rect
+        zoom = min(dpi / 72, TILED_MAX_DIMENSION / max(rect.width, rect.height))
+        self.matrix = fitz.Matrix(zoom, zoom)
+        bounds = (rect * self.matrix).irect
+        self.width, self.height = bounds.width, bounds.height
+
+    def read(self, x: int, y: int, w: int, h: int) -> np.ndarray:
+        clip = fitz.Rect(x, y, x + w, y + h) * ~self.matrix
+        pix = self.page.get_pixmap(matrix=self.matrix, clip=clip)
+        img = np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width, pix.n)
+        img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+        if img.shape[:2] != (h, w):
+            # clip 반올림으로 1px 차이가 날 수 있음 → 흰색으로 채우거나 잘라서 맞춤
+            img = cv2.copyMakeBorder(
+                img[:h, :w], 0, max(0, h - img.shape[0]), 0, max(0, w - img.shape[1]),
+                cv2.BORDER_CONSTANT, value=WHITE
+            )
+        return img
+
+    def close(self):
+        self.document.close()
+
+
+class ArraySource:
+    """디코딩된 이미지 / TIFF 페이지 tile source (잘라낸 view 반환, 복사 없음)."""
+
+    def __init__(self, img: np.ndarray):
+        self.img = img
+        self.height, self.width = img.shape[:2]
+
+    def read(self, x: int, y: int, w: int, h: int) -> np.ndarray:
+        return self.img[y:y + h, x:x + w]
+
+    def close(self):
+        self.img = None
+
+
+def open_source(file_bytes: bytes, content_type: str, page_num: int, dpi: int = TILED_DPI):
+    """파일 타입에 맞는 tile source (PDF는 dpi로 렌더링, 이미지/TIFF는 원본 해상도)"""
+    try:
+        kind = file_kind(content_type)
+        if kind == "pdf":
+            return PdfPageSource(file_bytes, page_num, dpi)
+        if kind == "tiff":
+            return ArraySource(tiff_to_image(file_bytes, page_num)[0])
+        img = cv2.imdecode(np.frombuffer(file_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("이미지 디코딩 실패")
+        return ArraySource(img)
+    except Exception as e:
+        logger.error(f"파일 로드 실패: {str(e)}")
+        raise ValueError(f"파일 로드 실패: {str(e)}")
+
+
+def _pixel_scale(scale_x: float, scale_y: float) -> np.ndarray:
+    """원본 → 축소 이미지 좌표 변환 (픽셀 중심 기준)"""
+    return np.array([
+        [scale_x, 0, 0.5 * scale_x - 0.5],
+        [0, scale_y, 0.5 * scale_y - 0.5],
+        [0, 0, 1]
+    ])
+
+
+def _translation(x: float, y: float) -> np.ndarray:
+    return np.array([[1, 0, x], [0, 1, y], [0, 0, 1]], dtype=np.float64)
+
+
+def _fallback_homography(source1, source2) -> np.ndarray:
+    """fallback_align()과 같은 배치 (B를 A 안에 비율 유지해 가운데 맞춤)"""
+    scale = min(source1.width / source2.width, source1.height / source2.height)
+    x_off = (source1.width - int(source2.width * scale)) // 2
+    y_off = (source1.height - int(source2.height * scale)) // 2
+    return np.array([[scale, 0, x_off], [0, scale, y_off], [0, 0, 1]], dtype=np.float64)
+
+
+def _source_region(H_inv: np.ndarray, x: int, y: int, w: int, h: int, source) -> Tuple[int, int, int, int]:
+    """A의 tile (x, y, w, h)에 대응하는 B 영역 (TILE_OVERLAP만큼 넓히고 B 범위로 자름)"""
+    corners = np.float64([[x, y], [x + w, y], [x, y + h], [x + w, y + h]]).reshape(-1, 1, 2)
+    mapped = cv2.perspectiveTransform(corners, H_inv).reshape(-1, 2)
+    x0 = max(0, math.floor(mapped[:, 0].min()) - TILE_OVERLAP)
+    y0 = max(0, math.floor(mapped[:, 1].min()) - TILE_OVERLAP)
+    x1 = min(source.width, math.ceil(mapped[:, 0].max()) + TILE_OVERLAP + 1)
+    y1 = min(source.height, math.ceil(mapped[:, 1].max()) + TILE_OVERLAP + 1)
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def _paste_preview(canvas: np.ndarray, tile: np.ndarray, x: int, y: int, scale: float):
+    h, w = tile.shape[:2]
+    px0, py0 = round(x * scale), round(y * scale)
+    px1, py1 = round((x + w) * scale), round((y + h) * scale)
+    if px1 > px0 and py1 > py0:
+        canvas[py0:py1, px0:px1] = cv2.resize(tile, (px1 - px0, py1 - py0), interpolation=cv2.INTER_AREA)
+
+
+def compare_tiled(
+    file1_bytes: bytes,
+    file1_type: str,
+    file2_bytes: bytes,
+    file2_type: str,
+    mode: str = "difference",
+    diff_threshold: int = 30,
+    feature_count: int = 4000,
+    page1: int = 0,
+    page2: int = 0,
+    bin_threshold: int = 200,
+    alignment: str = "orb",
+    response_format: str = "json",
+    output_formats: Optional[Dict[str, OutputFormat]] = None,
+    preview_max_dimension: int = PREVIEW_MAX_DIMENSION,
+    tile_size: int = TILE_SIZE,
+    dpi: int = TILED_DPI
+) -> dict:
+    """
+    원본 해상도 tile 비교 (process_comparison()의 대형 도면용 버전)
+
+    Args:
+        (process_comparison()과 동일)
+        tile_size: tile 한 변 크기 (px)
+        dpi: PDF 렌더링 해상도
+
+    Returns:
+        process_comparison()과 같은 형식
+        - result_base64 / file1_base64 / file2_base64: 미리보기 (≤ preview_max_dimension, 0이면 MAX_DIMENSION)
+        - download_base64: 원본 해상도 PNG (스트림 압축이므로 PNG만 지원, 품질 = 압축 레벨)
+          (response_format="url"이면 download_image가 이미 인코딩된 PNG 바이트)
+        - metadata: tiled, tile_size, tiles, preview_size 추가
+    """
+    output_formats = output_formats or DEFAULT_OUTPUT_FORMATS
+    download_format = output_formats["download"]
+    if download_format.format != "PNG":
+        raise ValueError("tile 비교의 다운로드 이미지는 PNG만 지원합니다")
+
+    # 1. 정렬: 축소 페이지(raster cache)로 호모그래피 계산
+    key1 = raster_key(file1_bytes, file1_type, page1)
+    key2 = raster_key(file2_bytes, file2_type, page2)
+    thumb1, pages1, _ = load_cached(file1_bytes, file1_type, page1, key=key1)
+    thumb2, pages2, _ = load_cached(file2_bytes, file2_type, page2, key=key2)
+    H_thumb, quality = estimate_alignment(
+        thumb1, thumb2, feature_count, cache_keys=(key1, key2), method=alignment
+    )
+
+    source1 = open_source(file1_bytes, file1_type, page1, dpi)
+    try:
+        source2 = open_source(file2_bytes, file2_type, page2, dpi)
+    except Exception:
+        source1.close()
+        raise
+    try:
+        alignment_failed = bool(H_thumb is None or quality < 0.3)
+        if alignment_failed:
+            logger.warning("ORB 정렬 실패, 폴백 정렬 사용")
+            H = _fallback_homography(source1, source2)
+        else:
+            # 원본 B → 축소 B → (H_thumb) → 축소 A → 원본 A
+            S1 = _pixel_scale(thumb1.shape[1] / source1.width, thumb1.shape[0] / source1.height)
+            S2 = _pixel_scale(thumb2.shape[1] / source2.width, thumb2.shape[0] / source2.height)
+            H = np.linalg.inv(S1) @ H_thumb @ S2
+        H_inv = np.linalg.inv(H)
+
+        width, height = source1.width, source1.height
+        preview_scale = min(1.0, (preview_max_dimension or MAX_DIMENSION) / max(width, height))
+        preview_shape = (max(1, round(height * preview_scale)), max(1, round(width * preview_scale)), 3)
+        previews = [np.full(preview_shape, 255, np.uint8) for _ in range(3)]
+        logger.info(f"Tile 비교: {width}x{height}, tile {tile_size}px, 미리보기 {preview_shape[1]}x{preview_shape[0]}")
+
+        # 2. tile 단위 warp + 비교, 결과는 tile 한 줄(band)씩 PNG 스트림에 기록
+        level = PNG_LEVEL if download_format.quality is None else download_format.quality
+        png = PngStreamWriter(width, height, level)
+        band = np.empty((min(tile_size, height), width, 3), np.uint8)
+        tiles = 0
+        for y in range(0, height, tile_size):
+            h = min(tile_size, height - y)
+            for x in range(0, width, tile_size):
+                w = min(tile_size, width - x)
+                tile1 = source1.read(x, y, w, h)
+
+                bx, by, bw, bh = _source_region(H_inv, x, y, w, h, source2)
+                if bw > 0 and bh > 0:
+                    H_tile = _translation(-x, -y) @ H @ _translation(bx, by)
+                    tile2 = cv2.warpPerspective(
+                        source2.read(bx, by, bw, bh), H_tile, (w, h),
+                        flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=WHITE
+                    )
+                else:
+                    tile2 = np.full((h, w, 3), 255, np.uint8)
+
+                if mode == "overlay":
+                    outputs = (compare_images_overlay(tile1, tile2, bin_thresh=bin_threshold), tile1, tile2)
+                else:
+                    outputs = compare_difference(tile1, tile2, diff_thresh=diff_threshold, bin_thresh=bin_threshold)
+
+                band[:h, x:x + w] = outputs[0]
+                for canvas, tile in zip(previews, outputs):
+                    _paste_preview(canvas, tile, x, y, preview_scale)
+                tiles += 1
+            png.write_rows(band[:h])
+
+        # 3. 인코딩
+        logger.info("이미지 인코딩 중...")
+        download = png.finish()
+    finally:
+        source1.close()
+        source2.close()
+
+    outputs = encode_outputs(
+        *previews, response_format, download_png=download,
+        output_formats=output_formats, preview_max_dimension=preview_max_dimension
+    )
+    outputs["metadata"] = {
+        "mode": mode,
+        "alignment": alignment,
+        "match_quality": quality,
+        "alignment_failed": alignment_failed,
+        "result_size": f"{width}x{height}",
+        "file1_pages": pages1,
+        "file2_pages": pages2,
+        "tiled": True,
+        "tile_size": tile_size,
+        "tiles": tiles,
+        "preview_size": f"{preview_shape[1]}x{preview_shape[0]}"
+    }
+    return outputs
@@ -0,0 +1,193 @@
+"""
+Token Cache for Gateway Authentication
+검증된 토큰(positive)과 거부된 토큰(negative)을 LRU + TTL로 캐싱하여
+요청마다 Django DB를 조회하지 않도록 함
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Optional, Tuple
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCache:
+    """
+    Thread-safe LRU + TTL cache for validated authentication tokens.
+
+    - Positive entries: 검증 성공한 토큰 (ttl_seconds 동안 유지)
+    - Negative entries: 거부된 토큰 (negative_ttl_seconds 동안 유지, 무차별 대입 시 DB 보호)
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl_seconds: float = 60.0,
+        negative_maxsize: int = 1024,
+        negative_ttl_seconds: float = 5.0
+    ):
+        """
+        Initialize token cache.
+
+        Args:
+            maxsize: Maximum number of validated tokens kept in memory
+            ttl_seconds: Lifetime of a validated token entry
+            negative_maxsize: Maximum number of rejected tokens kept in memory
+            negative_ttl_seconds: Lifetime of a rejected token entry (0 disables)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self.negative_maxsize = negative_maxsize
+        self.negative_ttl = negative_ttl_seconds
+
+        # token -> (expires_at, value)
+        self._positive = OrderedDict()
+        # token -> expires_at
+        self._negative = OrderedDict()
+        self.lock = Lock()
+        # invalidate / clear 할 때마다 증가 (무효화 전에 시작된 DB 조회 결과를 다시 캐싱하지 않도록)
+        self.generation = 0
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def configure(
+        self,
+        maxsize: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        negative_maxsize: Optional[int] = None,
+        negative_ttl_seconds: Optional[float] = None
+    ):
+        """Apply new limits (secrets.toml [gateway] 섹션에서 호출) and drop cached entries."""
+        with self.lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl_seconds is not None:
+                self.ttl = ttl_seconds
+            if negative_maxsize is not None:
+                self.negative_maxsize = negative_maxsize
+            if negative_ttl_seconds is not None:
+                self.negative_ttl = negative_ttl_seconds
+            self._positive.clear()
+            self._negative.clear()
+            self.generation += 1
+
+        logger.info(
+            f"Token Cache configured: size={self.maxsize}, TTL={self.ttl}s, "
+            f"negative size={self.negative_maxsize}, negative TTL={self.negative_ttl}s"
+        )
+
+    def get(self, token: str) -> Tuple[Optional[bool], Any]:
+        """
+        Look up a token.
+
+        Returns:
+            (True, value) if the token is cached as valid,
+            (False, None) if the token is cached as rejected,
+            (None, None) on a cache miss
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self._positive.get(token)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._positive.move_to_end(token)
+                    self.hits += 1
+                    return True, value
+                del self._positive[token]
+
+            expires_at = self._negative.get(token)
+            if expires_at is not None:
+                if expires_at > now:
+                    self.negative_hits += 1
+                    return False, None
+                del self._negative[token]
+
+            self.misses += 1
+            return None, None
+
+    def set_valid(self, token: str, value: Any = True, generation: Optional[int] = None):
+        """
+        Cache a token that passed DB verification.
+
+        Args:
+            token: 검증된 토큰
+            value: 토큰의 user id
+            generation: DB 조회 시작 시점의 self.generation (그 사이 무효화가 있었으면 캐싱하지 않음)
+        """
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._negative.pop(token, None)
+            self._positive[token] = (time.monotonic() + self.ttl, value)
+            self._positive.move_to_end(token)
+            while len(self._positive) > self.maxsize:
+                self._positive.popitem(last=False)
+
+    def set_invalid(self, token: str):
+        """Cache a token that was rejected by DB verification."""
+        if self.negative_maxsize <= 0 or self.negative_ttl <= 0:
+            return
+        with self.lock:
+            self._negative[token] = time.monotonic() + self.negative_ttl
+            self._negative.move_to_end(token)
+            while len(self._negative) > self.negative_maxsize:
+                self._negative.popitem(last=False)
+
+    def invalidate(self, token: str) -> bool:
+        """
+        Drop a token from both tiers (e.g. Django에서 토큰이 삭제된 경우).
+
+        Returns:
+            True if the token was cached
+        """
+        with self.lock:
+            removed = self._positive.pop(token, None) is not None
+            removed = (self._negative.pop(token, None) is not None) or removed
+            self.invalidations += 1
+            self.generation += 1
+        if removed:
+            logger.info("Token invalidated from cache")
+        return removed
+
+    def clear(self):
+        """Drop every cached token."""
+        with self.lock:
+            self._positive.clear()
+            self._negative.clear()
+            self.invalidations += 1
+            self.generation += 1
+            logger.info("Token cache cleared")
+
+    def get_stats(self) -> dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            dict with sizes, limits and hit/miss counters
+        """
+        with self.lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                'size': len(self._positive),
+                'negative_size': len(self._negative),
+                'maxsize': self.maxsize,
+                'negative_maxsize': self.negative_maxsize,
+                'ttl_seconds': self.ttl,
+                'negative_ttl_seconds': self.negative_ttl,
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_ratio': round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0
+            }
+
+
+# Global token cache instance
+token_cache = TokenCache()
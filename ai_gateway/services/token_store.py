@@ -0,0 +1,213 @@
+"""
+Token Store for Gateway Authentication
+Django DB(authtoken_token)를 조회하는 읽기 전용 SQLite 커넥션 풀
+- 전용 스레드마다 장기 유지 커넥션 1개 (요청마다 connect/close 하지 않음)
+- 채팅 세션 소유자 확인도 같은 풀에서 조회 (메시지 writer 스레드의 배치 쓰기를 기다리지 않음)
+- DB 파일이 교체되면 (백업 복원 등) 자동으로 커넥션 재생성
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock, local
+from typing import Optional
+import asyncio
+import os
+import sqlite3
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 커넥션별 statement cache에 한 번만 prepare 되도록 동일한 SQL 문자열 사용
+LOOKUP_SQL = "SELECT user_id FROM authtoken_token WHERE key = ?"
+OWNER_SQL = "SELECT user_id FROM fabrix_agent_chat_chatsession WHERE id = ?"
+
+
+class TokenStoreUnavailable(Exception):
+    """Raised when the authentication DB cannot be opened."""
+
+
+class TokenStore:
+    """
+    Pool of long-lived, per-thread, read-only SQLite connections.
+
+    조회는 pool_size 개의 전용 스레드에서만 실행되므로 커넥션 수가 고정됨.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        pool_size: int = 2,
+        mmap_size: int = 64 * 1024 * 1024,
+        check_interval_seconds: float = 2.0
+    ):
+        """
+        Initialize token store.
+
+        Args:
+            db_path: Path to Django db.sqlite3
+            pool_size: Number of dedicated lookup threads (= connections)
+            mmap_size: PRAGMA mmap_size for each connection (bytes)
+            check_interval_seconds: How often to check whether the DB file was replaced
+        """
+        self.db_path = Path(db_path)
+        self.pool_size = pool_size
+        self.mmap_size = mmap_size
+        self.check_interval = check_interval_seconds
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size, thread_name_prefix="token-db"
+        )
+        self._local = local()
+        self._lock = Lock()
+        self._connections = []
+
+        # DB 파일 식별자 (교체 감지용)
+        self._generation = 0
+        self._file_id = None
+        self._last_check = 0.0
+
+        self.lookups = 0
+        self.owner_lookups = 0
+        self.connects = 0
+        self.reconnects = 0
+
+        logger.info(
+            f"Token Store initialized: pool={pool_size}, mmap={mmap_size} bytes, "
+            f"DB={self.db_path}"
+        )
+
+    def _stat_file_id(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.db_path)
+        except FileNotFoundError:
+            return None
+        # ctime은 쓰기마다 바뀌므로 (채팅 메시지 저장 등) 교체 여부는 장치 + inode로만 판단
+        return (st.st_dev, st.st_ino)
+
+    def _check_replaced(self):
+        """Bump the generation if the DB file was replaced since the last check."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            if now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            file_id = self._stat_file_id()
+            if file_id != self._file_id:
+                if self._file_id is not None:
+                    logger.warning("Authentication DB file changed, reopening connections")
+                self._file_id = file_id
+                self._generation += 1
+
+    def _open(self) -> sqlite3.Connection:
+        if not self.db_path.exists():
+            raise TokenStoreUnavailable(f"Authentication DB not found at {self.db_path}")
+
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro",
+            uri=True,
+            check_same_thread=False,  # shutdown 시 메인 스레드에서 close
+            cached_statements=16
+        )
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+
+        with self._lock:
+            self._connections.append(conn)
+            self.connects += 1
+        return conn
+
+    def _close_thread_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is None:
+            return
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _get_connection(self) -> sqlite3.Connection:
+        self._check_replaced()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.generation == self._generation:
+            return conn
+
+        if conn is not None:
+            self._close_thread_connection()
+            with self._lock:
+                self.reconnects += 1
+
+        conn = self._open()
+        self._local.conn = conn
+        self._local.generation = self._generation
+        return conn
+
+    def _lookup(self, sql: str, key) -> Optional[int]:
+        """Run an indexed single-value lookup on the current pool thread (retry once on a stale connection)."""
+        for attempt in range(2):
+            conn = self._get_connection()
+            try:
+                row = conn.execute(sql, (key,)).fetchone()
+                return row[0] if row is not None else None
+            except sqlite3.DatabaseError as e:
+                # 파일 교체/손상 등으로 커넥션이 무효화된 경우 재연결
+                logger.warning(f"Token lookup failed, reconnecting: {e}")
+                self._close_thread_connection()
+                with self._lock:
+                    self._last_check = 0.0
+                if attempt == 1:
+                    raise
+        return None
+
+    async def lookup(self, token: str) -> Optional[int]:
+        """
+        Resolve a token to its Django user id (None if the token does not exist).
+
+        Raises:
+            TokenStoreUnavailable: DB file is missing
+            sqlite3.Error: lookup failed after reconnecting
+        """
+        self.lookups += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._lookup, LOOKUP_SQL, token)
+
+    async def session_owner(self, session_id: int) -> Optional[int]:
+        """
+        Look up the owner of a chat session.
+
+        Returns:
+            Django user id, or None if the session does not exist
+        """
+        self.owner_lookups += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._lookup, OWNER_SQL, session_id)
+
+    def get_stats(self) -> dict:
+        """Get pool statistics."""
+        with self._lock:
+            return {
+                'pool_size': self.pool_size,
+                'open_connections': len(self._connections),
+                'lookups': self.lookups,
+                'owner_lookups': self.owner_lookups,
+                'connects': self.connects,
+                'reconnects': self.reconnects,
+                'generation': self._generation
+            }
+
+    def close(self):
+        """Shut down lookup threads and close every connection."""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        logger.info("Token Store closed")
@@ -0,0 +1,111 @@
+"""
+Token Usage Tracking
+FabriX 응답에서 실제 토큰 사용량을 추출하여 Rate Limiter 예약값을 보정
+- 응답에 usage 정보가 있으면 그 값을 사용
+- 없으면 프롬프트 + 스트리밍된 답변 글자 수로 추정 (4글자 ≈ 1토큰)
+"""
+from typing import Any, Optional, Union
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+# FabriX/OpenAI 계열 응답에서 사용되는 usage 필드 이름
+USAGE_CONTAINER_KEYS = ("usage", "tokenUsage", "token_usage")
+TOTAL_TOKEN_KEYS = ("total_tokens", "totalTokens", "totalTokenCount", "total_token_count")
+
+
+def estimate_tokens(text_length: int) -> int:
+    """Estimate the token count of text by its character length."""
+    return text_length // CHARS_PER_TOKEN
+
+
+def extract_usage_tokens(data: Any) -> Optional[int]:
+    """
+    Find a reported total token count in a response payload.
+
+    Returns:
+        Total tokens if the payload reports usage, otherwise None
+    """
+    if not isinstance(data, dict):
+        return None
+
+    for key in TOTAL_TOKEN_KEYS:
+        value = data.get(key)
+        if isinstance(value, int):
+            return value
+
+    for container_key in USAGE_CONTAINER_KEYS:
+        usage = data.get(container_key)
+        if isinstance(usage, dict):
+            for key in TOTAL_TOKEN_KEYS:
+                value = usage.get(key)
+                if isinstance(value, int):
+                    return value
+            # prompt/completion만 있는 경우 합산
+            prompt = usage.get("prompt_tokens", usage.get("promptTokens"))
+            completion = usage.get("completion_tokens", usage.get("completionTokens"))
+            if isinstance(prompt, int) and isinstance(completion, int):
+                return prompt + completion
+    return None
+
+
+class StreamUsageTracker:
+    """
+    Accumulates token usage while relaying a streamed answer.
+    """
+
+    def __init__(self, prompt_tokens: int, collect_text: bool = False):
+        """
+        Args:
+            prompt_tokens: Estimated tokens of the prompt sent upstream
+            collect_text: Keep the streamed content to rebuild the final answer
+        """
+        self.prompt_tokens = prompt_tokens
+        self.completion_chars = 0
+        self.reported_tokens = None
+        self._parts = [] if collect_text else None
+
+    def feed_event(self, data: Union[str, bytes]):
+        """Inspect the payload of one SSE data event (relay는 bytes 그대로 전달)."""
+        try:
+            event = json.loads(data)
+        except ValueError:
+            if isinstance(data, bytes):
+                data = data.decode("utf-8", "replace")
+            self.completion_chars += len(data)
+            return
+
+        if not isinstance(event, dict):
+            return
+
+        content = event.get("content")
+        if isinstance(content, str):
+            self.completion_chars += len(content)
+            if self._parts is not None and content:
+                self._parts.append(content)
+
+        reported = extract_usage_tokens(event)
+        if reported is not None:
+            self.reported_tokens = reported
+
+    def feed_response(self, data: Any):
+        """Inspect a non-streamed JSON response."""
+        reported = extract_usage_tokens(data)
+        if reported is not None:
+            self.reported_tokens = reported
+            return
+        if isinstance(data, dict) and isinstance(data.get("content"), str):
+            self.completion_chars += len(data["content"])
+
+    def text(self) -> str:
+        """Final answer assembled from streamed content (collect_text=True일 때)."""
+        return "".join(self._parts) if self._parts else ""
+
+    def total_tokens(self) -> int:
+        """Reported usage if available, otherwise prompt + streamed answer estimate."""
+        if self.reported_tokens is not None:
+            return self.reported_tokens
+        return self.prompt_tokens + estimate_tokens(self.completion_chars)
@@ -0,0 +1,424 @@
+"""
+Streaming Upload Proxy for FabriX file analysis
+브라우저의 multipart 요청 바디를 받는 즉시 FabriX multipart 바디로 전달
+- UploadFile(임시 파일 spooling) 없이 chunk 단위로 전달 → 메모리 사용량 일정, 업스트림 전송 즉시 시작
+- 파일 크기 제한은 받는 도중에 확인 (초과 시 바로 중단)
+"""
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import os
+import logging
+
+try:
+    import python_multipart as multipart
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:
+    import multipart
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import parse_options_header
+
+logger = logging.getLogger(__name__)
+
+# 이벤트 종류 (MultipartStreamReader.events)
+FIELD = "field"
+FILE_START = "file_start"
+FILE_DATA = "file_data"
+FILE_END = "file_end"
+
+
+class UploadError(Exception):
+    """Upload rejected by the proxy (status_code: HTTP status to return)."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class UploadSettings:
+    """Limits shared by every proxied upload."""
+
+    def __init__(
+        self,
+        max_file_bytes: int = 200 * 1024 * 1024,
+        max_field_bytes: int = 1024 * 1024,
+        spool_max_bytes: int = 1024 * 1024
+    ):
+        """
+        Args:
+            max_file_bytes: Maximum size of the uploaded file
+            max_field_bytes: Maximum size of each text field (contents 등)
+            spool_max_bytes: Uploads kept in memory up to this size before spilling to disk
+                (비동기 작업으로 제출된 업로드만 spooling)
+        """
+        self.max_file_bytes = max_file_bytes
+        self.max_field_bytes = max_field_bytes
+        self.spool_max_bytes = spool_max_bytes
+
+    def configure(
+        self,
+        max_file_bytes: Optional[int] = None,
+        max_field_bytes: Optional[int] = None,
+        spool_max_bytes: Optional[int] = None
+    ):
+        """Apply new limits (secrets.toml [gateway] 섹션에서 호출)."""
+        if max_file_bytes is not None:
+            self.max_file_bytes = max_file_bytes
+        if max_field_bytes is not None:
+            self.max_field_bytes = max_field_bytes
+        if spool_max_bytes is not None:
+            self.spool_max_bytes = spool_max_bytes
+        logger.info(
+            f"Upload proxy configured: max file={self.max_file_bytes} bytes, "
+            f"max field={self.max_field_bytes} bytes"
+        )
+
+
+class MultipartStreamReader:
+    """
+    Incremental multipart/form-data parser producing events per received chunk.
+    """
+
+    def __init__(self, content_type: Optional[str], max_file_bytes: int, max_field_bytes: int):
+        mime, params = parse_options_header(content_type or "")
+        if mime != b"multipart/form-data" or b"boundary" not in params:
+            raise UploadError(400, "Expected multipart/form-data with a boundary")
+
+        self.max_file_bytes = max_file_bytes
+        self.max_field_bytes = max_field_bytes
+        self.file_bytes = 0
+
+        self._events = []
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._part_content_type = b""
+        self._field_name = None
+        self._field_data = None  # 텍스트 필드면 bytearray, 파일이면 None
+        self._files = 0
+
+        self._parser = multipart.MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+
+    def _on_part_begin(self):
+        self._disposition = b""
+        self._part_content_type = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        name = self._header_name.lower()
+        if name == b"content-disposition":
+            self._disposition = self._header_value
+        elif name == b"content-type":
+            self._part_content_type = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        if b"name" not in options:
+            raise UploadError(400, 'The Content-Disposition header field "name" must be provided')
+        self._field_name = options[b"name"].decode("utf-8", "replace")
+
+        if b"filename" in options:
+            self._files += 1
+            if self._files > 1:
+                raise UploadError(400, "Only one file can be uploaded")
+            self._field_data = None
+            self._events.append((
+                FILE_START,
+                self._field_name,
+                options[b"filename"].decode("utf-8", "replace"),
+                self._part_content_type.decode("latin-1") or "application/octet-stream"
+            ))
+        else:
+            self._field_data = bytearray()
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._field_data is not None:
+            if len(self._field_data) + end - start > self.max_field_bytes:
+                raise UploadError(413, f"Form field '{self._field_name}' exceeds {self.max_field_bytes} bytes")
+            self._field_data += data[start:end]
+            return
+
+        self.file_bytes += end - start
+        if self.file_bytes > self.max_file_bytes:
+            raise UploadError(413, f"File exceeds the maximum upload size of {self.max_file_bytes} bytes")
+        self._events.append((FILE_DATA, data[start:end]))
+
+    def _on_part_end(self):
+        if self._field_data is not None:
+            self._events.append((FIELD, self._field_name, self._field_data.decode("utf-8", "replace")))
+            self._field_data = None
+        else:
+            self._events.append((FILE_END,))
+
+    async def events(self, stream: AsyncIterator[bytes]) -> AsyncIterator[tuple]:
+        """
+        Parse a request body stream.
+
+        Yields:
+            (FIELD, name, value), (FILE_START, name, filename, content_type),
+            (FILE_DATA, bytes), (FILE_END,)
+        """
+        try:
+            async for chunk in stream:
+                self._parser.write(chunk)
+                if self._events:
+                    events, self._events = self._events, []
+                    for event in events:
+                        yield event
+            self._parser.finalize()
+        except FormParserError as e:
+            raise UploadError(400, f"Malformed multipart body: {e}")
+        for event in self._events:
+            yield event
+        self._events = []
+
+
+def _quote(value: str) -> str:
+    # HTML5 multipart 인코딩 규칙 (httpx와 동일)
+    return value.replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+class MultipartBodyWriter:
+    """Encodes the upstream multipart/form-data body piece by piece."""
+
+    def __init__(self):
+        self.boundary = os.urandom(16).hex().encode("ascii")
+        self.content_type = f"multipart/form-data; boundary={self.boundary.decode('ascii')}"
+
+    def field(self, name: str, value: str) -> bytes:
+        return (
+            b"--" + self.boundary + b"\r\n"
+            + f'Content-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'.encode("utf-8")
+            + value.encode("utf-8") + b"\r\n"
+        )
+
+    def file_header(self, name: str, filename: str, content_type: str) -> bytes:
+        return (
+            b"--" + self.boundary + b"\r\n"
+            + f'Content-Disposition: form-data; name="{_quote(name)}"; filename="{_quote(filename)}"\r\n'.encode("utf-8")
+            + f"Content-Type: {content_type}\r\n\r\n".encode("latin-1")
+        )
+
+    def file_end(self) -> bytes:
+        return b"\r\n"
+
+    def end(self) -> bytes:
+        return b"--" + self.boundary + b"--\r\n"
+
+
+class StreamingUpload:
+    """
+    Proxies one browser upload into an upstream multipart body.
+
+    1. read_until_file(): 파일 앞에 온 텍스트 필드를 읽음 (rate limit 추정 등에 사용)
+    2. upstream_body(): 파일 chunk를 받는 대로 업스트림 바디로 전달, 파일 뒤의 필드도 이어서 전달
+    """
+
+    def __init__(
+        self,
+        content_type: Optional[str],
+        stream: AsyncIterator[bytes],
+        max_file_bytes: int,
+        max_field_bytes: int
+    ):
+        self.reader = MultipartStreamReader(content_type, max_file_bytes, max_field_bytes)
+        self.writer = MultipartBodyWriter()
+        self.fields: Dict[str, str] = {}
+        self.file: Optional[Tuple[str, str, str]] = None  # (field name, filename, content type)
+        self._events = self.reader.events(stream).__aiter__()
+
+    @property
+    def content_type(self) -> str:
+        """Content-Type header for the upstream request."""
+        return self.writer.content_type
+
+    async def read_until_file(self):
+        """
+        Consume text fields up to the start of the file part.
+
+        Raises:
+            UploadError: The body ended without a file part
+        """
+        async for event in self._events:
+            if event[0] == FIELD:
+                self.fields[event[1]] = event[2]
+            elif event[0] == FILE_START:
+                self.file = event[1:]
+                return
+        raise UploadError(422, "A file part is required")
+
+    async def upstream_body(
+        self,
+        field_names: Iterable[str],
+        extra_fields: Optional[List[Tuple[str, str]]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield the upstream multipart body while the browser body is still arriving.
+
+        Args:
+            field_names: Browser fields forwarded upstream (모두 필수)
+            extra_fields: Fields added by the gateway (isStream 등)
+
+        Raises:
+            UploadError: Size limit exceeded or a required field is missing
+        """
+        writer = self.writer
+        field_names = list(field_names)
+        sent = set()
+
+        # 파일 앞에 온 필드는 먼저 전달 (기존 httpx files= 요청과 같은 순서)
+        for name, value in extra_fields or []:
+            yield writer.field(name, value)
+        for name in field_names:
+            if name in self.fields:
+                sent.add(name)
+                yield writer.field(name, self.fields[name])
+
+        file_field, filename, content_type = self.file
+        yield writer.file_header(file_field, filename, content_type)
+        complete = False
+        async for event in self._events:
+            if event[0] == FILE_DATA:
+                yield event[1]
+            elif event[0] == FILE_END:
+                complete = True
+                break
+        if not complete:
+            raise UploadError(400, "Upload ended before the file was complete")
+        yield writer.file_end()
+
+        # 파일 뒤에 온 필드 (기존 클라이언트는 file을 먼저 보냄)
+        async for event in self._events:
+            if event[0] == FIELD:
+                self.fields[event[1]] = event[2]
+        for name in field_names:
+            if name not in sent:
+                if name not in self.fields:
+                    raise UploadError(422, f"Missing form field: {name}")
+                yield writer.field(name, self.fields[name])
+
+        yield writer.end()
+        logger.debug(f"Upload proxied: {filename} ({self.reader.file_bytes} bytes)")
+
+    async def spool(self, spool_max_bytes: int = 1024 * 1024) -> "SpooledUpload":
+        """
+        Receive the rest of the body into a temporary file (비동기 작업용).
+        요청이 끝난 뒤에 업스트림으로 보내야 하는 경우 사용 (spool_max_bytes 초과 시 디스크로).
+
+        Raises:
+            UploadError: Size limit exceeded or the body ended before the file was complete
+        """
+        spooled = SpooledUpload(self.file, spool_max_bytes)
+        try:
+            complete = False
+            async for event in self._events:
+                if event[0] == FILE_DATA:
+                    await spooled.write(event[1])
+                elif event[0] == FILE_END:
+                    complete = True
+                elif event[0] == FIELD:
+                    self.fields[event[1]] = event[2]
+            if not complete:
+                raise UploadError(400, "Upload ended before the file was complete")
+        except BaseException:
+            spooled.close()
+            raise
+        spooled.fields = dict(self.fields)
+        return spooled
+
+
+class SpooledUpload:
+    """A fully received upload kept in a SpooledTemporaryFile until it is sent upstream."""
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, file: Tuple[str, str, str], spool_max_bytes: int):
+        self.fields: Dict[str, str] = {}
+        self.file = file  # (field name, filename, content type)
+        self.size = 0
+        self.writer = MultipartBodyWriter()
+        self._file = SpooledTemporaryFile(max_size=spool_max_bytes)
+
+    @property
+    def content_type(self) -> str:
+        """Content-Type header for the upstream request."""
+        return self.writer.content_type
+
+    @property
+    def _on_disk(self) -> bool:
+        # 디스크로 넘어간 뒤에는 파일 I/O를 스레드에서 실행 (이벤트 루프 블로킹 방지)
+        return getattr(self._file, "_rolled", True)
+
+    async def write(self, data: bytes):
+        self.size += len(data)
+        if self._on_disk:
+            await asyncio.to_thread(self._file.write, data)
+        else:
+            self._file.write(data)
+
+    async def _read(self) -> bytes:
+        if self._on_disk:
+            return await asyncio.to_thread(self._file.read, self.CHUNK_SIZE)
+        return self._file.read(self.CHUNK_SIZE)
+
+    async def upstream_body(
+        self,
+        field_names: Iterable[str],
+        extra_fields: Optional[List[Tuple[str, str]]] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield the upstream multipart body from the spooled file.
+
+        Args:
+            field_names: Received fields forwarded upstream (미리 required_fields()로 확인)
+            extra_fields: Fields added by the gateway (isStream 등)
+        """
+        writer = self.writer
+        for name, value in extra_fields or []:
+            yield writer.field(name, value)
+        for name in field_names:
+            yield writer.field(name, self.fields[name])
+
+        file_field, filename, content_type = self.file
+        yield writer.file_header(file_field, filename, content_type)
+        self._file.seek(0)
+        while True:
+            chunk = await self._read()
+            if not chunk:
+                break
+            yield chunk
+        yield writer.file_end()
+        yield writer.end()
+
+    def required_fields(self, field_names: Iterable[str]):
+        """
+        Raises:
+            UploadError: A required field was not sent
+        """
+        for name in field_names:
+            if name not in self.fields:
+                raise UploadError(422, f"Missing form field: {name}")
+
+    def close(self):
+        self._file.close()
+
+
+# Global upload settings instance
+upload_settings = UploadSettings()
@@ -0,0 +1,226 @@
+"""
+Upstream Connection Pools for FabriX
+SSE 스트림과 짧은 호출(agents, file)을 별도 httpx.AsyncClient 풀로 분리하고
+풀 대기 시간 / 활성 연결 / keep-alive 재사용률을 측정
+- 긴 스트리밍 응답이 연결을 수 분간 점유해도 짧은 호출이 풀에서 대기하지 않음
+- http2=True이면 h2 패키지가 설치된 경우에만 HTTP/2 사용 (멀티플렉싱)
+"""
+from collections import deque
+from typing import Optional
+import time
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# httpcore trace 이벤트: 새 연결 생성 시에만 발생
+CONNECT_EVENT = "connection.connect_tcp.started"
+# 요청 헤더 전송 시작 = 풀에서 연결을 배정받은 시점
+SEND_HEADERS_EVENTS = ("http11.send_request_headers.started", "http2.send_request_headers.started")
+
+
+def http2_available() -> bool:
+    """True if the optional h2 package is installed."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class PoolMetrics:
+    """
+    Counters for one upstream pool (이벤트 루프에서만 갱신).
+    """
+
+    def __init__(self, name: str, sample_size: int = 1024):
+        """
+        Args:
+            name: Pool name ("stream", "short")
+            sample_size: Number of recent pool wait samples kept for percentiles
+        """
+        self.name = name
+        self.requests = 0
+        self.active_requests = 0
+        self.peak_active_requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.pool_timeouts = 0
+        self.errors = 0
+        self.total_pool_wait = 0.0
+        self.max_pool_wait = 0.0
+        self._waits = deque(maxlen=sample_size)
+
+    def request_started(self):
+        self.requests += 1
+        self.active_requests += 1
+        self.peak_active_requests = max(self.peak_active_requests, self.active_requests)
+
+    def request_finished(self):
+        self.active_requests -= 1
+
+    def connection_assigned(self, pool_wait: float, reused: bool):
+        if reused:
+            self.reused_connections += 1
+        else:
+            self.new_connections += 1
+        self.total_pool_wait += pool_wait
+        self.max_pool_wait = max(self.max_pool_wait, pool_wait)
+        self._waits.append(pool_wait)
+
+    def _percentile(self, samples: list, ratio: float) -> float:
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(len(samples) * ratio))]
+
+    def snapshot(self) -> dict:
+        """Get metrics as a dict (times in milliseconds)."""
+        assigned = self.new_connections + self.reused_connections
+        samples = sorted(self._waits)
+        return {
+            'requests': self.requests,
+            'active_requests': self.active_requests,
+            'peak_active_requests': self.peak_active_requests,
+            'new_connections': self.new_connections,
+            'reused_connections': self.reused_connections,
+            'keepalive_reuse_ratio': round(self.reused_connections / assigned, 4) if assigned else 0.0,
+            'pool_timeouts': self.pool_timeouts,
+            'errors': self.errors,
+            'pool_wait_ms': {
+                'avg': round(self.total_pool_wait / assigned * 1000, 3) if assigned else 0.0,
+                'p50': round(self._percentile(samples, 0.50) * 1000, 3),
+                'p95': round(self._percentile(samples, 0.95) * 1000, 3),
+                'max': round(self.max_pool_wait * 1000, 3)
+            }
+        }
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body wrapper: 스트림이 닫힐 때 활성 요청 수 감소."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, metrics: PoolMetrics):
+        self._stream = stream
+        self._metrics = metrics
+        self._closed = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        if not self._closed:
+            self._closed = True
+            self._metrics.request_finished()
+        await self._stream.aclose()
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """
+    AsyncHTTPTransport that records pool metrics through the httpcore trace extension.
+    """
+
+    def __init__(self, metrics: PoolMetrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        metrics = self.metrics
+        started = time.perf_counter()
+        state = {'connect': None, 'assigned': False}
+        user_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: dict):
+            if not state['assigned']:
+                if event_name == CONNECT_EVENT:
+                    state['connect'] = time.perf_counter()
+                elif event_name in SEND_HEADERS_EVENTS:
+                    # 새 연결이면 연결 생성 직전까지, 재사용이면 헤더 전송 직전까지가 풀 대기 시간
+                    state['assigned'] = True
+                    reused = state['connect'] is None
+                    assigned_at = time.perf_counter() if reused else state['connect']
+                    metrics.connection_assigned(assigned_at - started, reused)
+            if user_trace is not None:
+                await user_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        metrics.request_started()
+        try:
+            response = await super().handle_async_request(request)
+        except httpx.PoolTimeout:
+            metrics.pool_timeouts += 1
+            metrics.request_finished()
+            raise
+        except Exception:
+            metrics.errors += 1
+            metrics.request_finished()
+            raise
+
+        response.stream = _TrackedStream(response.stream, metrics)
+        return response
+
+    def pool_stats(self) -> dict:
+        """Open/idle connection counts of the underlying httpcore pool."""
+        connections = list(self._pool.connections)
+        return {
+            'open_connections': len(connections),
+            'idle_connections': sum(1 for connection in connections if connection.is_idle()),
+            'http2_connections': sum(
+                1 for connection in connections
+                if getattr(connection, "_connection", None) is not None
+                and type(connection._connection).__name__ == "AsyncHTTP2Connection"
+            )
+        }
+
+
+def create_upstream_client(
+    name: str,
+    max_connections: int,
+    max_keepalive_connections: int,
+    keepalive_expiry: float = 30.0,
+    timeout: Optional[httpx.Timeout] = None,
+    http2: bool = False
+) -> httpx.AsyncClient:
+    """
+    Create an AsyncClient with its own instrumented connection pool.
+
+    Args:
+        name: Pool name used in metrics and logs
+        max_connections: Maximum concurrent connections in this pool
+        max_keepalive_connections: Idle connections kept open for reuse
+        keepalive_expiry: Seconds an idle connection is kept
+        timeout: Request timeout (pool= 값이 풀 대기 최대 시간)
+        http2: Use HTTP/2 when the h2 package is installed
+
+    Returns:
+        AsyncClient whose transport exposes .metrics and .pool_stats()
+    """
+    if http2 and not http2_available():
+        logger.warning(f"HTTP/2 requested for '{name}' pool but h2 is not installed, using HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry
+    )
+    transport = InstrumentedTransport(PoolMetrics(name), limits=limits, http2=http2)
+    client = httpx.AsyncClient(
+        transport=transport,
+        timeout=timeout or httpx.Timeout(60.0, connect=10.0, read=60.0)
+    )
+    logger.info(
+        f"✅ Upstream pool '{name}' initialized: max={max_connections}, "
+        f"keepalive={max_keepalive_connections}, HTTP/2={'on' if http2 else 'off'}"
+    )
+    return client
+
+
+def get_pool_metrics(client: httpx.AsyncClient) -> dict:
+    """Metrics and pool state of a client created by create_upstream_client()."""
+    transport = client._transport
+    if not isinstance(transport, InstrumentedTransport):
+        return {}
+    stats = transport.metrics.snapshot()
+    stats.update(transport.pool_stats())
+    return stats
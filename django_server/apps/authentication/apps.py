@@ -5,3 +5,7 @@ class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.authentication'
     verbose_name = 'Authentication'
+
+    def ready(self):
+        # 토큰 삭제 시 Gateway 토큰 캐시 무효화
+        from . import signals  # noqa: F401
@@ -0,0 +1,30 @@
+import logging
+from django.conf import settings
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_gateway_token_cache(sender, instance, **kwargs):
+    """
+    토큰 삭제 시 AI Gateway의 토큰 캐시에서도 즉시 제거
+    (Gateway가 꺼져 있어도 캐시 TTL이 지나면 자동 만료되므로 실패는 무시)
+    """
+    gateway_url = getattr(settings, 'AI_GATEWAY_URL', '').rstrip('/')
+    gateway_secret = getattr(settings, 'AI_GATEWAY_INTERNAL_SECRET', '')
+    http_client = getattr(settings, 'SHARED_HTTP_CLIENT', None)
+    if not gateway_url or not gateway_secret or http_client is None:
+        return
+
+    try:
+        http_client.post(
+            f"{gateway_url}/auth/token-cache/invalidate",
+            json={'token': instance.key},
+            headers={'X-Gateway-Secret': gateway_secret},
+            timeout=2.0,
+        )
+    except Exception as e:
+        logger.warning(f"Gateway token cache invalidation failed: {e}")
@@ -0,0 +1,177 @@
+"""
+Thread-safe 재시도 + Circuit Breaker (FabriX Agent 목록 조회용 동기 GET)
+Gateway(ai_gateway/services/resilience.py)와 같은 정책의 동기 버전
+- Django는 별도 프로세스(django_server에서 실행)라 gateway 패키지를 import하지 않으므로
+  Django가 실제로 쓰는 GET 경로만 둠 (POST 재시도 규칙 / 통계는 Gateway에만 있음)
+- 설정은 Gateway와 같은 secrets.toml [gateway] upstream_* 값 사용 (config/settings.py FABRIX_RESILIENCE)
+- 재시도: 지수 백오프 + full jitter, Retry-After 준수 (너무 길면 재시도하지 않음)
+- 연속 실패가 쌓이면 일정 시간 즉시 실패 (워커 스레드가 타임아웃으로 묶이지 않음)
+정책(재시도 대상 오류 / 상태 코드, breaker 전이)을 바꾸면 Gateway 쪽도 같이 바꿀 것
+"""
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# GET은 멱등이므로 요청이 전달된 뒤의 오류도 재시도
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.ReadTimeout,
+                httpx.WriteTimeout, httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError)
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, endpoint, retry_after):
+        super().__init__(f"FabriX '{endpoint}' is unavailable (circuit open, retry in {retry_after:.0f}s)")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """Retry-After 헤더 → 대기 초 (숫자 또는 HTTP-date, 잘못된 값이면 None)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, moment.timestamp() - datetime.now(timezone.utc).timestamp())
+
+
+class CircuitBreaker:
+    """closed → (연속 실패 failure_threshold회) → open → (recovery_timeout 경과) → half_open → closed/open"""
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open':
+                remaining = self._opened_at + self.recovery_timeout - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(self.name, remaining)
+                self.state = 'half_open'
+                self._trial_in_flight = False
+            if self.state == 'half_open':
+                # 시험 호출은 한 번에 하나만
+                if self._trial_in_flight:
+                    raise CircuitOpenError(self.name, self.recovery_timeout)
+                self._trial_in_flight = True
+
+    def release(self):
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                logger.info(f"Circuit '{self.name}' closed")
+            self.state = 'closed'
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == 'half_open' or self.consecutive_failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.warning(
+                        f"Circuit '{self.name}' opened after {self.consecutive_failures} consecutive failures"
+                    )
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+
+class UpstreamResilience:
+    def __init__(self, max_attempts=3, base_delay=0.2, max_delay=5.0, max_retry_after=30.0,
+                 failure_threshold=5, recovery_timeout=30.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint):
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(endpoint, self.failure_threshold, self.recovery_timeout)
+                self._breakers[endpoint] = breaker
+            return breaker
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def get(self, client, endpoint, url, **kwargs):
+        """
+        client.get()을 재시도 / Circuit Breaker와 함께 호출
+        재시도 후에도 오류 상태면 마지막 응답을 그대로 반환 (호출자가 raise_for_status)
+        Circuit이 열려 있으면 CircuitOpenError
+        """
+        breaker = self.breaker(endpoint)
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.allow()
+            can_retry = attempt < self.max_attempts
+
+            try:
+                response = client.get(url, **kwargs)
+            except RETRY_ERRORS as e:
+                # 풀 대기 초과는 Django 쪽 포화이므로 FabriX 장애로 집계하지 않음
+                if isinstance(e, httpx.PoolTimeout):
+                    breaker.release()
+                else:
+                    breaker.record_failure()
+                if not can_retry:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"FabriX '{endpoint}' {type(e).__name__}, retry {attempt} in {delay:.2f}s")
+            except httpx.TransportError:
+                breaker.record_failure()
+                raise
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                status = response.status_code
+                if status >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if not (can_retry and status in RETRY_STATUSES):
+                    return response
+                retry_after = parse_retry_after(response.headers.get('retry-after'))
+                if retry_after is None:
+                    delay = self._backoff(attempt)
+                elif retry_after > self.max_retry_after:
+                    return response
+                else:
+                    delay = retry_after + random.uniform(0, self.base_delay)
+                response.close()
+                logger.warning(f"FabriX '{endpoint}' returned {status}, retry {attempt} in {delay:.2f}s")
+
+            time.sleep(delay)
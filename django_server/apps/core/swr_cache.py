@@ -0,0 +1,78 @@
+"""
+Thread-safe Stale-While-Revalidate 캐시 (single-flight)
+Django 워커 스레드가 느린 외부 API(FabriX Agent 목록 등)를 매번 동기 호출하지 않도록 함
+- TTL 이내: 캐시된 값 즉시 반환
+- TTL 경과 ~ stale TTL 이내: 캐시된 값을 즉시 반환하고 백그라운드 스레드에서 1회만 갱신
+- 캐시가 없으면: 동시 요청 중 하나만 호출하고 나머지는 그 결과를 기다림
+Gateway의 ai_gateway/services/response_cache.py(asyncio)와 같은 동작의 스레드 버전
+(Django는 gateway 패키지를 import하지 않으므로 Agent 목록 조회에 쓰는 get_or_fetch만 둠)
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class SWRCache:
+    def __init__(self, ttl_seconds=60.0, stale_ttl_seconds=600.0, max_workers=1):
+        self.ttl = ttl_seconds
+        self.stale_ttl = max(stale_ttl_seconds, ttl_seconds)
+
+        self._entries = {}   # key -> (fetched_at, value)
+        self._inflight = {}  # key -> Future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='swr-refresh')
+
+    def get_or_fetch(self, key, fetch):
+        """
+        key에 대한 캐시 값을 반환 (필요 시 fetch()를 동시에 최대 1회만 호출)
+        캐시 값이 없을 때 fetch()가 실패하면 그 예외를 그대로 전달
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                fetched_at, value = entry
+                age = now - fetched_at
+                if age < self.ttl:
+                    return value
+                if age < self.stale_ttl:
+                    # 오래된 값 즉시 반환, 갱신은 백그라운드 스레드에서
+                    if key not in self._inflight:
+                        future = Future()
+                        self._inflight[key] = future
+                        self._executor.submit(self._run_fetch, key, fetch, future)
+                    return value
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if owner:
+            # 첫 요청 스레드가 직접 호출 (나머지는 결과를 기다림)
+            self._run_fetch(key, fetch, future)
+        return future.result()
+
+    def _run_fetch(self, key, fetch, future):
+        try:
+            value = fetch()
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+                entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.stale_ttl:
+                # 갱신 실패: 기존 값 계속 사용 (stale-if-error)
+                logger.warning(f"SWR cache refresh failed, serving stale value: {e}")
+                future.set_result(entry[1])
+            else:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._inflight.pop(key, None)
+        future.set_result(value)
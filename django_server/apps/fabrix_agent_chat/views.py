@@ -10,11 +10,43 @@ from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, logout as auth_logout
+from apps.core.resilience import CircuitOpenError, UpstreamResilience
+from apps.core.swr_cache import SWRCache
 from .models import ChatSession, ChatMessage
 from .serializers import ChatSessionSerializer, ChatSessionDetailSerializer, ChatMessageSerializer
 
 logger = logging.getLogger(__name__)
 
+# Agent 목록은 거의 바뀌지 않으므로 프로세스 단위로 캐싱 (동시 요청은 1회 호출로 합침)
+agent_list_cache = SWRCache(
+    ttl_seconds=getattr(settings, 'AGENT_LIST_CACHE_TTL', 60),
+    stale_ttl_seconds=getattr(settings, 'AGENT_LIST_CACHE_STALE_TTL', 600),
+)
+
+# FabriX 호출 재시도(지수 백오프 + jitter) / Circuit Breaker (프로세스 단위로 공유)
+fabrix_resilience = UpstreamResilience(**getattr(settings, 'FABRIX_RESILIENCE', {}))
+
+
+def fetch_agent_list(target_url, headers, params):
+    """
+    FabriX Agent 목록 조회 (Timeout/연결 오류/5xx는 백오프 후 재시도, FabriX 장애 중에는 즉시 실패)
+    """
+    # settings에서 공유 HTTP 클라이언트 사용 (연결 재사용)
+    http_client = getattr(settings, 'SHARED_HTTP_CLIENT', None)
+
+    if http_client is None:
+        # Fallback: 클라이언트가 없으면 새로 생성
+        with httpx.Client(timeout=15.0) as client:
+            response = fabrix_resilience.get(client, 'agents', target_url, headers=headers, params=params)
+            response.raise_for_status()
+            return response.json()
+
+    # 공유 클라이언트 사용
+    response = fabrix_resilience.get(http_client, 'agents', target_url, headers=headers, params=params)
+    response.raise_for_status()
+    return response.json()
+
+
 # [추가] Agent 목록 조회 Proxy View
 class AgentListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -33,61 +65,43 @@ class AgentListView(APIView):
             'x-generative-ai-user-email': fabrix_conf.get('user_email', ''),
         }
         
-        # Retry logic for better reliability
-        max_retries = 2
-        retry_count = 0
-        
-        while retry_count <= max_retries:
-            try:
-                # settings에서 공유 HTTP 클라이언트 사용 (연결 재사용)
-                http_client = getattr(settings, 'SHARED_HTTP_CLIENT', None)
-                
-                # Fetch parameters
-                params = {'page': 1, 'limit': 100}
-                
-                if http_client is None:
-                    # Fallback: 클라이언트가 없으면 새로 생성
-                    with httpx.Client(timeout=15.0) as client:
-                        response = client.get(target_url, headers=headers, params=params)
-                        response.raise_for_status()
-                        return JsonResponse(response.json(), status=response.status_code, safe=False)
-                
-                # 공유 클라이언트 사용
-                response = http_client.get(target_url, headers=headers, params=params)
-                response.raise_for_status()
-                return JsonResponse(response.json(), status=response.status_code, safe=False)
-                
-            except httpx.TimeoutException:
-                retry_count += 1
-                logger.warning(f"Timeout fetching agents (attempt {retry_count}/{max_retries + 1})")
-                if retry_count > max_retries:
-                    return JsonResponse(
-                        {'error': 'Request timeout to FabriX API after retries'},
-                        status=504
-                    )
-                continue
-            except httpx.HTTPStatusError as e:
-                # Don't retry on HTTP errors (4xx, 5xx)
-                logger.error(f"HTTP error fetching agents: {e.response.status_code}")
-                return JsonResponse(
-                    {'error': str(e), 'status_code': e.response.status_code},
-                    status=e.response.status_code
-                )
-            except httpx.ConnectError as e:
-                retry_count += 1
-                logger.warning(f"Connection error fetching agents (attempt {retry_count}/{max_retries + 1}): {e}")
-                if retry_count > max_retries:
-                    return JsonResponse(
-                        {'error': f'Connection failed to FabriX API: {str(e)}'},
-                        status=503
-                    )
-                continue
-            except Exception as e:
-                logger.exception(f"Unexpected error fetching agents: {e}")
-                return JsonResponse(
-                    {'error': f'Failed to fetch agents: {str(e)}'},
-                    status=500
-                )
+        # Fetch parameters
+        params = {'page': 1, 'limit': 100}
+
+        try:
+            # 캐시가 있으면 FabriX 호출 없이 즉시 반환 (만료된 경우 백그라운드 갱신)
+            data = agent_list_cache.get_or_fetch(
+                target_url, lambda: fetch_agent_list(target_url, headers, params)
+            )
+            return JsonResponse(data, safe=False)
+
+        except CircuitOpenError as e:
+            response = JsonResponse({'error': str(e)}, status=503)
+            response['Retry-After'] = str(max(1, int(e.retry_after + 0.5)))
+            return response
+        except httpx.TimeoutException:
+            return JsonResponse(
+                {'error': 'Request timeout to FabriX API after retries'},
+                status=504
+            )
+        except httpx.HTTPStatusError as e:
+            # 재시도 후에도 실패한 HTTP 오류 (4xx는 재시도하지 않음)
+            logger.error(f"HTTP error fetching agents: {e.response.status_code}")
+            return JsonResponse(
+                {'error': str(e), 'status_code': e.response.status_code},
+                status=e.response.status_code
+            )
+        except httpx.ConnectError as e:
+            return JsonResponse(
+                {'error': f'Connection failed to FabriX API: {str(e)}'},
+                status=503
+            )
+        except Exception as e:
+            logger.exception(f"Unexpected error fetching agents: {e}")
+            return JsonResponse(
+                {'error': f'Failed to fetch agents: {str(e)}'},
+                status=500
+            )
 
 class ChatSessionViewSet(viewsets.ModelViewSet):
     serializer_class = ChatSessionSerializer
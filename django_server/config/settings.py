@@ -143,6 +143,27 @@ ADMIN_SIGNUP_KEY = SECRETS['auth']['admin_signup_key']
 # FabriX API 설정 노출 (secrets.toml에서 로드된 값 사용)
 FABRIX_API_CONFIG = SECRETS.get('fabrix_api', {})
 
+# Agent 목록 캐시 (TTL 이내는 그대로 반환, stale TTL 이내는 반환 후 백그라운드 갱신)
+AGENT_LIST_CACHE_TTL = FABRIX_API_CONFIG.get('agent_cache_ttl', 60)
+AGENT_LIST_CACHE_STALE_TTL = FABRIX_API_CONFIG.get('agent_cache_stale_ttl', 600)
+
+# FabriX 호출 재시도 / Circuit Breaker (apps.core.resilience)
+# Gateway와 같은 [gateway] upstream_* 값을 사용 (두 서버의 재시도 / breaker 정책이 따로 바뀌지 않도록)
+_GATEWAY_CONFIG = SECRETS.get('gateway', {})
+FABRIX_RESILIENCE = {
+    'max_attempts': _GATEWAY_CONFIG.get('upstream_retry_attempts', 3),
+    'base_delay': _GATEWAY_CONFIG.get('upstream_retry_base_delay', 0.2),
+    'max_delay': _GATEWAY_CONFIG.get('upstream_retry_max_delay', 5.0),
+    'max_retry_after': _GATEWAY_CONFIG.get('upstream_retry_max_after', 30.0),
+    'failure_threshold': _GATEWAY_CONFIG.get('upstream_breaker_failures', 5),
+    'recovery_timeout': _GATEWAY_CONFIG.get('upstream_breaker_recovery', 30.0),
+}
+
+# AI Gateway 주소 (토큰 삭제 시 Gateway 토큰 캐시 무효화 요청에 사용)
+AI_GATEWAY_URL = SECRETS['server'].get('gateway_url', 'http://127.0.0.1:8001')
+# Gateway 내부 엔드포인트 호출용 공유 비밀값 (Gateway도 같은 secrets.toml 값으로 검증, 없으면 무효화 요청을 보내지 않음)
+AI_GATEWAY_INTERNAL_SECRET = SECRETS['server'].get('gateway_internal_secret', '')
+
 # 브라우저 종료 시 세션 만료
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True  # 브라우저 닫으면 세션 삭제
 SESSION_COOKIE_AGE = 1800  # 30분 후 자동 만료 (선택 사항)
@@ -165,9 +186,8 @@ SHARED_HTTP_CLIENT = httpx.Client(
         max_connections=50,            # Reduced for Windows compatibility
         keepalive_expiry=30.0          # Close idle connections after 30s
     ),
-    transport=httpx.HTTPTransport(
-        retries=2  # Automatic retry on connection failures
-    )
+    # 연결 실패 재시도는 apps.core.resilience에서 백오프와 함께 처리 (transport 재시도와 중복되지 않도록 0)
+    transport=httpx.HTTPTransport(retries=0)
 )
 
 # 애플리케이션 종료 시 클라이언트 닫기
@@ -1,4 +1,13 @@
-import { fastApiClient } from './axiosConfig';
+import { fastApiClient, getFastApiUrl } from './axiosConfig';
+
+// response_format='url' 결과의 상대 경로를 Gateway 주소로 바꾸고 만료 시각 계산
+const resolveResultUrls = (result) => {
+  const resolved = { ...result, expiresAt: Date.now() + result.expires_in * 1000 };
+  for (const name of ['result', 'file1', 'file2', 'download']) {
+    resolved[`${name}_url`] = getFastApiUrl(result[`${name}_url`]);
+  }
+  return resolved;
+};
 
 export const fastApi = {
   // 사용 가능한 FabriX Agent 목록 조회
@@ -11,10 +20,11 @@ export const fastApi = {
   // 파일 업로드 및 분석 요청
   // file: File 객체, agentId: 선택된 에이전트 ID, query: 사용자의 요청(프롬프트)
   uploadFile: async (file, agentId, query) => {
+    // 텍스트 필드를 파일보다 먼저 보내야 Gateway가 파일을 받는 즉시 FabriX로 전달할 수 있음
     const formData = new FormData();
-    formData.append('file', file);
     formData.append('agentId', agentId);
     formData.append('contents', query); // FastAPI에서 List로 변환 처리됨
+    formData.append('file', file);
 
     const response = await fastApiClient.post('/agent-messages/file', formData, {
       headers: {
@@ -24,10 +34,54 @@ export const fastApi = {
     return response.data;
   },
 
+  // 파일 분석을 비동기 작업으로 제출 (job id 즉시 반환, 분석 시간이 길어도 타임아웃 없음)
+  // sessionId를 보내면 Gateway가 질문/답변을 해당 세션에 저장
+  submitFileJob: async (file, agentId, query, sessionId) => {
+    const formData = new FormData();
+    formData.append('agentId', agentId);
+    formData.append('contents', query);
+    if (sessionId) formData.append('sessionId', sessionId);
+    formData.append('file', file);
+
+    const response = await fastApiClient.post('/agent-messages/file/jobs', formData, {
+      headers: {
+        'Content-Type': 'multipart/form-data',
+      },
+    });
+    return response.data;
+  },
+
+  // 파일 분석 작업 상태 조회 (status: queued | running | succeeded | failed | cancelled)
+  getFileJob: async (jobId) => {
+    const response = await fastApiClient.get(`/agent-messages/file/jobs/${jobId}`);
+    return response.data;
+  },
+
+  // 작업이 끝날 때까지 폴링 후 결과 반환 (실패/취소 시 예외)
+  waitForFileJob: async (jobId, intervalMs = 2000) => {
+    for (;;) {
+      const job = await fastApi.getFileJob(jobId);
+      if (job.status === 'succeeded') return job.result;
+      if (job.status === 'failed' || job.status === 'cancelled') {
+        throw new Error(job.error?.detail || `File analysis ${job.status}`);
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
+
   // 이미지 비교 요청
-  // params: { file1, file2, mode, diffThreshold, featureCount, page1, page2 }
+  // params: { file1, file2, mode, diffThreshold, featureCount, page1, page2, alignment, tiled, responseFormat,
+  //           outputFormats, previewMaxDimension }
+  // alignment: 'orb' (기본) 또는 'pyramid' (축소본에서 정렬 후 원본 해상도 보정, 큰 페이지에서 빠름)
+  // tiled: 대형 도면을 원본 해상도로 tile 비교 (download_base64가 원본 해상도 PNG)
+  // responseFormat: 'json' (이미지를 base64로 포함) 또는 'url' (result_url 등을 <img src>로 바로 사용, expiresAt까지 유효)
+  // outputFormats: 결과 이미지별 형식 (예: 'preview:webp:75,download:png:3', 기본 미리보기 JPEG / 다운로드 PNG)
+  // previewMaxDimension: 화면 표시용 이미지 최대 크기 (기본 2000, 0이면 원본 크기)
   compareImages: async (params) => {
-    const { file1, file2, mode, diffThreshold, featureCount, page1, page2 } = params;
+    const {
+      file1, file2, mode, diffThreshold, featureCount, page1, page2,
+      alignment = 'orb', tiled = false, responseFormat = 'json', outputFormats, previewMaxDimension,
+    } = params;
     
     const formData = new FormData();
     formData.append('file1', file1);
@@ -37,6 +91,11 @@ export const fastApi = {
     formData.append('feature_count', featureCount);
     formData.append('page1', page1);
     formData.append('page2', page2);
+    formData.append('alignment', alignment);
+    if (tiled) formData.append('tiled', 'true');
+    formData.append('response_format', responseFormat);
+    if (outputFormats) formData.append('output_formats', outputFormats);
+    if (previewMaxDimension !== undefined) formData.append('preview_max_dimension', previewMaxDimension);
 
     const response = await fastApiClient.post('/image-compare/process', formData, {
       headers: {
@@ -45,6 +104,59 @@ export const fastApi = {
       timeout: 60000, // 60초 타임아웃 (대용량 파일 처리)
     });
     
-    return response.data;
+    return responseFormat === 'url' ? resolveResultUrls(response.data) : response.data;
+  },
+
+  // 여러 페이지 일괄 비교 (NDJSON 스트림, 끝나는 페이지부터 onPage 호출)
+  // params: { file1, file2, pages ('all' 또는 '0:0,1:2'), mode, diffThreshold, featureCount, alignment,
+  //           outputFormats, previewMaxDimension, onPage } (compareImages와 동일)
+  // 반환: { done: true, pages, failed }
+  compareDocuments: async (params) => {
+    const {
+      file1, file2, pages = 'all', mode, diffThreshold, featureCount, alignment = 'orb',
+      outputFormats, previewMaxDimension, onPage, signal,
+    } = params;
+
+    const formData = new FormData();
+    formData.append('file1', file1);
+    formData.append('file2', file2);
+    formData.append('pages', pages);
+    formData.append('mode', mode);
+    formData.append('diff_threshold', diffThreshold);
+    formData.append('feature_count', featureCount);
+    formData.append('alignment', alignment);
+    if (outputFormats) formData.append('output_formats', outputFormats);
+    if (previewMaxDimension !== undefined) formData.append('preview_max_dimension', previewMaxDimension);
+
+    // axios는 응답 스트림을 줄 단위로 읽을 수 없으므로 fetch 사용
+    const response = await fetch(getFastApiUrl('/image-compare/batch'), {
+      method: 'POST',
+      headers: { 'Authorization': `Token ${sessionStorage.getItem('authToken')}` },
+      body: formData,
+      signal,
+    });
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({}));
+      throw new Error(error.detail || `Batch comparison failed (${response.status})`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    let summary = null;
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffered += decoder.decode(value, { stream: true });
+      const lines = buffered.split('\n');
+      buffered = lines.pop();
+      for (const line of lines) {
+        if (!line) continue;
+        const item = JSON.parse(line);
+        if (item.done) summary = item;
+        else if (onPage) onPage(item);
+      }
+    }
+    return summary;
   },
-};
\ No newline at end of file
+};
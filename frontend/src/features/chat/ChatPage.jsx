@@ -82,14 +82,14 @@ const ChatPage = () => {
         window.dispatchEvent(new Event('session-created'));
       }
 
-      await chatApi.saveMessage(sessionId, 'user', userMsg.content);
       setMessages(prev => [...prev, { role: 'assistant', content: '' }]);
      
       if (file) {
-        const result = await fastApi.uploadFile(file, selectedAgentId, text || "Analyze this file");
+        // 비동기 작업으로 제출 후 완료될 때까지 폴링 (질문/답변은 Gateway가 세션에 저장)
+        const job = await fastApi.submitFileJob(file, selectedAgentId, text || "Analyze this file", sessionId);
+        const result = await fastApi.waitForFileJob(job.jobId);
         const answer = result.content || "Done.";
         updateLastMessage(answer);
-        await chatApi.saveMessage(sessionId, 'assistant', answer);
         setIsLoading(false);
       } else {
         abortControllerRef.current = new AbortController();
@@ -103,7 +103,8 @@ const ChatPage = () => {
             'Content-Type': 'application/json',
             'Authorization': `Token ${token}`
           },
-          body: JSON.stringify({ agentId: selectedAgentId, contents: [text], isStream: true, isRagOn: true }),
+          // 질문/답변은 Gateway가 sessionId 세션에 직접 저장
+          body: JSON.stringify({ agentId: selectedAgentId, contents: [text], isStream: true, isRagOn: true, sessionId }),
           signal: abortControllerRef.current.signal,
           onmessage(ev) {
             try {
@@ -117,7 +118,6 @@ const ChatPage = () => {
           },
           onerror(err) { throw err; },
           onclose() {
-            chatApi.saveMessage(sessionId, 'assistant', accumulatedAnswer);
             setIsLoading(false);
           }
         });
@@ -140,11 +140,8 @@ const ChatPage = () => {
   const handleStop = () => {
     if (abortControllerRef.current) {
       abortControllerRef.current.abort();
+      // 중단 시점까지의 답변은 Gateway가 저장
       setIsLoading(false);
-      if (currentSessionId && messages.length > 0) {
-        const lastMsg = messages[messages.length - 1];
-        if (lastMsg.role === 'assistant') chatApi.saveMessage(currentSessionId, 'assistant', lastMsg.content);
-      }
     }
   };
 
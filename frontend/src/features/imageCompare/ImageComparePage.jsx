@@ -60,6 +60,12 @@ const ImageComparePage = () => {
     // Generate a unique cache key based on inputs and settings
     const cacheKey = `${p1}-${p2}-${settings.mode}-${settings.diffThreshold}-${settings.featureCount}`;
 
+    // 결과 URL이 만료된 항목은 다시 비교
+    const cached = resultCache.current.get(cacheKey);
+    if (cached?.expiresAt && cached.expiresAt <= Date.now()) {
+      resultCache.current.delete(cacheKey);
+    }
+
     // Check cache first - return immediately without triggering loading state
     if (resultCache.current.has(cacheKey)) {
       const cachedResult = resultCache.current.get(cacheKey);
@@ -88,7 +94,9 @@ const ImageComparePage = () => {
         diffThreshold: settings.diffThreshold,
         featureCount: settings.featureCount,
         page1: p1,
-        page2: p2
+        page2: p2,
+        // 이미지는 base64 JSON 대신 URL로 받아 브라우저가 바로 디코딩 (PNG는 다운로드할 때만 인코딩)
+        responseFormat: 'url'
       });
       
       // Store result in cache (Limit to 5 items to prevent memory leaks)
@@ -184,6 +192,16 @@ const ImageComparePage = () => {
   };
 
   const handleDownload = (base64Data, metadata) => {
+    if (!base64Data.startsWith('data:')) {
+      // response_format='url': download_url에서 Gateway가 Content-Disposition: attachment로 PNG 전달
+      const link = document.createElement('a');
+      link.href = base64Data;
+      document.body.appendChild(link);
+      link.click();
+      document.body.removeChild(link);
+      return;
+    }
+
     const byteString = atob(base64Data.split(',')[1]);
     const mimeString = base64Data.split(',')[0].split(':')[1].split(';')[0];
     const ab = new ArrayBuffer(byteString.length);
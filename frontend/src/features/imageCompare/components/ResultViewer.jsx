@@ -17,7 +17,12 @@ const ResultViewer = ({ resultData, onDownload }) => {
   }
 
   // resultData now contains file1_base64, file2_base64, result_base64, metadata
-  const { result_base64, file1_base64, file2_base64, download_base64, metadata } = resultData;
+  // (response_format='url'이면 *_base64 대신 *_url)
+  const { metadata } = resultData;
+  const resultSrc = resultData.result_url || resultData.result_base64;
+  const file1Src = resultData.file1_url || resultData.file1_base64;
+  const file2Src = resultData.file2_url || resultData.file2_base64;
+  const downloadSrc = resultData.download_url || resultData.download_base64;
   const isDiffMode = metadata.mode === 'difference';
 
   return (
@@ -40,7 +45,7 @@ const ResultViewer = ({ resultData, onDownload }) => {
         )}
 
         <button
-          onClick={() => onDownload(download_base64, metadata)}
+          onClick={() => onDownload(downloadSrc, metadata)}
           className="flex items-center gap-2 px-3 py-2 bg-blue-600 text-white text-sm font-bold rounded-lg hover:bg-blue-700 transition-colors shadow-sm"
         >
           <Download size={16} />
@@ -53,7 +58,7 @@ const ResultViewer = ({ resultData, onDownload }) => {
         ref={containerRef}
         className="flex-1 relative overflow-auto bg-gray-50 flex"
       >
-        {isDiffMode && file1_base64 && file2_base64 ? (
+        {isDiffMode && file1Src && file2Src ? (
           // Split View (Difference Mode)
           <div className="flex w-full h-full">
             {/* Left Pane (File 1) */}
@@ -64,7 +69,7 @@ const ResultViewer = ({ resultData, onDownload }) => {
               </div>
               <div className="flex-1 overflow-auto p-4 flex items-center justify-center">
                 <img 
-                   src={file1_base64} 
+                   src={file1Src} 
                    alt="File 1" 
                    className="max-w-full max-h-full object-contain" 
                 />
@@ -79,7 +84,7 @@ const ResultViewer = ({ resultData, onDownload }) => {
               </div>
               <div className="flex-1 overflow-auto p-4 flex items-center justify-center">
                 <img 
-                   src={file2_base64} 
+                   src={file2Src} 
                    alt="File 2" 
                    className="max-w-full max-h-full object-contain" 
                 />
@@ -91,7 +96,7 @@ const ResultViewer = ({ resultData, onDownload }) => {
           <div className="w-full h-full flex flex-col">            
             <div className="flex-1 overflow-auto p-4 flex items-center justify-center">
               <img
-                src={result_base64}
+                src={resultSrc}
                 alt="Comparison Result"
                 className="max-w-full max-h-full object-contain shadow-lg"
               />